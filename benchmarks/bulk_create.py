@@ -0,0 +1,89 @@
+"""
+Compares creating telecells one Create call at a time with streaming them through BulkCreate, in rows/second.
+
+Creates --count telecells each way, with UUIDs counting up from --first-uuid, then prunes them again (unless --keep).
+
+Run from the project root, with the server up:
+
+    python3 -m benchmarks.bulk_create --count 30000 --first-uuid 900000000
+"""
+import argparse
+import logging
+import os
+import random
+import time
+
+import grpc
+
+import lighting.lib.telecell_pb2 as tc_pb2
+import settings as lighting_settings
+from lighting.lib.location_pb2 import Location
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from log import setup_logger
+
+logger = setup_logger("benchmark", logging.INFO)
+
+
+def make_telecells(first_uuid: int, count: int):
+    for uuid in range(first_uuid, first_uuid + count):
+        yield tc_pb2.Reply(uuid=uuid, relay=False, status=tc_pb2.ActivityStatus.Value("INACTIVE"),
+                           location=Location(long=random.uniform(-10, 10), lat=random.uniform(40, 60)))
+
+
+def time_single(stub, first_uuid: int, count: int) -> tuple:
+    """
+    :return: IDs of the telecells created, and seconds taken.
+    """
+
+    start = time.perf_counter()
+    ids = [stub.Create(telecell).id for telecell in make_telecells(first_uuid, count)]
+    return ids, time.perf_counter() - start
+
+
+def time_bulk(stub, first_uuid: int, count: int) -> tuple:
+    """
+    :return: IDs of the telecells created, and seconds taken.
+    """
+
+    start = time.perf_counter()
+    bulk_reply = stub.BulkCreate(make_telecells(first_uuid, count))
+    elapsed = time.perf_counter() - start
+
+    for failure in bulk_reply.failures:
+        logger.warn("Telecell {} (UUID {}) not created: {}".format(failure.index, failure.uuid, failure.reason))
+
+    return [telecell.id for telecell in bulk_reply.telecells], elapsed
+
+
+def run(port: int, count: int, first_uuid: int, keep: bool):
+    channel = grpc.insecure_channel("localhost:{}".format(port))
+    stub = TelecellStub(channel)
+
+    created_ids = []
+
+    for name, timer, uuid in (("single", time_single, first_uuid), ("bulk", time_bulk, first_uuid + count)):
+        ids, elapsed = timer(stub, uuid, count)
+        created_ids.extend(ids)
+
+        logger.info("{}: {} telecells in {:.2f}s, {:.0f} rows/s".format(name, len(ids), elapsed, len(ids) / elapsed))
+
+    if not keep:
+        for tc_id in created_ids:
+            stub.Prune(tc_pb2.Request(id=tc_id))
+
+    channel.close()
+    return
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=os.getenv("LIGHTING_COMPONENTS_PORT"))
+    parser.add_argument("--count", type=int, default=10000, help="telecells to create each way")
+    parser.add_argument("--first-uuid", type=int, default=900000000,
+                        help="UUIDs from here to first-uuid + 2 * count must be free")
+    parser.add_argument("--keep", action="store_true", help="don't prune the telecells created")
+    args = parser.parse_args()
+
+    run(args.port, args.count, args.first_uuid, args.keep)
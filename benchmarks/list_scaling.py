@@ -0,0 +1,102 @@
+"""
+Measures how Element.List throughput scales with the number of server worker processes.
+
+For each worker count, starts `lighting/server/server.py --workers N` against the DB from the .env file, hammers
+Element.List from several client processes for a fixed time, and reports elements streamed per second.
+
+Run from the project root, with the DB up and seeded:
+
+    python3 -m benchmarks.list_scaling --workers 1 2 4 8 --clients 16
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import grpc
+
+import lighting.lib.element_pb2 as element_pb2
+import settings as lighting_settings
+from lighting.lib.element_pb2_grpc import ElementStub
+from log import setup_logger
+
+logger = setup_logger("benchmark", logging.INFO)
+
+
+def client(port: int, limit: int, duration: float) -> int:
+    """
+    Lists elements over and over for a while.
+
+    :return: number of elements received.
+    """
+
+    # one channel per client process, so that connections are spread over the server's workers
+    channel = grpc.insecure_channel("localhost:{}".format(port))
+    stub = ElementStub(channel)
+
+    received = 0
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        for reply_list in stub.List(element_pb2.ListRequest(limit=limit)):
+            received += len(reply_list.elements)
+
+    channel.close()
+    return received
+
+
+def measure(port: int, workers: int, clients: int, limit: int, duration: float) -> float:
+    """
+    :return: elements per second streamed by a server with that many worker processes.
+    """
+
+    env = dict(os.environ, LIGHTING_COMPONENTS_PORT=str(port))
+    server = subprocess.Popen([sys.executable, "-m", "lighting.server.server", "--workers", str(workers)], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        with grpc.insecure_channel("localhost:{}".format(port)) as channel:
+            grpc.channel_ready_future(channel).result(timeout=120)
+
+        # let every worker finish starting up
+        time.sleep(2)
+
+        with multiprocessing.get_context("spawn").Pool(clients) as pool:
+            start = time.perf_counter()
+            received = sum(pool.starmap(client, [(port, limit, duration)] * clients))
+            elapsed = time.perf_counter() - start
+
+    finally:
+        server.terminate()
+        server.wait()
+
+    return received / elapsed
+
+
+def run(port: int, worker_counts: list, clients: int, limit: int, duration: float):
+    baseline = None
+
+    for workers in worker_counts:
+        rate = measure(port, workers, clients, limit, duration)
+        baseline = baseline or rate
+
+        logger.info("{} worker(s): {:.0f} elements/s ({:.2f}x)".format(workers, rate, rate / baseline))
+
+    return
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=os.getenv("LIGHTING_COMPONENTS_PORT"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--limit", type=int, default=1000, help="elements per List call")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to measure each worker count for")
+    args = parser.parse_args()
+
+    run(args.port, args.workers, args.clients, args.limit, args.duration)
@@ -0,0 +1,86 @@
+"""
+Measures how many status reports per second Telecell.ReportStatus takes in.
+
+Several client processes each keep one ReportStatus stream open, sending reports for random telecells (picked from the
+first --telecells listed by the server) as fast as they can for a fixed time. The rate counts a report once the server
+has replied to its stream, i.e. once it has been written to the DB.
+
+Run from the project root, with the server up and the DB seeded:
+
+    python3 -m benchmarks.report_status --clients 8 --duration 20
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import time
+
+import grpc
+
+import lighting.lib.telecell_pb2 as tc_pb2
+import settings as lighting_settings
+from lighting.client.helpers import unpack_list_reply
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from log import setup_logger
+
+logger = setup_logger("benchmark", logging.INFO)
+
+STATUSES = [tc_pb2.ActivityStatus.Value("ACTIVE"), tc_pb2.ActivityStatus.Value("INACTIVE")]
+
+
+def list_uuids(port: int, count: int) -> list:
+    with grpc.insecure_channel("localhost:{}".format(port)) as channel:
+        stub = TelecellStub(channel)
+        uuids = []
+
+        for reply_list in stub.List(tc_pb2.ListRequest(limit=count)):
+            uuids.extend(telecell.uuid for telecell in unpack_list_reply(reply_list))
+
+    return uuids
+
+
+def make_reports(uuids: list, duration: float):
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        report = tc_pb2.StatusReport(uuid=random.choice(uuids), status=random.choice(STATUSES))
+        report.updated_at.GetCurrentTime()
+        yield report
+
+
+def client(port: int, uuids: list, duration: float) -> int:
+    """
+    Streams reports for a while.
+
+    :return: number of reports the server took in.
+    """
+
+    with grpc.insecure_channel("localhost:{}".format(port)) as channel:
+        return TelecellStub(channel).ReportStatus(make_reports(uuids, duration)).received
+
+
+def run(port: int, telecells: int, clients: int, duration: float):
+    uuids = list_uuids(port, telecells)
+    logger.info("Reporting status of {} telecells from {} clients".format(len(uuids), clients))
+
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        start = time.perf_counter()
+        received = sum(pool.starmap(client, [(port, uuids, duration)] * clients))
+        elapsed = time.perf_counter() - start
+
+    logger.info("{} reports in {:.2f}s: {:.0f} reports/s".format(received, elapsed, received / elapsed))
+    return
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=os.getenv("LIGHTING_COMPONENTS_PORT"))
+    parser.add_argument("--telecells", type=int, default=30000, help="number of telecells to report on")
+    parser.add_argument("--clients", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--duration", type=float, default=20, help="seconds each client streams for")
+    args = parser.parse_args()
+
+    run(args.port, args.telecells, args.clients, args.duration)
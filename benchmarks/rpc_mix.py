@@ -0,0 +1,342 @@
+"""
+Reproducible benchmark of a mix of RPCs, against a server started in this process on a local SQLite DB.
+
+Seeds a fresh SQLite file with a fleet of the given size, starts the threaded server (as serve() does), then has a
+fixed number of client threads run a weighted mix of Get, List, SearchByLocation, Create and Update calls for a fixed
+time. Throughput and p50/p95/p99 latency of each RPC are written to a JSON file, along with the commit and settings, so
+that results can be compared between commits.
+
+Run from the project root:
+
+    python3 -m benchmarks.rpc_mix --elements 100000 --concurrency 16 --duration 30 --output benchmark-results.json
+
+Set DB_URL to run against another DB instead, e.g. a local MySQL - which is then wiped and seeded too.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import grpc
+
+import lighting.lib.asset_pb2 as asset_pb2
+import lighting.lib.element_pb2 as element_pb2
+import lighting.lib.location_pb2 as location_pb2
+import lighting.lib.telecell_pb2 as tc_pb2
+import settings as lighting_settings
+from lighting.client.helpers import make_rectangle
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.lib.element_pb2_grpc import ElementStub
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from log import setup_logger
+
+logger = setup_logger("benchmark", logging.INFO)
+
+# weight of each RPC in the mix, unless --mix says otherwise
+DEFAULT_MIX = {
+    "Asset.Get": 20,
+    "Telecell.Get": 20,
+    "Element.List": 10,
+    "Asset.SearchByLocation": 20,
+    "Asset.Create": 10,
+    "Telecell.Update": 20,
+}
+
+# (left, bottom, right, top) in degrees of the area the fleet is seeded over, and updated telecells are moved within
+AREA = (-10.0, 40.0, 10.0, 60.0)
+
+# side of the map rectangles searched, in degrees
+SEARCH_BOX_SIZE = 0.5
+
+# elements per Element.List call
+LIST_LIMIT = 100
+
+
+class Client:
+    """
+    Calls the RPCs of the mix with random arguments, from one thread.
+    """
+
+    def __init__(self, channel, rng: random.Random, row_counts: dict):
+        """
+        :param channel:
+        :param rng: random numbers of this thread, seeded so that runs are reproducible.
+        :param row_counts: number of rows seeded in each table, to pick IDs from.
+        """
+
+        self.assets = AssetStub(channel)
+        self.elements = ElementStub(channel)
+        self.telecells = TelecellStub(channel)
+        self.rng = rng
+        self.row_counts = row_counts
+        return
+
+    def call(self, rpc: str):
+        """
+        Calls an RPC, and reads all of its reply.
+
+        :param rpc: name of an RPC in DEFAULT_MIX.
+        :return:
+        """
+
+        if rpc == "Asset.Get":
+            self.assets.Get(asset_pb2.Request(id=self.random_id("asset")))
+
+        elif rpc == "Telecell.Get":
+            self.telecells.Get(tc_pb2.Request(id=self.random_id("telecell")))
+
+        elif rpc == "Element.List":
+            for _ in self.elements.List(element_pb2.ListRequest(limit=LIST_LIMIT)):
+                pass
+
+        elif rpc == "Asset.SearchByLocation":
+            left = self.rng.uniform(AREA[0], AREA[2] - SEARCH_BOX_SIZE)
+            bottom = self.rng.uniform(AREA[1], AREA[3] - SEARCH_BOX_SIZE)
+            rectangle = make_rectangle(left, bottom, left + SEARCH_BOX_SIZE, bottom + SEARCH_BOX_SIZE)
+
+            for _ in self.assets.SearchByLocation(location_pb2.FilterByLocationRequest(rectangle=rectangle)):
+                pass
+
+        elif rpc == "Asset.Create":
+            self.assets.Create(asset_pb2.Reply(status=asset_pb2.ActivityStatus.Value("ACTIVE")))
+
+        elif rpc == "Telecell.Update":
+            location = location_pb2.Location(long=self.rng.uniform(AREA[0], AREA[2]),
+                                             lat=self.rng.uniform(AREA[1], AREA[3]))
+            self.telecells.Update(tc_pb2.Reply(id=self.random_id("telecell"), location=location,
+                                               status=self.rng.choice([tc_pb2.ActivityStatus.Value("ACTIVE"),
+                                                                       tc_pb2.ActivityStatus.Value("INACTIVE")])))
+
+        else:
+            raise ValueError("Unknown RPC {}".format(rpc))
+
+        return
+
+    def random_id(self, table: str) -> int:
+        return self.rng.randint(1, max(1, self.row_counts[table]))
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """
+    :param sorted_values:
+    :param fraction: e.g. 0.95.
+    :return: the nearest-rank percentile, or 0 if there are no values.
+    """
+
+    if not sorted_values:
+        return 0.0
+
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+
+def drive(port: int, mix: dict, concurrency: int, duration: float, warmup: float, seed: int, row_counts: dict) -> dict:
+    """
+    Runs the mix from concurrency threads, each calling one RPC after the other.
+
+    :return: latencies in seconds, and number of errors, by RPC - of the calls started after the warm-up.
+    """
+
+    rpcs, weights = list(mix), [mix[rpc] for rpc in mix]
+    latencies, errors = defaultdict(list), defaultdict(int)
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    measure_from, deadline = start + warmup, start + warmup + duration
+
+    def client_thread(index: int):
+        rng = random.Random(seed * 1000 + index)
+
+        with grpc.insecure_channel("localhost:{}".format(port)) as channel:
+            client = Client(channel, rng, row_counts)
+            thread_latencies, thread_errors = defaultdict(list), defaultdict(int)
+
+            while True:
+                rpc = rng.choices(rpcs, weights)[0]
+                call_start = time.perf_counter()
+
+                if call_start >= deadline:
+                    break
+
+                try:
+                    client.call(rpc)
+                    failed = False
+                except grpc.RpcError:
+                    failed = True
+
+                if call_start < measure_from:
+                    continue
+
+                thread_latencies[rpc].append(time.perf_counter() - call_start)
+                thread_errors[rpc] += failed
+
+        with lock:
+            for rpc, values in thread_latencies.items():
+                latencies[rpc].extend(values)
+                errors[rpc] += thread_errors[rpc]
+
+        return
+
+    threads = [threading.Thread(target=client_thread, args=(index,)) for index in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return {rpc: (latencies[rpc], errors[rpc]) for rpc in rpcs}
+
+
+def summarise(results: dict, duration: float) -> dict:
+    """
+    :param results: latencies and number of errors by RPC, from drive.
+    :param duration: seconds measured for.
+    :return: calls, errors, calls per second and latency percentiles (in milliseconds) by RPC, plus a total.
+    """
+
+    summary = {}
+
+    for rpc, (latencies, errors) in sorted(results.items()):
+        latencies = sorted(latencies)
+
+        summary[rpc] = {
+            "calls": len(latencies),
+            "errors": errors,
+            "throughput": len(latencies) / duration,
+            "mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50_ms": 1000 * percentile(latencies, 0.50),
+            "p95_ms": 1000 * percentile(latencies, 0.95),
+            "p99_ms": 1000 * percentile(latencies, 0.99),
+            "max_ms": 1000 * latencies[-1] if latencies else 0.0,
+        }
+
+    calls = sum(rpc_summary["calls"] for rpc_summary in summary.values())
+    summary["total"] = {
+        "calls": calls,
+        "errors": sum(rpc_summary["errors"] for rpc_summary in summary.values()),
+        "throughput": calls / duration,
+    }
+
+    return summary
+
+
+def git_commit() -> str:
+    """
+    :return: the commit checked out, or "" if git can't tell.
+    """
+
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(port: int, elements: int, towns: int, mix: dict, concurrency: int, duration: float, warmup: float, seed: int,
+        output: str):
+    # the server's modules connect to the DB as they are imported, so import them once the env vars are in place
+    from sqlalchemy import func, select
+
+    from dbHandler import Asset, Element, Telecell, engine
+    from dbHandler.base import DB_URL
+    from dbHandler.seeder import regenerate_tables, seed_lighting_components
+    from lighting.server.server import build_server, close_handlers
+
+    logger.info("Seeding {} with {} elements".format(DB_URL, elements))
+    start = time.perf_counter()
+    regenerate_tables()
+    seed_lighting_components(elements, seed, area=AREA, towns=towns)
+
+    with engine.connect() as connection:
+        row_counts = {table: connection.execute(select(func.count()).select_from(model)).scalar()
+                      for table, model in (("asset", Asset), ("element", Element), ("telecell", Telecell))}
+
+    logger.info("Seeded {} in {:.1f}s".format(row_counts, time.perf_counter() - start))
+
+    server, handlers = build_server(port)
+    server.start()
+
+    try:
+        logger.info("Running {} for {}s (after {}s of warm-up) from {} threads"
+                    .format(mix, duration, warmup, concurrency))
+        results = drive(port, mix, concurrency, duration, warmup, seed, row_counts)
+
+    finally:
+        server.stop(grace=None)
+        close_handlers(handlers)
+
+    summary = summarise(results, duration)
+
+    for rpc, rpc_summary in summary.items():
+        logger.info("{}: {}".format(rpc, ", ".join("{} {:.2f}".format(key, value)
+                                                   for key, value in rpc_summary.items())))
+
+    with open(output, "w") as output_file:
+        json.dump({
+            "commit": git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "db_url": DB_URL,
+            "elements": elements,
+            "towns": towns,
+            "rows": row_counts,
+            "mix": mix,
+            "concurrency": concurrency,
+            "duration": duration,
+            "warmup": warmup,
+            "seed": seed,
+            "rpcs": summary,
+        }, output_file, indent=2, sort_keys=True)
+
+    logger.info("Wrote results to {}".format(output))
+    return
+
+
+def parse_mix(weights: list) -> dict:
+    """
+    :param weights: e.g. ["Asset.Get=3", "Telecell.Update=1"].
+    :return: weight by RPC.
+    """
+
+    mix = {}
+
+    for weight in weights:
+        rpc, _, value = weight.partition("=")
+
+        if rpc not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError("Unknown RPC {} - choose from {}".format(rpc, ", ".join(DEFAULT_MIX)))
+
+        mix[rpc] = float(value)
+
+    return mix
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=50151)
+    parser.add_argument("--db", default="sqlite:///benchmark.db", help="DB_URL of the DB to seed, if not set already")
+    parser.add_argument("--elements", type=int, default=10000, help="size of the fleet seeded")
+    parser.add_argument("--towns", type=int, default=20, help="towns the fleet is clustered around; 0 for uniform")
+    parser.add_argument("--mix", nargs="+", metavar="RPC=WEIGHT", default=[],
+                        help="weights of the RPCs to run, instead of {}"
+                        .format(" ".join("{}={}".format(rpc, weight) for rpc, weight in DEFAULT_MIX.items())))
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads, each with its own channel")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to measure for")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds to run before measuring")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args()
+
+    os.environ["DB_URL"] = os.getenv("DB_URL") or args.db
+
+    # keep the status history recorded by the updates out of the one a real server uses
+    os.environ["STATUS_HISTORY_DIR"] = tempfile.mkdtemp(prefix="status-history-")
+
+    run(args.port, args.elements, args.towns, parse_mix(args.mix) if args.mix else DEFAULT_MIX, args.concurrency,
+        args.duration, args.warmup, args.seed, args.output)
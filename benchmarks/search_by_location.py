@@ -0,0 +1,85 @@
+"""
+Compares the per-row SearchByLocation stream with SearchByLocationBatched on a running server.
+
+Run from the project root, with the server up:
+
+    python3 -m benchmarks.search_by_location --service telecell --box -180 -180 180 180
+"""
+import argparse
+import logging
+import os
+import time
+
+import grpc
+
+import lighting.lib.location_pb2 as location_pb2
+import settings as lighting_settings
+from lighting.client.helpers import make_rectangle, search_by_location
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.lib.basestation_pb2_grpc import BasestationStub
+from lighting.lib.element_pb2_grpc import ElementStub
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from log import setup_logger
+
+logger = setup_logger("benchmark", logging.INFO)
+
+STUBS = {
+    "asset": AssetStub,
+    "basestation": BasestationStub,
+    "element": ElementStub,
+    "telecell": TelecellStub,
+}
+
+
+def time_per_row(stub, rectangle) -> tuple:
+    """
+    :return: number of rows received, and seconds taken.
+    """
+
+    start = time.perf_counter()
+    rows = sum(1 for _ in stub.SearchByLocation(location_pb2.FilterByLocationRequest(rectangle=rectangle)))
+    return rows, time.perf_counter() - start
+
+
+def time_batched(stub, rectangle) -> tuple:
+    """
+    :return: number of rows received, and seconds taken.
+    """
+
+    start = time.perf_counter()
+    rows = sum(1 for _ in search_by_location(stub, rectangle))
+    return rows, time.perf_counter() - start
+
+
+def run(port: int, service: str, box: list, repeat: int):
+    channel = grpc.insecure_channel("localhost:{}".format(port))
+    stub = STUBS[service](channel)
+    rectangle = make_rectangle(*box)
+
+    for name, timer in (("per-row", time_per_row), ("batched", time_batched)):
+        # warm up the server and the channel before measuring
+        timer(stub, rectangle)
+
+        timings = [timer(stub, rectangle) for _ in range(repeat)]
+        rows = timings[0][0]
+        best = min(seconds for _, seconds in timings)
+
+        logger.info("{} {}: {} rows, best of {}: {:.3f}s ({:.0f} rows/s)"
+                    .format(service, name, rows, repeat, best, rows / best if best else float("inf")))
+
+    channel.close()
+    return
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=os.getenv("LIGHTING_COMPONENTS_PORT"))
+    parser.add_argument("--service", choices=sorted(STUBS), default="asset")
+    parser.add_argument("--box", type=float, nargs=4, metavar=("LEFT", "BOTTOM", "RIGHT", "TOP"),
+                        default=[-180, -180, 180, 180])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.port, args.service, args.box, args.repeat)
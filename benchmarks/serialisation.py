@@ -0,0 +1,91 @@
+"""
+Measures the CPU cost of building and serialising telecell replies, with and without memoised basestation messages.
+
+No server or DB is involved: replies are built by TelecellHandler.prepare_telecell_message from made-up rows, in the
+shape of a city - a few hundred basestations, each with many telecells, each with a couple of elements on an asset.
+
+Run from the project root:
+
+    python3 -m benchmarks.serialisation --telecells 100000 --basestations 300
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import settings as lighting_settings
+from lighting.server.handler.cache import basestation_messages
+from lighting.server.handler.telecell import TelecellHandler
+from log import setup_logger
+
+logger = setup_logger("benchmark", logging.INFO)
+
+
+def make_rows(telecells: int, basestations: int, elements_per_telecell: int) -> list:
+    """
+    :return: objects with the attributes of Telecell rows, and of the rows they are related to.
+    """
+
+    bs_rows = [SimpleNamespace(id=i, uuid=100000 + i, version=3, status=1, latitude=random.uniform(40, 60),
+                               longitude=random.uniform(-10, 10), changed_at=datetime.utcnow())
+               for i in range(1, basestations + 1)]
+
+    tc_rows = []
+    element_id = 0
+
+    for i in range(1, telecells + 1):
+        asset = SimpleNamespace(id=i, status=1, latitude=random.uniform(40, 60), longitude=random.uniform(-10, 10),
+                                elements=[])
+
+        for _ in range(elements_per_telecell):
+            element_id += 1
+            asset.elements.append(SimpleNamespace(id=element_id, status=1, description="lamp", asset=asset))
+
+        tc_rows.append(SimpleNamespace(id=i, uuid=200000 + i, relay=False, status=1, updated_at=datetime.utcnow(),
+                                       latitude=asset.latitude, longitude=asset.longitude,
+                                       basestation=random.choice(bs_rows), elements=list(asset.elements)))
+
+    return tc_rows
+
+
+def time_replies(rows: list) -> tuple:
+    """
+    :return: seconds taken to build and serialise a reply for every row, and the total size of the replies.
+    """
+
+    start = time.perf_counter()
+    size = sum(len(TelecellHandler.prepare_telecell_message(row).SerializeToString()) for row in rows)
+    return time.perf_counter() - start, size
+
+
+def run(telecells: int, basestations: int, elements_per_telecell: int, repeat: int):
+    rows = make_rows(telecells, basestations, elements_per_telecell)
+    memo_size = basestation_messages.max_size
+
+    for name, max_size in (("plain", 0), ("memoised", memo_size)):
+        basestation_messages.max_size = max_size
+        basestation_messages.clear()
+
+        # the first pass fills the memo, as the first List after startup would
+        time_replies(rows)
+        elapsed, size = min(time_replies(rows) for _ in range(repeat))
+
+        logger.info("{}: {:.2f} us per telecell ({} bytes in all)".format(name, elapsed / len(rows) * 1e6, size))
+
+    logger.info("Basestation memo: {}".format(basestation_messages.stats()))
+    return
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--telecells", type=int, default=100000)
+    parser.add_argument("--basestations", type=int, default=300)
+    parser.add_argument("--elements-per-telecell", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3, help="passes to time; the fastest is reported")
+    args = parser.parse_args()
+
+    run(args.telecells, args.basestations, args.elements_per_telecell, args.repeat)
@@ -1,10 +1,16 @@
+from sqlalchemy.orm import configure_mappers
+
 # base MUST be imported first
-from .base import Base, engine
+from .base import Base, engine, Session, pool_metrics
 
 from .asset import Asset
 from .basestation import Basestation
 from .element import Element
 from .telecell import Telecell
+from .tombstone import Tombstone
 from .user import User
 
+# resolve relationships and backrefs (e.g. Asset.elements) up front so that handlers can build loader options
+configure_mappers()
+
 from .seeder import seed_lighting_components
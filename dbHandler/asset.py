@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float
+from sqlalchemy import Column, Integer, Float, DateTime, func
 
 from dbHandler import Base
 from lighting.lib import asset_pb2
@@ -12,6 +12,10 @@ class Asset(Base):
     latitude = Column("latitude", Float, default=None)
     longitude = Column("longitude", Float, default=None)
 
+    # when the row (or the IDs of the rows it lists) last changed, for List requests with updated_since
+    changed_at = Column(DateTime, nullable=False, default=func.utc_timestamp(), onupdate=func.utc_timestamp(),
+                        index=True)
+
     def __init__(self, status: int = None, latitude: float = None, longitude: float = None):
 
         if status:
@@ -1,8 +1,15 @@
 import logging
+import math
 import os
+import threading
+import time
+from datetime import datetime
+from multiprocessing import cpu_count
 
 import sqlalchemy as db
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 import settings
 
@@ -11,14 +18,179 @@ settings.load_env_vars()
 logger = logging.getLogger("server")
 logger.debug("Creating DB Engine, DB Session and Base class.")
 
-engine = db.create_engine("{db_conn}://{user}:{password}@{host}/{db_name}"
-                          .format(db_conn=os.getenv("DB_CONN"),
-                                  user=os.getenv("DB_USER"),
-                                  password=os.getenv("DB_PASS"),
-                                  host=os.getenv("DB_HOST"),
-                                  db_name=os.getenv("DB_NAME")),
-                          pool_recycle=3600)
+
+class PoolMetrics:
+    """
+    Counters of how long RPCs wait to check a connection out of the DB connection pool.
+
+    If waits keep going up, the pool is too small for the number of RPCs being served at once.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+        return
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+        return
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        return
+
+    def snapshot(self) -> dict:
+        """
+        :return: the counters, plus the current state of the engine's pool.
+        """
+
+        with self._lock:
+            checkouts, timeouts, total_wait, max_wait = self.checkouts, self.timeouts, self.total_wait, self.max_wait
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "total_wait_seconds": total_wait,
+            "mean_wait_seconds": total_wait / checkouts if checkouts else 0.0,
+            "max_wait_seconds": max_wait,
+            "pool_size": engine.pool.size(),
+            "checked_out": engine.pool.checkedout(),
+            "overflow": engine.pool.overflow(),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records in pool_metrics how long every checkout had to wait for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+
+        except db.exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - start)
+
+
+# by default, one connection for every worker thread of the server - see lighting/server/server.py
+SERVER_MAX_WORKERS = int(os.getenv("SERVER_MAX_WORKERS") or cpu_count())
+
+# threads besides the server's workers that check connections out of the pool: the status writer's flushes, the fleet
+# counters' reconciler, and the index refresh of a --workers worker
+BACKGROUND_CONNECTIONS = 3
+
+
+def db_url(db_conn: str) -> str:
+    """
+    :param db_conn: dialect and driver, e.g. "mysql+pymysql".
+    :return: URL of the DB described by the env vars.
+    """
+
+    return "{db_conn}://{user}:{password}@{host}/{db_name}" \
+        .format(db_conn=db_conn,
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASS"),
+                host=os.getenv("DB_HOST"),
+                db_name=os.getenv("DB_NAME"))
+
+
+def add_sqlite_functions(dbapi_connection, connection_record):
+    """
+    Defines the MySQL functions the models and handlers use on a new SQLite connection, so that a local SQLite file can
+    stand in for MySQL, e.g. in benchmarks/rpc_mix.py.
+
+    :param dbapi_connection:
+    :param connection_record:
+    :return:
+    """
+
+    # in the format SQLAlchemy stores DateTime columns in on SQLite, so that they compare with each other
+    dbapi_connection.create_function("utc_timestamp", 0,
+                                     lambda: datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f"))
+    dbapi_connection.create_function("floor", 1, lambda value: None if value is None else math.floor(value))
+    return
+
+
+# a full URL in DB_URL (e.g. "sqlite:///benchmark.db") overrides the one described by the other env vars
+DB_URL = os.getenv("DB_URL") or db_url(os.getenv("DB_CONN"))
+SQLITE = DB_URL.startswith("sqlite")
+
+engine = db.create_engine(DB_URL,
+                          poolclass=InstrumentedQueuePool,
+                          pool_size=int(os.getenv("DB_POOL_SIZE") or SERVER_MAX_WORKERS + BACKGROUND_CONNECTIONS),
+                          max_overflow=int(os.getenv("DB_MAX_OVERFLOW") or 0),
+                          pool_timeout=float(os.getenv("DB_POOL_TIMEOUT") or 30),
+                          pool_recycle=3600,
+                          # pooled connections are handed from thread to thread
+                          connect_args={"check_same_thread": False} if SQLITE else {})
+
+if SQLITE:
+    db.event.listen(engine, "connect", add_sqlite_functions)
 
 logger.debug("Connected to {}".format(engine))
 
+# thread-local sessions. Every RPC gets a fresh one, which is removed once the RPC finishes - see
+# lighting/server/interceptors.py
+Session = scoped_session(sessionmaker(bind=engine))
+
 Base = declarative_base()
+
+
+def create_async_session_factory():
+    """
+    Creates the engine and session factory used by the asyncio server (lighting/server/server.py::serve_async).
+
+    Needs an asyncio DB driver, set in the DB_ASYNC_CONN env var (e.g. "mysql+aiomysql"). It is only imported here, so
+    the threaded server works without one. When DB_URL is set, the same DB is used, through DB_ASYNC_CONN - or
+    aiosqlite for a SQLite DB_URL.
+
+    :return: factory of AsyncSessions.
+    """
+
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async_engine = create_async_engine(async_db_url(),
+                                       pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE") or 100),
+                                       max_overflow=int(os.getenv("DB_MAX_OVERFLOW") or 0),
+                                       pool_timeout=float(os.getenv("DB_POOL_TIMEOUT") or 30),
+                                       pool_recycle=3600)
+
+    if SQLITE:
+        db.event.listen(async_engine.sync_engine, "connect", add_sqlite_functions)
+
+    logger.debug("Connected to {}".format(async_engine))
+
+    # objects outlive the session when replies are built after it closes, so don't expire them on commit
+    return sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def async_db_url():
+    """
+    :return: URL of the DB the asyncio server uses - the same one as the threaded server, with an asyncio driver.
+    """
+
+    if not os.getenv("DB_URL"):
+        return db_url(os.getenv("DB_ASYNC_CONN"))
+
+    url = db.engine.make_url(DB_URL)
+
+    if SQLITE:
+        return url.set(drivername="sqlite+aiosqlite")
+
+    return url.set(drivername=os.getenv("DB_ASYNC_CONN") or url.drivername)
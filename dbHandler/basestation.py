@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float
+from sqlalchemy import Column, Integer, Float, DateTime, func
 
 from dbHandler import Base
 from lighting.lib import basestation_pb2
@@ -14,6 +14,10 @@ class Basestation(Base):
     longitude = Column(Float)
     status = Column(Integer, default=basestation_pb2.ActivityStatus.Value("INACTIVE"))
 
+    # when the row (or the IDs of the rows it lists) last changed, for List requests with updated_since
+    changed_at = Column(DateTime, nullable=False, default=func.utc_timestamp(), onupdate=func.utc_timestamp(),
+                        index=True)
+
     def __init__(self, uuid: int, version: int = None, latitude: float = None, longitude: float = None,
                  status: int = None):
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship, backref
 
 from dbHandler import Base
@@ -13,6 +13,10 @@ class Element(Base):
     description = Column("description", String(100), default="")
     status = Column("status", Integer, default=element_pb2.ActivityStatus.Value("INACTIVE"), nullable=False)
 
+    # when the row (or the IDs of the rows it lists) last changed, for List requests with updated_since
+    changed_at = Column(DateTime, nullable=False, default=func.utc_timestamp(), onupdate=func.utc_timestamp(),
+                        index=True)
+
     # each element can have a maximum one 1 telecell
     telecell_id = Column(Integer, ForeignKey("telecell.id"), nullable=True)
     telecell = relationship(Telecell,
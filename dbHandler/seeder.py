@@ -1,8 +1,17 @@
+import argparse
+import json
+import logging
+import time
 from hashlib import sha224
+from random import Random
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import sessionmaker
 
 from dbHandler import Base, engine
+from log import setup_logger
+
+logger = setup_logger("seeder", logging.INFO)
 
 
 def regenerate_tables():
@@ -17,92 +26,184 @@ def regenerate_tables():
     return
 
 
-def seed_lighting_components():
+# where the fleet is spread, as (left, bottom, right, top) in degrees
+DEFAULT_AREA = (-10.0, 40.0, 10.0, 60.0)
+
+# how many elements an asset carries, and a telecell drives, as {number: weight}
+DEFAULT_ELEMENTS_PER_ASSET = {1: 85, 2: 15}
+DEFAULT_ELEMENTS_PER_TELECELL = {1: 85, 2: 15}
+
+# weights of the element statuses: UNAVAILABLE, ACTIVE, INACTIVE, DELETED
+ELEMENT_STATUS_WEIGHTS = {0: 5, 1: 80, 2: 10, 15: 5}
+
+
+class Fleet:
     """
-    A very ugly seeder that allows for no customizability.... Yet....
+    Generates the rows of a fleet, in the order they can be inserted in, a chunk at a time.
 
-    TODO #7: Make function more flexible. Low priority.
+    Basestations are placed over the area - uniformly, or around a number of towns - and the assets they serve around
+    them, so telecells are connected to a basestation near them. Only the basestation and telecell being filled are
+    kept between chunks, so memory doesn't grow with the fleet.
+    """
 
-    :return:
+    def __init__(self, rng: Random, first_ids: dict, area: tuple = DEFAULT_AREA, towns: int = 0,
+                 spread: float = 0.02, elements_per_asset: dict = None, elements_per_telecell: dict = None,
+                 telecells_per_basestation: int = 400, unconnected: float = 0.1):
+        """
+        :param rng: the random numbers everything is drawn from.
+        :param first_ids: ID to start counting from, by table - UUIDs follow the IDs.
+        :param area: (left, bottom, right, top) in degrees.
+        :param towns: number of towns basestations are clustered around (within a tenth of the area), or 0 to spread
+        them uniformly.
+        :param spread: standard deviation, in degrees, of the distance of assets from their basestation.
+        :param elements_per_asset: weight of each number of elements on an asset.
+        :param elements_per_telecell: weight of each number of elements driven by a telecell.
+        :param telecells_per_basestation:
+        :param unconnected: fraction of elements without a telecell.
+        """
+
+        self.rng = rng
+        self.ids = dict(first_ids)
+        self.area = area
+        self.spread = spread
+        self.elements_per_asset = elements_per_asset or DEFAULT_ELEMENTS_PER_ASSET
+        self.elements_per_telecell = elements_per_telecell or DEFAULT_ELEMENTS_PER_TELECELL
+        self.telecells_per_basestation = telecells_per_basestation
+        self.unconnected = unconnected
+
+        left, bottom, right, top = area
+        self.towns = [(rng.uniform(left, right), rng.uniform(bottom, top)) for _ in range(towns)]
+
+        # the basestation being connected to, and the telecell being filled: (row, places left)
+        self.basestation, self.telecell = (None, 0), (None, 0)
+        return
+
+    def chunk(self, elements: int) -> dict:
+        """
+        :param elements: number of elements to generate - a few more when the last asset carries more than one.
+        :return: rows of each table, with the rows they reference either in earlier chunks or this one.
+        """
+
+        rows = {"basestation": [], "telecell": [], "asset": [], "element": []}
+
+        while len(rows["element"]) < elements:
+            basestation = self.next_basestation(rows)
+            longitude, latitude = self.clamp(self.rng.gauss(basestation["longitude"], self.spread),
+                                             self.rng.gauss(basestation["latitude"], self.spread))
+            asset = {"id": self.next_id("asset"), "status": 1, "latitude": latitude, "longitude": longitude}
+            rows["asset"].append(asset)
+
+            for _ in range(self.weighted(self.elements_per_asset)):
+                telecell = None if self.rng.random() < self.unconnected else self.next_telecell(rows, asset)
+
+                rows["element"].append({"id": self.next_id("element"), "asset_id": asset["id"],
+                                        "telecell_id": telecell and telecell["id"],
+                                        "status": self.weighted(ELEMENT_STATUS_WEIGHTS),
+                                        "description": "element {}".format(self.ids["element"])})
+
+        return rows
+
+    def next_basestation(self, rows: dict) -> dict:
+        """
+        :return: the basestation assets are placed around - a new one once it has all its telecells.
+        """
+
+        basestation, places = self.basestation
+
+        if basestation is None or places <= 0:
+            if self.towns:
+                town_longitude, town_latitude = self.rng.choice(self.towns)
+                longitude, latitude = self.clamp(
+                    self.rng.gauss(town_longitude, (self.area[2] - self.area[0]) / 10),
+                    self.rng.gauss(town_latitude, (self.area[3] - self.area[1]) / 10))
+            else:
+                longitude = self.rng.uniform(self.area[0], self.area[2])
+                latitude = self.rng.uniform(self.area[1], self.area[3])
+
+            row_id = self.next_id("basestation")
+            basestation = {"id": row_id, "uuid": row_id, "version": self.rng.choice([3, 4]), "status": 1,
+                           "latitude": latitude, "longitude": longitude}
+            rows["basestation"].append(basestation)
+            self.basestation = basestation, self.telecells_per_basestation
+
+            # the telecell being filled stays with the last basestation
+            self.telecell = None, 0
+
+        return basestation
+
+    def next_telecell(self, rows: dict, asset: dict) -> dict:
+        """
+        :param asset: the asset of the element to connect - a new telecell is placed there.
+        :return: the telecell to connect an element to - a new one once it drives all its elements.
+        """
+
+        telecell, places = self.telecell
+
+        if telecell is None or not places:
+            basestation, telecells_left = self.basestation
+            self.basestation = basestation, telecells_left - 1
+
+            row_id = self.next_id("telecell")
+            telecell = {"id": row_id, "uuid": row_id, "relay": False, "bs_id": basestation["id"],
+                        "status": self.rng.choice([1, 2]), "latitude": asset["latitude"],
+                        "longitude": asset["longitude"]}
+            rows["telecell"].append(telecell)
+            places = self.weighted(self.elements_per_telecell)
+
+        self.telecell = telecell, places - 1
+        return telecell
+
+    def next_id(self, table: str) -> int:
+        self.ids[table] += 1
+        return self.ids[table]
+
+    def weighted(self, weights: dict):
+        return self.rng.choices(list(weights), list(weights.values()))[0]
+
+    def clamp(self, longitude: float, latitude: float) -> tuple:
+        left, bottom, right, top = self.area
+        return min(max(longitude, left), right), min(max(latitude, bottom), top)
+
+
+def seed_lighting_components(elements: int = 1000, seed: int = 0, chunk_size: int = 10000, **fleet):
+    """
+    Seeds a fleet of the given size, inserting rows a chunk at a time with multi-row INSERTs. The same seed, on an
+    empty DB, always gives the same rows.
+
+    :param elements: number of elements to seed - the assets, telecells and basestations follow from the topology.
+    :param seed:
+    :param chunk_size: elements inserted (and committed) together, with their assets, telecells and basestations.
+    :param fleet: area, towns, spread and topology - see Fleet.
+    :return: number of rows seeded, by table.
     """
 
     from dbHandler import Element, Telecell, Asset, Basestation
-    from random import uniform, choice
 
-    session = sessionmaker(bind=engine)()
+    tables = {"basestation": Basestation, "telecell": Telecell, "asset": Asset, "element": Element}
 
-    status_choices = [0, 1, 2, 15]
-    bs_version_choices = [3, 4]
-    basestations = []
-    telecell_uuid = 1
-
-    # create 5 Basestations
-    for i in range(5):
-        lat, long = uniform(-180, 180), uniform(-180, 180)
-        bs = Basestation(i + 1, choice(bs_version_choices), lat, long)
-        basestations.append(bs)
-        session.add(bs)
-
-    # 1 element unassociated to a telecell, and 1 asset associated to 1 element.
-    description = "1 element unassociated to a telecell, and 1 asset associated to 1 element"
-    for i in range(99):
-        lat, long = uniform(-180, 180), uniform(-180, 180)
-        asset = Asset(latitude=lat, longitude=long)
-        element = Element(asset=asset, description="{} {}".format(description, i), status=choice(status_choices))
-        session.add(asset)
-        session.add(element)
-
-    # 1 element associated to 1 telecell, and 1 asset associated to 1 element.
-    description = "1 element associated to 1 telecell, and 1 asset associated to 1 element"
-    for i in range(209):
-        lat, long = uniform(-180, 180), uniform(-180, 180)
-        asset = Asset(latitude=lat, longitude=long)
-        telecell = Telecell(telecell_uuid, False, lat, long, choice(basestations))
-        telecell_uuid += 1
-        element = Element(asset=asset, description="{} {}".format(description, i),
-                          status=choice(status_choices), telecell=telecell)
-        session.add(asset)
-        session.add(element)
-
-    # 1 element associated to 1 telecell, and 1 asset associated to 2 elements.
-    description = "1 element associated to 1 telecell, and 1 asset associated to 2 elements"
-    for i in range(119):
-        lat, long = uniform(-180, 180), uniform(-180, 180)
-        asset = Asset(latitude=lat, longitude=long)
-        telecell_1 = Telecell(telecell_uuid, False, lat, long, choice(basestations))
-        telecell_uuid += 1
-        telecell_2 = Telecell(telecell_uuid, False, lat, long, choice(basestations))
-        telecell_uuid += 1
-        element_1 = Element(asset=asset, description="{} {}".format(description, i),
-                            status=choice(status_choices), telecell=telecell_1)
-        element_2 = Element(asset=asset, description="{} {}".format(description, i),
-                            status=choice(status_choices), telecell=telecell_2)
-        session.add(asset)
-        session.add(telecell_1)
-        session.add(element_1)
-        session.add(telecell_2)
-        session.add(element_2)
-
-    # 2 elements associated to 1 telecell, and 1 asset associated to 1 element.
-    description = "2 elements associated to 1 telecell, and 1 asset associated to 1 element."
-    for i in range(129):
-        lat, long = uniform(-180, 180), uniform(-180, 180)
-        asset = Asset(latitude=lat, longitude=long)
-        telecell = Telecell(telecell_uuid, False, lat, long, choice(basestations))
-        telecell_uuid += 1
-        element_1 = Element(asset=asset, description="{} {}".format(description, i),
-                            status=choice(status_choices), telecell=telecell)
-        element_2 = Element(asset=asset, description="{} {}".format(description, i),
-                            status=choice(status_choices), telecell=telecell)
-        session.add(asset)
-        session.add(telecell)
-        session.add(element_2)
-        session.add(element_1)
+    # carry on after the rows already there, for IDs and UUIDs alike
+    with engine.connect() as connection:
+        first_ids = {name: max([connection.execute(select(func.max(column))).scalar() or 0
+                                for column in ([model.id, model.uuid] if hasattr(model, "uuid") else [model.id])])
+                     for name, model in tables.items()}
 
-    session.commit()
-    session.close()
+    generator = Fleet(Random(seed), first_ids, **fleet)
+    seeded = {name: 0 for name in tables}
+    start = time.perf_counter()
 
-    return
+    while seeded["element"] < elements:
+        rows = generator.chunk(min(chunk_size, elements - seeded["element"]))
+
+        # referenced rows first
+        with engine.begin() as connection:
+            for name, model in tables.items():
+                if rows[name]:
+                    connection.execute(model.__table__.insert(), rows[name])
+                    seeded[name] += len(rows[name])
+
+        logger.info("Seeded {} in {:.1f}s".format(seeded, time.perf_counter() - start))
+
+    return seeded
 
 
 def seed_users(n):
@@ -122,6 +223,24 @@ def seed_users(n):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recreates the tables, and seeds users and a fleet.")
+    parser.add_argument("--elements", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--area", type=float, nargs=4, default=DEFAULT_AREA, metavar=("LEFT", "BOTTOM", "RIGHT", "TOP"))
+    parser.add_argument("--towns", type=int, default=0, help="towns to cluster basestations around; 0 for uniform")
+    parser.add_argument("--spread", type=float, default=0.02, help="degrees assets are spread around a basestation")
+    parser.add_argument("--elements-per-asset", type=json.loads, default=DEFAULT_ELEMENTS_PER_ASSET,
+                        help="JSON weights of each number of elements, e.g. '{\"1\": 85, \"2\": 15}'")
+    parser.add_argument("--elements-per-telecell", type=json.loads, default=DEFAULT_ELEMENTS_PER_TELECELL)
+    parser.add_argument("--telecells-per-basestation", type=int, default=400)
+    parser.add_argument("--unconnected", type=float, default=0.1, help="fraction of elements without a telecell")
+    args = parser.parse_args()
+
     regenerate_tables()
     seed_users(10)
-    seed_lighting_components()
+    seed_lighting_components(args.elements, args.seed, args.chunk_size, area=tuple(args.area), towns=args.towns,
+                             spread=args.spread,
+                             elements_per_asset={int(k): v for k, v in args.elements_per_asset.items()},
+                             elements_per_telecell={int(k): v for k, v in args.elements_per_telecell.items()},
+                             telecells_per_basestation=args.telecells_per_basestation, unconnected=args.unconnected)
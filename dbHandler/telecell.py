@@ -19,6 +19,11 @@ class Telecell(Base):
     status = Column(Integer, default=telecell_pb2.ActivityStatus.Value("INACTIVE"))
     updated_at = Column(DateTime, nullable=False, default=func.utc_timestamp())
 
+    # when the row (or the IDs of the rows it lists) last changed, for List requests with updated_since. Unlike
+    # updated_at, which is when the reported status was measured, it is always set by the DB, so it never goes back.
+    changed_at = Column(DateTime, nullable=False, default=func.utc_timestamp(), onupdate=func.utc_timestamp(),
+                        index=True)
+
     # a telecell has 1 basestation at a time, but each basestation is connected to multiple telecells
     bs_id = Column(Integer, ForeignKey("basestation.id"), nullable=True)
     basestation = relationship(Basestation, backref=backref("telecells", uselist=True))
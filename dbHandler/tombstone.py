@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
+
+from dbHandler import Base
+
+
+class Tombstone(Base):
+    """
+    Record of a row that was pruned (permanently deleted), so that List requests with updated_since can tell clients to
+    drop it too.
+    """
+
+    __tablename__ = "tombstone"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # table the row was in, e.g. "telecell"
+    entity = Column(String(20), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    pruned_at = Column(DateTime, nullable=False, default=func.utc_timestamp())
+
+    __table_args__ = (Index("ix_tombstone_entity_pruned_at", "entity", "pruned_at"),)
+
+    def __init__(self, entity: str, row_id: int):
+        self.entity = entity
+        self.row_id = row_id
+        return
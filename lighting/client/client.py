@@ -54,6 +54,7 @@ def run(port: int):
 
     # search list
     response_all = stub.List(element_pb2.ListRequest(limit=100, offset=10))
+    next_page_token = ""
     for i, resp_list in enumerate(response_all):
         for resp in resp_list.elements:
             logger.info("Stream {} | Element {} ({}, {}) connected to Asset {}, status: {} \n{}"
@@ -61,6 +62,16 @@ def run(port: int):
                                 element_pb2.ActivityStatus.Name(resp.status),
                                 resp.description))
 
+        # remember where we got to - the next page carries on straight after this message
+        next_page_token = resp_list.next_page_token
+
+    # get the next page of the list
+    if next_page_token:
+        response_all = stub.List(element_pb2.ListRequest(limit=100, page_token=next_page_token))
+        for i, resp_list in enumerate(response_all):
+            logger.info("Stream {} | Next page: Elements {}"
+                        .format(i + 1, ", ".join(str(resp.id) for resp in resp_list.elements)))
+
     # Create Elements
     message = element_pb2.CreateRequest()
     elements = []
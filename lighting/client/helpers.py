@@ -0,0 +1,55 @@
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.field_mask_pb2 import FieldMask
+
+import lighting.lib.location_pb2 as location_pb2
+
+
+def make_rectangle(left: float, bottom: float, right: float, top: float) -> location_pb2.MapRect:
+    """
+    Builds the map rectangle for a FilterByLocationRequest.
+
+    :param left: smallest longitude.
+    :param bottom: smallest latitude.
+    :param right: largest longitude.
+    :param top: largest latitude.
+    :return:
+    """
+
+    return location_pb2.MapRect(lo=location_pb2.Location(long=left, lat=bottom),
+                                hi=location_pb2.Location(long=right, lat=top))
+
+
+def unpack_list_reply(reply_list):
+    """
+    Gets the items out of any of the ListReply messages (assets, basestations, elements or telecells).
+
+    :param reply_list:
+    :return: the repeated field holding the items.
+    """
+
+    for field in reply_list.DESCRIPTOR.fields:
+        if field.label == FieldDescriptor.LABEL_REPEATED and field.type == FieldDescriptor.TYPE_MESSAGE:
+            return getattr(reply_list, field.name)
+
+    return []
+
+
+def search_by_location(stub, rectangle: location_pb2.MapRect, timeout: float = None, fields: list = None):
+    """
+    Searches by location with the batched SearchByLocation RPC, and hands back the matches one at a time.
+
+    Works with any stub that has the SearchByLocationBatched RPC (AssetStub, BasestationStub, ElementStub and
+    TelecellStub). The results must be consumed before the stub's channel is closed.
+
+    :param stub:
+    :param rectangle: map area to search, e.g. from make_rectangle.
+    :param timeout: optional deadline of the whole call, in seconds.
+    :param fields: optional read mask paths, e.g. ["id", "status", "location"] for a map view. All fields if not set.
+    :return: generator of Reply messages of the stub's service.
+    """
+
+    request = location_pb2.FilterByLocationRequest(rectangle=rectangle, read_mask=FieldMask(paths=fields or []))
+
+    for reply_list in stub.SearchByLocationBatched(request, timeout=timeout):
+        for reply in unpack_list_reply(reply_list):
+            yield reply
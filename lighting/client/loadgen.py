@@ -0,0 +1,578 @@
+"""
+Load generator: runs a weighted mix of RPCs against a server, and reports latency distributions and error rates.
+
+By default requests are sent open-loop: at --qps a second, on a schedule fixed up front, whether or not earlier ones
+have been answered. Latency is measured from when each request was due, not from when it was sent, so a server that
+stalls is charged for the requests that queued up behind the stall (no coordinated omission). With --concurrency
+instead, a fixed number of callers each send their next request once the last has been answered - the latencies are
+then those of the requests that managed to get sent.
+
+Calls are spread over a pool of --channels channels. Per RPC, the summary has the calls made, errors by status code,
+and latency percentiles; --hgrm-dir also writes a percentile distribution per RPC in HdrHistogram's .hgrm format, and
+--output everything as JSON.
+
+Run from the project root, with the server up, e.g.:
+
+    python3 -m lighting.client.loadgen --qps 500 --duration 60 --mix Element.Get=5 Asset.SearchByLocation=1
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+import grpc
+
+import lighting.lib.asset_pb2 as asset_pb2
+import lighting.lib.basestation_pb2 as bs_pb2
+import lighting.lib.element_pb2 as element_pb2
+import lighting.lib.location_pb2 as location_pb2
+import lighting.lib.telecell_pb2 as tc_pb2
+import settings as lighting_settings
+from lighting.client.helpers import make_rectangle
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.lib.basestation_pb2_grpc import BasestationStub
+from lighting.lib.element_pb2_grpc import ElementStub
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from log import setup_logger
+
+logger = setup_logger("loadgen", logging.INFO)
+
+STUBS = {"asset": AssetStub, "basestation": BasestationStub, "element": ElementStub, "telecell": TelecellStub}
+PROTOS = {"asset": asset_pb2, "basestation": bs_pb2, "element": element_pb2, "telecell": tc_pb2}
+
+DEFAULT_MIX = {
+    "Element.Get": 30,
+    "Telecell.Get": 20,
+    "Element.List": 5,
+    "Asset.SearchByLocation": 20,
+    "Telecell.SearchNearest": 10,
+    "Telecell.Update": 10,
+    "Asset.Create": 5,
+}
+
+
+class Histogram:
+    """
+    Counts of values in buckets of a fixed relative width, like HdrHistogram: values up to 2 * 10 ** digits are counted
+    exactly, and larger ones to within 1 part in 10 ** digits - so the memory used doesn't depend on how many values,
+    or how large, are recorded.
+    """
+
+    def __init__(self, digits: int = 3):
+        """
+        :param digits: significant decimal digits kept of each value.
+        """
+
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** digits))
+        self.half_count = 1 << (self.sub_bucket_bits - 1)
+        self.counts = Counter()
+        self.total = 0
+        self.sum = 0
+        self.sum_of_squares = 0
+        self.max = 0
+        self.lock = threading.Lock()
+        return
+
+    def record(self, value: int):
+        """
+        :param value: a non-negative integer, e.g. microseconds.
+        :return:
+        """
+
+        magnitude = max(0, value.bit_length() - self.sub_bucket_bits)
+        index = magnitude * self.half_count + (value >> magnitude)
+
+        with self.lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum += value
+            self.sum_of_squares += value * value
+            self.max = max(self.max, value)
+
+        return
+
+    def merge(self, other: "Histogram"):
+        with self.lock:
+            self.counts.update(other.counts)
+            self.total += other.total
+            self.sum += other.sum
+            self.sum_of_squares += other.sum_of_squares
+            self.max = max(self.max, other.max)
+
+        return
+
+    def highest_equivalent(self, index: int) -> int:
+        """
+        :return: the largest value counted in the bucket at this index.
+        """
+
+        magnitude = max(0, index // self.half_count - 1)
+        return ((index - magnitude * self.half_count + 1) << magnitude) - 1
+
+    def value_at(self, percentile: float) -> int:
+        """
+        :param percentile: e.g. 99.9.
+        :return: the largest value of the bucket holding that percentile - at most the largest value recorded.
+        """
+
+        if not self.total:
+            return 0
+
+        rank, seen = max(1, math.ceil(percentile / 100 * self.total)), 0
+
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+
+            if seen >= rank:
+                return min(self.highest_equivalent(index), self.max)
+
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def stddev(self) -> float:
+        return math.sqrt(max(0.0, self.sum_of_squares / self.total - self.mean() ** 2)) if self.total else 0.0
+
+    def percentile_distribution(self, ticks_per_half_distance: int = 5) -> list:
+        """
+        :return: (value, percentile, count up to it) at HdrHistogram's reporting percentiles - ticks_per_half_distance
+        of them between 0 and 50%, as many again between 50 and 75%, and so on to 100%.
+        """
+
+        if not self.total:
+            return []
+
+        distribution, cumulative, indices = [], 0, sorted(self.counts)
+        position, halves = 0, 0
+
+        while True:
+            low = 100 * (1 - 0.5 ** halves)
+
+            for tick in range(ticks_per_half_distance):
+                percentile = low + tick * 100 * 0.5 ** (halves + 1) / ticks_per_half_distance
+                rank = max(1, math.ceil(percentile / 100 * self.total))
+
+                while cumulative < rank:
+                    cumulative += self.counts[indices[position]]
+                    position += 1
+
+                distribution.append((min(self.highest_equivalent(indices[position - 1]), self.max), percentile / 100,
+                                     cumulative))
+
+            # stop once the ticks are finer than one value
+            if cumulative >= self.total or 0.5 ** (halves + 1) * self.total < 1:
+                break
+
+            halves += 1
+
+        distribution.append((self.max, 1.0, self.total))
+        return distribution
+
+    def write_hgrm(self, path: str, unit_ratio: float = 1000.0):
+        """
+        Writes the percentile distribution as HdrHistogram's outputPercentileDistribution does, for its plotters.
+
+        :param path:
+        :param unit_ratio: what values are divided by when written, e.g. 1000 for microseconds to milliseconds.
+        :return:
+        """
+
+        with open(path, "w") as hgrm:
+            hgrm.write("{:>12} {:>14} {:>10} {:>14}\n\n"
+                       .format("Value", "Percentile", "TotalCount", "1/(1-Percentile)"))
+
+            for value, percentile, cumulative in self.percentile_distribution():
+                if percentile < 1:
+                    hgrm.write("{:12.3f} {:2.12f} {:10d} {:14.2f}\n"
+                               .format(value / unit_ratio, percentile, cumulative, 1 / (1 - percentile)))
+                else:
+                    hgrm.write("{:12.3f} {:2.12f} {:10d}\n".format(value / unit_ratio, percentile, cumulative))
+
+            hgrm.write("#[Mean    = {:12.3f}, StdDeviation   = {:12.3f}]\n"
+                       .format(self.mean() / unit_ratio, self.stddev() / unit_ratio))
+            hgrm.write("#[Max     = {:12.3f}, Total count    = {:12d}]\n".format(self.max / unit_ratio, self.total))
+            hgrm.write("#[Buckets = {:12d}, SubBuckets     = {:12d}]\n"
+                       .format(max(self.counts) // self.half_count if self.counts else 0, 2 * self.half_count))
+
+        return
+
+
+class Workload:
+    """
+    Builds the requests of the mix, with random IDs and locations, and sends them over a pool of channels.
+    """
+
+    def __init__(self, target: str, channels: int, max_ids: dict, area: tuple, timeout: float):
+        """
+        :param target: host:port of the server.
+        :param channels: number of channels calls are spread over, round robin.
+        :param max_ids: largest ID to pick from, by table.
+        :param area: (left, bottom, right, top) in degrees that locations are picked in.
+        :param timeout: seconds each call is given.
+        """
+
+        self.channels = [grpc.insecure_channel(target) for _ in range(channels)]
+        self.stubs = [{name: stub(channel) for name, stub in STUBS.items()} for channel in self.channels]
+        self.next_channel = count()
+        self.max_ids = max_ids
+        self.area = area
+        self.timeout = timeout
+        return
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+        return
+
+    def request(self, rpc: str, rng: random.Random):
+        """
+        :param rpc: e.g. "Element.Get".
+        :param rng:
+        :return: a request for the RPC.
+        """
+
+        service, method = rpc.lower().split(".")[0], rpc.split(".")[1]
+        pb2 = PROTOS[service]
+
+        if method in ("Get", "Delete"):
+            return pb2.Request(id=rng.randint(1, self.max_ids[service]))
+
+        if method == "List":
+            return pb2.ListRequest(limit=100)
+
+        if method in ("SearchByLocation", "SearchByLocationBatched"):
+            size = 0.5
+            left = rng.uniform(self.area[0], self.area[2] - size)
+            bottom = rng.uniform(self.area[1], self.area[3] - size)
+            return location_pb2.FilterByLocationRequest(rectangle=make_rectangle(left, bottom, left + size,
+                                                                                 bottom + size))
+
+        if method == "SearchNearest":
+            return location_pb2.NearestRequest(location=self.location(rng), k=10)
+
+        if method == "Create" and service == "element":
+            return element_pb2.CreateRequest(elements=[element_pb2.Reply(description="loadgen", no_location=True)])
+
+        if method == "Create":
+            return pb2.Reply(uuid=rng.randint(10 ** 9, 2 ** 31 - 1), location=self.location(rng)) \
+                if service in ("telecell", "basestation") else pb2.Reply(location=self.location(rng))
+
+        if method == "Update":
+            status = rng.choice([pb2.ActivityStatus.Value("ACTIVE"), pb2.ActivityStatus.Value("INACTIVE")])
+
+            # elements are where their asset is
+            if service == "element":
+                return pb2.Reply(id=rng.randint(1, self.max_ids[service]), status=status)
+
+            return pb2.Reply(id=rng.randint(1, self.max_ids[service]), location=self.location(rng), status=status)
+
+        raise ValueError("Unsupported RPC {}".format(rpc))
+
+    def check(self, rpc: str):
+        """
+        :param rpc:
+        :return:
+        :raises ValueError: if the RPC doesn't exist, or this can't make requests for it.
+        """
+
+        service, _, method = rpc.partition(".")
+
+        if service.lower() not in STUBS or not hasattr(self.stubs[0][service.lower()], method):
+            raise ValueError("Unknown RPC {} - expected Service.Method, e.g. Element.Get".format(rpc))
+
+        self.request(rpc, random.Random())
+        return
+
+    def location(self, rng: random.Random) -> location_pb2.Location:
+        return location_pb2.Location(long=rng.uniform(self.area[0], self.area[2]),
+                                     lat=rng.uniform(self.area[1], self.area[3]))
+
+    def call(self, rpc: str, request) -> int:
+        """
+        Sends a request on the next channel, and reads all of the reply.
+
+        :return: number of messages replied.
+        """
+
+        service, method = rpc.lower().split(".")[0], rpc.split(".")[1]
+        reply = getattr(self.stubs[next(self.next_channel) % len(self.stubs)][service], method)(request,
+                                                                                                timeout=self.timeout)
+
+        if isinstance(reply, grpc.Call) and hasattr(reply, "__iter__"):
+            return sum(1 for _ in reply)
+
+        return 1
+
+
+class Results:
+    """
+    Latencies and outcomes, by RPC, of the calls due after the warm-up.
+    """
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies = defaultdict(Histogram)
+        self.codes = defaultdict(Counter)
+        self.messages = Counter()
+        self.lock = threading.Lock()
+        return
+
+    def record(self, rpc: str, due: float, done: float, code: grpc.StatusCode, messages: int):
+        """
+        :param rpc:
+        :param due: when the call was scheduled for.
+        :param done: when its reply was read in full, or it failed.
+        :param code: status it finished with.
+        :param messages: number of messages replied.
+        :return:
+        """
+
+        if due < self.measure_from:
+            return
+
+        with self.lock:
+            histogram = self.latencies[rpc]
+            self.codes[rpc][code.name] += 1
+            self.messages[rpc] += messages
+
+        histogram.record(int((done - due) * 1e6))
+        return
+
+    def summary(self, duration: float) -> dict:
+        """
+        :param duration: seconds measured for.
+        :return: by RPC, and in total: calls, errors by status code, error rate, calls per second and latency
+        percentiles in milliseconds.
+        """
+
+        summary, total = {}, Histogram()
+
+        for rpc in sorted(self.codes):
+            histogram, codes = self.latencies[rpc], self.codes[rpc]
+            total.merge(histogram)
+            summary[rpc] = self.describe(histogram, codes, duration)
+            summary[rpc]["messages"] = self.messages[rpc]
+
+        codes = Counter()
+
+        for rpc_codes in self.codes.values():
+            codes.update(rpc_codes)
+
+        summary["total"] = self.describe(total, codes, duration)
+        return summary
+
+    @staticmethod
+    def describe(histogram: Histogram, codes: Counter, duration: float) -> dict:
+        calls = sum(codes.values())
+        errors = {code: n for code, n in codes.items() if code != grpc.StatusCode.OK.name}
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "error_rate": sum(errors.values()) / calls if calls else 0.0,
+            "throughput": calls / duration,
+            "mean_ms": histogram.mean() / 1000,
+            "p50_ms": histogram.value_at(50) / 1000,
+            "p90_ms": histogram.value_at(90) / 1000,
+            "p99_ms": histogram.value_at(99) / 1000,
+            "p99_9_ms": histogram.value_at(99.9) / 1000,
+            "max_ms": histogram.max / 1000,
+        }
+
+
+def timed_call(workload: Workload, results: Results, rpc: str, request, due: float):
+    try:
+        messages = workload.call(rpc, request)
+        code = grpc.StatusCode.OK
+    except grpc.RpcError as e:
+        messages, code = 0, e.code() or grpc.StatusCode.UNKNOWN
+
+    results.record(rpc, due, time.perf_counter(), code, messages)
+    return
+
+
+def run_open_loop(workload: Workload, results: Results, mix: dict, qps: float, poisson: bool, workers: int,
+                  deadline: float, seed: int):
+    """
+    Sends requests at qps a second, each due at a time set by the schedule rather than by earlier replies.
+
+    :param poisson: whether the gaps between requests are random (with a mean of 1 / qps), rather than all the same.
+    :param workers: most calls in flight - more are queued, and their wait counts towards their latency.
+    :return:
+    """
+
+    rng = random.Random(seed)
+    rpcs, weights = list(mix), list(mix.values())
+    due, behind = time.perf_counter(), 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loadgen") as executor:
+        while due < deadline:
+            rpc = rng.choices(rpcs, weights)[0]
+            request = workload.request(rpc, rng)
+            wait = due - time.perf_counter()
+
+            if wait > 0:
+                time.sleep(wait)
+            elif wait < -1 and not behind:
+                behind = 1
+                logger.warn("Sending over a second behind schedule - this client can't keep up with {} a second"
+                            .format(qps))
+
+            executor.submit(timed_call, workload, results, rpc, request, due)
+            due += rng.expovariate(qps) if poisson else 1 / qps
+
+    return
+
+
+def run_closed_loop(workload: Workload, results: Results, mix: dict, concurrency: int, deadline: float, seed: int):
+    """
+    Has concurrency callers each send a request once their last one has been answered.
+
+    :return:
+    """
+
+    rpcs, weights = list(mix), list(mix.values())
+
+    def caller(index: int):
+        rng = random.Random(seed * 1000 + index)
+
+        while True:
+            rpc = rng.choices(rpcs, weights)[0]
+            request = workload.request(rpc, rng)
+            start = time.perf_counter()
+
+            if start >= deadline:
+                return
+
+            timed_call(workload, results, rpc, request, start)
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(concurrency)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return
+
+
+def run(target: str, mix: dict, qps: float, concurrency: int, poisson: bool, workers: int, channels: int,
+        duration: float, warmup: float, max_ids: dict, area: tuple, timeout: float, seed: int, hgrm_dir: str,
+        output: str):
+    workload = Workload(target, channels, max_ids, area, timeout)
+
+    for rpc in mix:
+        workload.check(rpc)
+
+    start = time.perf_counter()
+    results = Results(start + warmup)
+
+    try:
+        if concurrency:
+            logger.info("Running {} from {} callers for {}s (after {}s of warm-up)"
+                        .format(mix, concurrency, duration, warmup))
+            run_closed_loop(workload, results, mix, concurrency, start + warmup + duration, seed)
+        else:
+            logger.info("Running {} at {} a second for {}s (after {}s of warm-up)".format(mix, qps, duration, warmup))
+            run_open_loop(workload, results, mix, qps, poisson, workers, start + warmup + duration, seed)
+    finally:
+        workload.close()
+
+    summary = results.summary(duration)
+
+    logger.info("{:<30} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}"
+                .format("RPC", "calls", "errors", "calls/s", "p50 ms", "p90 ms", "p99 ms", "p99.9 ms", "max ms"))
+
+    for rpc, rpc_summary in summary.items():
+        logger.info("{:<30} {calls:>8} {:>8} {throughput:>9.1f} {p50_ms:>9.2f} {p90_ms:>9.2f} {p99_ms:>9.2f} "
+                    "{p99_9_ms:>9.2f} {max_ms:>9.2f}".format(rpc, sum(rpc_summary["errors"].values()), **rpc_summary))
+
+        for code, n in sorted(rpc_summary["errors"].items()):
+            logger.info("{:<30} {:>8} {}".format("", n, code))
+
+    if hgrm_dir:
+        os.makedirs(hgrm_dir, exist_ok=True)
+
+        for rpc, histogram in results.latencies.items():
+            histogram.write_hgrm(os.path.join(hgrm_dir, "{}.hgrm".format(rpc)))
+
+        logger.info("Wrote latency distributions to {}".format(hgrm_dir))
+
+    if output:
+        with open(output, "w") as output_file:
+            json.dump({
+                "target": target,
+                "mix": mix,
+                "qps": None if concurrency else qps,
+                "concurrency": concurrency or None,
+                "poisson": poisson,
+                "channels": channels,
+                "duration": duration,
+                "warmup": warmup,
+                "seed": seed,
+                "rpcs": summary,
+            }, output_file, indent=2, sort_keys=True)
+
+        logger.info("Wrote results to {}".format(output))
+
+    return
+
+
+def parse_pairs(pairs: list, convert) -> dict:
+    """
+    :param pairs: e.g. ["Element.Get=3", "Telecell.Update=1"].
+    :param convert: what each value is converted with, e.g. float.
+    :return:
+    """
+
+    parsed = {}
+
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        parsed[key] = convert(value)
+
+    return parsed
+
+
+if __name__ == "__main__":
+    lighting_settings.load_env_vars(False)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="localhost:{}".format(os.getenv("LIGHTING_COMPONENTS_PORT")))
+    parser.add_argument("--mix", nargs="+", metavar="RPC=WEIGHT", default=[],
+                        help="weights of the RPCs to run (Service.Method, e.g. Basestation.SearchByLocationBatched), "
+                             "instead of {}".format(" ".join("{}={}".format(*item) for item in DEFAULT_MIX.items())))
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--qps", type=float, default=100, help="requests a second to send, open-loop")
+    load.add_argument("--concurrency", type=int, default=0, help="callers to run closed-loop, instead of --qps")
+    parser.add_argument("--poisson", action="store_true", help="random gaps between open-loop requests")
+    parser.add_argument("--workers", type=int, default=256, help="most open-loop calls in flight")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60, help="seconds to measure for")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds to run before measuring")
+    parser.add_argument("--max-ids", nargs="+", metavar="TABLE=ID", default=[],
+                        help="largest ID of each table (asset, basestation, element, telecell) to pick from; "
+                             "1000 if not given")
+    parser.add_argument("--area", type=float, nargs=4, default=(-10.0, 40.0, 10.0, 60.0),
+                        metavar=("LEFT", "BOTTOM", "RIGHT", "TOP"), help="where locations are picked, in degrees")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds each call is given")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hgrm-dir", help="directory to write an HdrHistogram .hgrm file of each RPC to")
+    parser.add_argument("--output", help="JSON file to write the summary to")
+    args = parser.parse_args()
+
+    max_ids = dict({table: 1000 for table in STUBS}, **parse_pairs(args.max_ids, int))
+
+    run(args.target, parse_pairs(args.mix, float) if args.mix else DEFAULT_MIX, args.qps, args.concurrency,
+        args.poisson, args.workers, args.channels, args.duration, args.warmup, max_ids, tuple(args.area),
+        args.timeout, args.seed, args.hgrm_dir, args.output)
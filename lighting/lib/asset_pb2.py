@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: asset.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'asset.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from . import location_pb2 as location__pb2
+from . import change_pb2 as change__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0b\x61sset.proto\x12\x0elighting.asset\x1a\x0elocation.proto\x1a\x0c\x63hange.proto\x1a google/protobuf/field_mask.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"\xa2\x01\n\x0bListRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x0e\n\x06offset\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\x12\x31\n\rupdated_since\x18\x05 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"D\n\x07Request\x12\n\n\x02id\x18\x01 \x01(\x05\x12-\n\tread_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"\xb3\x01\n\x05Reply\x12\n\n\x02id\x18\x01 \x01(\x05\x12.\n\x06status\x18\x02 \x01(\x0e\x32\x1e.lighting.asset.ActivityStatus\x12\x14\n\x0c\x65lement_uids\x18\x03 \x03(\x05\x12\x15\n\x0bno_location\x18\x0e \x01(\x08H\x00\x12/\n\x08location\x18\x0f \x01(\x0b\x32\x1b.lighting.location.LocationH\x00\x42\x10\n\x0elocation_oneof\" \n\x11\x44\x65leteManyRequest\x12\x0b\n\x03ids\x18\x01 \x03(\x05\"a\n\x0f\x44\x65leteManyReply\x12%\n\x06\x61ssets\x18\x01 \x03(\x0b\x32\x15.lighting.asset.Reply\x12\x14\n\x0ctelecell_ids\x18\x02 \x03(\x05\x12\x11\n\tnot_found\x18\x03 \x03(\x05\"\x8e\x01\n\tListReply\x12%\n\x06\x61ssets\x18\x01 \x03(\x0b\x32\x15.lighting.asset.Reply\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x12\n\npruned_ids\x18\x03 \x03(\x05\x12-\n\tsynced_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"C\n\tNeighbour\x12\x10\n\x08\x64istance\x18\x01 \x01(\x01\x12$\n\x05\x61sset\x18\x02 \x01(\x0b\x32\x15.lighting.asset.Reply\"\x89\x01\n\x06\x43hange\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12\x0e\n\x06\x62us_id\x18\x02 \x01(\t\x12\'\n\x06\x61\x63tion\x18\x03 \x01(\x0e\x32\x17.lighting.change.Action\x12$\n\x05\x61sset\x18\x04 \x01(\x0b\x32\x15.lighting.asset.Reply\x12\x0e\n\x06resync\x18\x05 \x01(\x08*H\n\x0e\x41\x63tivityStatus\x12\x0f\n\x0bUNAVAILABLE\x10\x00\x12\n\n\x06\x41\x43TIVE\x10\x01\x12\x0c\n\x08INACTIVE\x10\x02\x12\x0b\n\x07\x44\x45LETED\x10\x0f\x32\xdb\x06\n\x05\x41sset\x12\x35\n\x03Get\x12\x17.lighting.asset.Request\x1a\x15.lighting.asset.Reply\x12@\n\x04List\x12\x1b.lighting.asset.ListRequest\x1a\x19.lighting.asset.ListReply0\x01\x12W\n\x10SearchByLocation\x12*.lighting.location.FilterByLocationRequest\x1a\x15.lighting.asset.Reply0\x01\x12\x62\n\x17SearchByLocationBatched\x12*.lighting.location.FilterByLocationRequest\x1a\x19.lighting.asset.ListReply0\x01\x12O\n\rSearchNearest\x12!.lighting.location.NearestRequest\x1a\x19.lighting.asset.Neighbour0\x01\x12T\n\x0eSearchClusters\x12!.lighting.location.ClusterRequest\x1a\x1f.lighting.location.ClusterReply\x12\x36\n\x06\x43reate\x12\x15.lighting.asset.Reply\x1a\x15.lighting.asset.Reply\x12\x36\n\x06Update\x12\x15.lighting.asset.Reply\x1a\x15.lighting.asset.Reply\x12\x38\n\x06\x44\x65lete\x12\x17.lighting.asset.Request\x1a\x15.lighting.asset.Reply\x12P\n\nDeleteMany\x12!.lighting.asset.DeleteManyRequest\x1a\x1f.lighting.asset.DeleteManyReply\x12\x37\n\x05Prune\x12\x17.lighting.asset.Request\x1a\x15.lighting.asset.Reply\x12@\n\x05Watch\x12\x1d.lighting.change.WatchRequest\x1a\x16.lighting.asset.Change0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'asset_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ACTIVITYSTATUS']._serialized_start=1032
+  _globals['_ACTIVITYSTATUS']._serialized_end=1104
+  _globals['_LISTREQUEST']._serialized_start=129
+  _globals['_LISTREQUEST']._serialized_end=291
+  _globals['_REQUEST']._serialized_start=293
+  _globals['_REQUEST']._serialized_end=361
+  _globals['_REPLY']._serialized_start=364
+  _globals['_REPLY']._serialized_end=543
+  _globals['_DELETEMANYREQUEST']._serialized_start=545
+  _globals['_DELETEMANYREQUEST']._serialized_end=577
+  _globals['_DELETEMANYREPLY']._serialized_start=579
+  _globals['_DELETEMANYREPLY']._serialized_end=676
+  _globals['_LISTREPLY']._serialized_start=679
+  _globals['_LISTREPLY']._serialized_end=821
+  _globals['_NEIGHBOUR']._serialized_start=823
+  _globals['_NEIGHBOUR']._serialized_end=890
+  _globals['_CHANGE']._serialized_start=893
+  _globals['_CHANGE']._serialized_end=1030
+  _globals['_ASSET']._serialized_start=1107
+  _globals['_ASSET']._serialized_end=1966
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,580 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from . import asset_pb2 as asset__pb2
+from . import change_pb2 as change__pb2
+from . import location_pb2 as location__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in asset_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class AssetStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Get = channel.unary_unary(
+                '/lighting.asset.Asset/Get',
+                request_serializer=asset__pb2.Request.SerializeToString,
+                response_deserializer=asset__pb2.Reply.FromString,
+                _registered_method=True)
+        self.List = channel.unary_stream(
+                '/lighting.asset.Asset/List',
+                request_serializer=asset__pb2.ListRequest.SerializeToString,
+                response_deserializer=asset__pb2.ListReply.FromString,
+                _registered_method=True)
+        self.SearchByLocation = channel.unary_stream(
+                '/lighting.asset.Asset/SearchByLocation',
+                request_serializer=location__pb2.FilterByLocationRequest.SerializeToString,
+                response_deserializer=asset__pb2.Reply.FromString,
+                _registered_method=True)
+        self.SearchByLocationBatched = channel.unary_stream(
+                '/lighting.asset.Asset/SearchByLocationBatched',
+                request_serializer=location__pb2.FilterByLocationRequest.SerializeToString,
+                response_deserializer=asset__pb2.ListReply.FromString,
+                _registered_method=True)
+        self.SearchNearest = channel.unary_stream(
+                '/lighting.asset.Asset/SearchNearest',
+                request_serializer=location__pb2.NearestRequest.SerializeToString,
+                response_deserializer=asset__pb2.Neighbour.FromString,
+                _registered_method=True)
+        self.SearchClusters = channel.unary_unary(
+                '/lighting.asset.Asset/SearchClusters',
+                request_serializer=location__pb2.ClusterRequest.SerializeToString,
+                response_deserializer=location__pb2.ClusterReply.FromString,
+                _registered_method=True)
+        self.Create = channel.unary_unary(
+                '/lighting.asset.Asset/Create',
+                request_serializer=asset__pb2.Reply.SerializeToString,
+                response_deserializer=asset__pb2.Reply.FromString,
+                _registered_method=True)
+        self.Update = channel.unary_unary(
+                '/lighting.asset.Asset/Update',
+                request_serializer=asset__pb2.Reply.SerializeToString,
+                response_deserializer=asset__pb2.Reply.FromString,
+                _registered_method=True)
+        self.Delete = channel.unary_unary(
+                '/lighting.asset.Asset/Delete',
+                request_serializer=asset__pb2.Request.SerializeToString,
+                response_deserializer=asset__pb2.Reply.FromString,
+                _registered_method=True)
+        self.DeleteMany = channel.unary_unary(
+                '/lighting.asset.Asset/DeleteMany',
+                request_serializer=asset__pb2.DeleteManyRequest.SerializeToString,
+                response_deserializer=asset__pb2.DeleteManyReply.FromString,
+                _registered_method=True)
+        self.Prune = channel.unary_unary(
+                '/lighting.asset.Asset/Prune',
+                request_serializer=asset__pb2.Request.SerializeToString,
+                response_deserializer=asset__pb2.Reply.FromString,
+                _registered_method=True)
+        self.Watch = channel.unary_stream(
+                '/lighting.asset.Asset/Watch',
+                request_serializer=change__pb2.WatchRequest.SerializeToString,
+                response_deserializer=asset__pb2.Change.FromString,
+                _registered_method=True)
+
+
+class AssetServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def Get(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def List(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchByLocation(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchByLocationBatched(self, request, context):
+        """same as SearchByLocation, but packs as many results as fit in the server's size budget into each message.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchNearest(self, request, context):
+        """streams the assets closest to a location (as the crow flies), nearest first. Answered from the server's
+        location index, so only the assets found are loaded from the DB.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchClusters(self, request, context):
+        """groups the assets in a map rectangle by the cells of a grid, for zoomed-out map views. Answered from the
+        server's location index, and a bounded number of clusters is sent back however many assets there are.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Create(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Update(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Delete(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteMany(self, request, context):
+        """soft deletes many assets at once, cascading down to their elements and telecells as Delete does.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Prune(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Watch(self, request, context):
+        """streams changes made to assets from now on, or from after_sequence. Changes are only sent for writes made
+        through the server process serving the stream.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AssetServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Get': grpc.unary_unary_rpc_method_handler(
+                    servicer.Get,
+                    request_deserializer=asset__pb2.Request.FromString,
+                    response_serializer=asset__pb2.Reply.SerializeToString,
+            ),
+            'List': grpc.unary_stream_rpc_method_handler(
+                    servicer.List,
+                    request_deserializer=asset__pb2.ListRequest.FromString,
+                    response_serializer=asset__pb2.ListReply.SerializeToString,
+            ),
+            'SearchByLocation': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchByLocation,
+                    request_deserializer=location__pb2.FilterByLocationRequest.FromString,
+                    response_serializer=asset__pb2.Reply.SerializeToString,
+            ),
+            'SearchByLocationBatched': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchByLocationBatched,
+                    request_deserializer=location__pb2.FilterByLocationRequest.FromString,
+                    response_serializer=asset__pb2.ListReply.SerializeToString,
+            ),
+            'SearchNearest': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchNearest,
+                    request_deserializer=location__pb2.NearestRequest.FromString,
+                    response_serializer=asset__pb2.Neighbour.SerializeToString,
+            ),
+            'SearchClusters': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchClusters,
+                    request_deserializer=location__pb2.ClusterRequest.FromString,
+                    response_serializer=location__pb2.ClusterReply.SerializeToString,
+            ),
+            'Create': grpc.unary_unary_rpc_method_handler(
+                    servicer.Create,
+                    request_deserializer=asset__pb2.Reply.FromString,
+                    response_serializer=asset__pb2.Reply.SerializeToString,
+            ),
+            'Update': grpc.unary_unary_rpc_method_handler(
+                    servicer.Update,
+                    request_deserializer=asset__pb2.Reply.FromString,
+                    response_serializer=asset__pb2.Reply.SerializeToString,
+            ),
+            'Delete': grpc.unary_unary_rpc_method_handler(
+                    servicer.Delete,
+                    request_deserializer=asset__pb2.Request.FromString,
+                    response_serializer=asset__pb2.Reply.SerializeToString,
+            ),
+            'DeleteMany': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteMany,
+                    request_deserializer=asset__pb2.DeleteManyRequest.FromString,
+                    response_serializer=asset__pb2.DeleteManyReply.SerializeToString,
+            ),
+            'Prune': grpc.unary_unary_rpc_method_handler(
+                    servicer.Prune,
+                    request_deserializer=asset__pb2.Request.FromString,
+                    response_serializer=asset__pb2.Reply.SerializeToString,
+            ),
+            'Watch': grpc.unary_stream_rpc_method_handler(
+                    servicer.Watch,
+                    request_deserializer=change__pb2.WatchRequest.FromString,
+                    response_serializer=asset__pb2.Change.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'lighting.asset.Asset', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('lighting.asset.Asset', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Asset:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Get(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/Get',
+            asset__pb2.Request.SerializeToString,
+            asset__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def List(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.asset.Asset/List',
+            asset__pb2.ListRequest.SerializeToString,
+            asset__pb2.ListReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchByLocation(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.asset.Asset/SearchByLocation',
+            location__pb2.FilterByLocationRequest.SerializeToString,
+            asset__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchByLocationBatched(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.asset.Asset/SearchByLocationBatched',
+            location__pb2.FilterByLocationRequest.SerializeToString,
+            asset__pb2.ListReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchNearest(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.asset.Asset/SearchNearest',
+            location__pb2.NearestRequest.SerializeToString,
+            asset__pb2.Neighbour.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchClusters(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/SearchClusters',
+            location__pb2.ClusterRequest.SerializeToString,
+            location__pb2.ClusterReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Create(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/Create',
+            asset__pb2.Reply.SerializeToString,
+            asset__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Update(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/Update',
+            asset__pb2.Reply.SerializeToString,
+            asset__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Delete(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/Delete',
+            asset__pb2.Request.SerializeToString,
+            asset__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DeleteMany(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/DeleteMany',
+            asset__pb2.DeleteManyRequest.SerializeToString,
+            asset__pb2.DeleteManyReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Prune(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.asset.Asset/Prune',
+            asset__pb2.Request.SerializeToString,
+            asset__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Watch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.asset.Asset/Watch',
+            change__pb2.WatchRequest.SerializeToString,
+            asset__pb2.Change.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: basestation.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'basestation.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from . import location_pb2 as location__pb2
+from . import change_pb2 as change__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x62\x61sestation.proto\x12\x14lighting.basestation\x1a\x0elocation.proto\x1a\x0c\x63hange.proto\x1a google/protobuf/field_mask.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"k\n\x07Request\x12\x0c\n\x02id\x18\x01 \x01(\x05H\x00\x12\x0e\n\x04uuid\x18\x02 \x01(\x05H\x00\x12-\n\tread_mask\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMaskB\x13\n\x11unique_identifier\"\xc2\x01\n\x05Reply\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04uuid\x18\x02 \x01(\x03\x12\x0f\n\x07version\x18\x03 \x01(\x05\x12\x34\n\x06status\x18\x04 \x01(\x0e\x32$.lighting.basestation.ActivityStatus\x12\x15\n\x0bno_location\x18\x0e \x01(\x08H\x00\x12/\n\x08location\x18\x0f \x01(\x0b\x32\x1b.lighting.location.LocationH\x00\x42\x10\n\x0elocation_oneof\"\xa2\x01\n\x0bListRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x0e\n\x06offset\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\x12\x31\n\rupdated_since\x18\x05 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\x9a\x01\n\tListReply\x12\x31\n\x0c\x62\x61sestations\x18\x01 \x03(\x0b\x32\x1b.lighting.basestation.Reply\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x12\n\npruned_ids\x18\x03 \x03(\x05\x12-\n\tsynced_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"O\n\tNeighbour\x12\x10\n\x08\x64istance\x18\x01 \x01(\x01\x12\x30\n\x0b\x62\x61sestation\x18\x02 \x01(\x0b\x32\x1b.lighting.basestation.Reply\"\x95\x01\n\x06\x43hange\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12\x0e\n\x06\x62us_id\x18\x02 \x01(\t\x12\'\n\x06\x61\x63tion\x18\x03 \x01(\x0e\x32\x17.lighting.change.Action\x12\x30\n\x0b\x62\x61sestation\x18\x04 \x01(\x0b\x32\x1b.lighting.basestation.Reply\x12\x0e\n\x06resync\x18\x05 \x01(\x08*H\n\x0e\x41\x63tivityStatus\x12\x0f\n\x0bUNAVAILABLE\x10\x00\x12\n\n\x06\x41\x43TIVE\x10\x01\x12\x0c\n\x08INACTIVE\x10\x02\x12\x0b\n\x07\x44\x45LETED\x10\x0f\x32\x99\x06\n\x0b\x42\x61sestation\x12\x41\n\x03Get\x12\x1d.lighting.basestation.Request\x1a\x1b.lighting.basestation.Reply\x12L\n\x04List\x12!.lighting.basestation.ListRequest\x1a\x1f.lighting.basestation.ListReply0\x01\x12]\n\x10SearchByLocation\x12*.lighting.location.FilterByLocationRequest\x1a\x1b.lighting.basestation.Reply0\x01\x12h\n\x17SearchByLocationBatched\x12*.lighting.location.FilterByLocationRequest\x1a\x1f.lighting.basestation.ListReply0\x01\x12U\n\rSearchNearest\x12!.lighting.location.NearestRequest\x1a\x1f.lighting.basestation.Neighbour0\x01\x12\x42\n\x06\x43reate\x12\x1b.lighting.basestation.Reply\x1a\x1b.lighting.basestation.Reply\x12\x42\n\x06Update\x12\x1b.lighting.basestation.Reply\x1a\x1b.lighting.basestation.Reply\x12\x44\n\x06\x44\x65lete\x12\x1d.lighting.basestation.Request\x1a\x1b.lighting.basestation.Reply\x12\x43\n\x05Prune\x12\x1d.lighting.basestation.Request\x1a\x1b.lighting.basestation.Reply\x12\x46\n\x05Watch\x12\x1d.lighting.change.WatchRequest\x1a\x1c.lighting.basestation.Change0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'basestation_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ACTIVITYSTATUS']._serialized_start=1001
+  _globals['_ACTIVITYSTATUS']._serialized_end=1073
+  _globals['_REQUEST']._serialized_start=140
+  _globals['_REQUEST']._serialized_end=247
+  _globals['_REPLY']._serialized_start=250
+  _globals['_REPLY']._serialized_end=444
+  _globals['_LISTREQUEST']._serialized_start=447
+  _globals['_LISTREQUEST']._serialized_end=609
+  _globals['_LISTREPLY']._serialized_start=612
+  _globals['_LISTREPLY']._serialized_end=766
+  _globals['_NEIGHBOUR']._serialized_start=768
+  _globals['_NEIGHBOUR']._serialized_end=847
+  _globals['_CHANGE']._serialized_start=850
+  _globals['_CHANGE']._serialized_end=999
+  _globals['_BASESTATION']._serialized_start=1076
+  _globals['_BASESTATION']._serialized_end=1869
+# @@protoc_insertion_point(module_scope)
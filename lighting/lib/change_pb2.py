@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: change.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'change.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from . import location_pb2 as location__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0c\x63hange.proto\x12\x0flighting.change\x1a\x0elocation.proto\"\x8f\x01\n\x0cWatchRequest\x12-\n\trectangle\x18\x01 \x01(\x0b\x32\x1a.lighting.location.MapRect\x12\x10\n\x08statuses\x18\x02 \x03(\x05\x12\x16\n\x0e\x62\x61sestation_id\x18\x03 \x01(\x05\x12\x16\n\x0e\x61\x66ter_sequence\x18\x04 \x01(\x04\x12\x0e\n\x06\x62us_id\x18\x05 \x01(\t*H\n\x06\x41\x63tion\x12\x0b\n\x07UNKNOWN\x10\x00\x12\x0b\n\x07\x43REATED\x10\x01\x12\x0b\n\x07UPDATED\x10\x02\x12\x0b\n\x07\x44\x45LETED\x10\x03\x12\n\n\x06PRUNED\x10\x04\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'change_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ACTION']._serialized_start=195
+  _globals['_ACTION']._serialized_end=267
+  _globals['_WATCHREQUEST']._serialized_start=50
+  _globals['_WATCHREQUEST']._serialized_end=193
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: element.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'element.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from . import location_pb2 as location__pb2
+from . import change_pb2 as change__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+from . import asset_pb2 as asset__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\relement.proto\x12\x10lighting.element\x1a\x0elocation.proto\x1a\x0c\x63hange.proto\x1a google/protobuf/field_mask.proto\x1a\x1fgoogle/protobuf/timestamp.proto\x1a\x0b\x61sset.proto\"\xa2\x01\n\x0bListRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x0e\n\x06offset\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\x12\x31\n\rupdated_since\x18\x05 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\x92\x01\n\tListReply\x12)\n\x08\x65lements\x18\x01 \x03(\x0b\x32\x17.lighting.element.Reply\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x12\n\npruned_ids\x18\x03 \x03(\x05\x12-\n\tsynced_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"D\n\x07Request\x12\n\n\x02id\x18\x01 \x01(\x05\x12-\n\tread_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"\xa5\x01\n\x05Reply\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x30\n\x06status\x18\x02 \x01(\x0e\x32 .lighting.element.ActivityStatus\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12&\n\x05\x61sset\x18\x04 \x01(\x0b\x32\x15.lighting.asset.ReplyH\x00\x12\x12\n\x08\x61sset_id\x18\x05 \x01(\x05H\x00\x42\r\n\x0b\x61sset_oneof\":\n\rCreateRequest\x12)\n\x08\x65lements\x18\x01 \x03(\x0b\x32\x17.lighting.element.Reply\"\x8d\x01\n\x06\x43hange\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12\x0e\n\x06\x62us_id\x18\x02 \x01(\t\x12\'\n\x06\x61\x63tion\x18\x03 \x01(\x0e\x32\x17.lighting.change.Action\x12(\n\x07\x65lement\x18\x04 \x01(\x0b\x32\x17.lighting.element.Reply\x12\x0e\n\x06resync\x18\x05 \x01(\x08*H\n\x0e\x41\x63tivityStatus\x12\x0f\n\x0bUNAVAILABLE\x10\x00\x12\n\n\x06\x41\x43TIVE\x10\x01\x12\x0c\n\x08INACTIVE\x10\x02\x12\x0b\n\x07\x44\x45LETED\x10\x0f\x32\xce\x05\n\x07\x45lement\x12\x39\n\x03Get\x12\x19.lighting.element.Request\x1a\x17.lighting.element.Reply\x12\x44\n\x04List\x12\x1d.lighting.element.ListRequest\x1a\x1b.lighting.element.ListReply0\x01\x12Y\n\x10SearchByLocation\x12*.lighting.location.FilterByLocationRequest\x1a\x17.lighting.element.Reply0\x01\x12\x64\n\x17SearchByLocationBatched\x12*.lighting.location.FilterByLocationRequest\x1a\x1b.lighting.element.ListReply0\x01\x12\x46\n\x06\x43reate\x12\x1f.lighting.element.CreateRequest\x1a\x1b.lighting.element.ListReply\x12:\n\x06Update\x12\x17.lighting.element.Reply\x1a\x17.lighting.element.Reply\x12<\n\x06\x44\x65lete\x12\x19.lighting.element.Request\x1a\x17.lighting.element.Reply\x12;\n\x05Prune\x12\x19.lighting.element.Request\x1a\x17.lighting.element.Reply\x12>\n\nAddToAsset\x12\x17.lighting.element.Reply\x1a\x17.lighting.element.Reply\x12\x42\n\x05Watch\x12\x1d.lighting.change.WatchRequest\x1a\x18.lighting.element.Change0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'element_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ACTIVITYSTATUS']._serialized_start=901
+  _globals['_ACTIVITYSTATUS']._serialized_end=973
+  _globals['_LISTREQUEST']._serialized_start=146
+  _globals['_LISTREQUEST']._serialized_end=308
+  _globals['_LISTREPLY']._serialized_start=311
+  _globals['_LISTREPLY']._serialized_end=457
+  _globals['_REQUEST']._serialized_start=459
+  _globals['_REQUEST']._serialized_end=527
+  _globals['_REPLY']._serialized_start=530
+  _globals['_REPLY']._serialized_end=695
+  _globals['_CREATEREQUEST']._serialized_start=697
+  _globals['_CREATEREQUEST']._serialized_end=755
+  _globals['_CHANGE']._serialized_start=758
+  _globals['_CHANGE']._serialized_end=899
+  _globals['_ELEMENT']._serialized_start=976
+  _globals['_ELEMENT']._serialized_end=1694
+# @@protoc_insertion_point(module_scope)
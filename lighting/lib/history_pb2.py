@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: history.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'history.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rhistory.proto\x12\x10lighting.history\x1a\x1fgoogle/protobuf/timestamp.proto\"\xb4\x01\n\x0eHistoryRequest\x12\x15\n\x0btelecell_id\x18\x01 \x01(\x05H\x00\x12\x18\n\x0e\x62\x61sestation_id\x18\x02 \x01(\x05H\x00\x12)\n\x05start\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\'\n\x03\x65nd\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x12\n\nmax_points\x18\x05 \x01(\x05\x42\t\n\x07subject\"\x8a\x01\n\nTransition\x12&\n\x02\x61t\x18\x01 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x13\n\x0btelecell_id\x18\x02 \x01(\x05\x12\x16\n\x0e\x62\x61sestation_id\x18\x03 \x01(\x05\x12\x0e\n\x06status\x18\x04 \x01(\x05\x12\x17\n\x0fprevious_status\x18\x05 \x01(\x05\"B\n\x0eStatusDuration\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\x0f\n\x07seconds\x18\x02 \x01(\x01\x12\x0f\n\x07\x65ntered\x18\x03 \x01(\x05\"\x90\x01\n\x06\x42ucket\x12)\n\x05start\x18\x01 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\'\n\x03\x65nd\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x32\n\x08statuses\x18\x03 \x03(\x0b\x32 .lighting.history.StatusDuration\"l\n\x0cHistoryReply\x12\x31\n\x0btransitions\x18\x01 \x03(\x0b\x32\x1c.lighting.history.Transition\x12)\n\x07\x62uckets\x18\x02 \x03(\x0b\x32\x18.lighting.history.Bucket2T\n\x07History\x12I\n\x05Query\x12 .lighting.history.HistoryRequest\x1a\x1e.lighting.history.HistoryReplyb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'history_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_HISTORYREQUEST']._serialized_start=69
+  _globals['_HISTORYREQUEST']._serialized_end=249
+  _globals['_TRANSITION']._serialized_start=252
+  _globals['_TRANSITION']._serialized_end=390
+  _globals['_STATUSDURATION']._serialized_start=392
+  _globals['_STATUSDURATION']._serialized_end=458
+  _globals['_BUCKET']._serialized_start=461
+  _globals['_BUCKET']._serialized_end=605
+  _globals['_HISTORYREPLY']._serialized_start=607
+  _globals['_HISTORYREPLY']._serialized_end=715
+  _globals['_HISTORY']._serialized_start=717
+  _globals['_HISTORY']._serialized_end=801
+# @@protoc_insertion_point(module_scope)
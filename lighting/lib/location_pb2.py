@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: location.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'location.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0elocation.proto\x12\x11lighting.location\x1a google/protobuf/field_mask.proto\"%\n\x08Location\x12\x0c\n\x04long\x18\x01 \x01(\x01\x12\x0b\n\x03lat\x18\x02 \x01(\x01\"[\n\x07MapRect\x12\'\n\x02hi\x18\x01 \x01(\x0b\x32\x1b.lighting.location.Location\x12\'\n\x02lo\x18\x02 \x01(\x0b\x32\x1b.lighting.location.Location\"w\n\x17\x46ilterByLocationRequest\x12-\n\trectangle\x18\x01 \x01(\x0b\x32\x1a.lighting.location.MapRect\x12-\n\tread_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"\x8f\x01\n\x0eNearestRequest\x12-\n\x08location\x18\x01 \x01(\x0b\x32\x1b.lighting.location.Location\x12\t\n\x01k\x18\x02 \x01(\x05\x12\x14\n\x0cmax_distance\x18\x03 \x01(\x01\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"`\n\x0e\x43lusterRequest\x12-\n\trectangle\x18\x01 \x01(\x0b\x32\x1a.lighting.location.MapRect\x12\x11\n\tcell_size\x18\x02 \x01(\x01\x12\x0c\n\x04zoom\x18\x03 \x01(\x05\"\xde\x01\n\x07\x43luster\x12-\n\x08\x63\x65ntroid\x18\x01 \x01(\x0b\x32\x1b.lighting.location.Location\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\x12(\n\x04\x63\x65ll\x18\x03 \x01(\x0b\x32\x1a.lighting.location.MapRect\x12:\n\x08statuses\x18\x04 \x03(\x0b\x32(.lighting.location.Cluster.StatusesEntry\x1a/\n\rStatusesEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"O\n\x0c\x43lusterReply\x12,\n\x08\x63lusters\x18\x01 \x03(\x0b\x32\x1a.lighting.location.Cluster\x12\x11\n\tcell_size\x18\x02 \x01(\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'location_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_CLUSTER_STATUSESENTRY']._loaded_options = None
+  _globals['_CLUSTER_STATUSESENTRY']._serialized_options = b'8\001'
+  _globals['_LOCATION']._serialized_start=71
+  _globals['_LOCATION']._serialized_end=108
+  _globals['_MAPRECT']._serialized_start=110
+  _globals['_MAPRECT']._serialized_end=201
+  _globals['_FILTERBYLOCATIONREQUEST']._serialized_start=203
+  _globals['_FILTERBYLOCATIONREQUEST']._serialized_end=322
+  _globals['_NEARESTREQUEST']._serialized_start=325
+  _globals['_NEARESTREQUEST']._serialized_end=468
+  _globals['_CLUSTERREQUEST']._serialized_start=470
+  _globals['_CLUSTERREQUEST']._serialized_end=566
+  _globals['_CLUSTER']._serialized_start=569
+  _globals['_CLUSTER']._serialized_end=791
+  _globals['_CLUSTER_STATUSESENTRY']._serialized_start=744
+  _globals['_CLUSTER_STATUSESENTRY']._serialized_end=791
+  _globals['_CLUSTERREPLY']._serialized_start=793
+  _globals['_CLUSTERREPLY']._serialized_end=872
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: stats.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'stats.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from . import location_pb2 as location__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bstats.proto\x12\x0elighting.stats\x1a\x0elocation.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"\x84\x01\n\x10\x41ggregateRequest\x12-\n\trectangle\x18\x01 \x01(\x0b\x32\x1a.lighting.location.MapRect\x12\x16\n\x0e\x62\x61sestation_id\x18\x02 \x01(\x05\x12\x16\n\x0e\x62y_basestation\x18\x03 \x01(\x08\x12\x11\n\tby_region\x18\x04 \x01(\x08\",\n\x0bStatusCount\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\"g\n\x06\x43ounts\x12.\n\ttelecells\x18\x01 \x03(\x0b\x32\x1b.lighting.stats.StatusCount\x12-\n\x08\x65lements\x18\x02 \x03(\x0b\x32\x1b.lighting.stats.StatusCount\"\x8a\x01\n\x11\x42\x61sestationCounts\x12\x16\n\x0e\x62\x61sestation_id\x18\x01 \x01(\x05\x12.\n\ttelecells\x18\x02 \x03(\x0b\x32\x1b.lighting.stats.StatusCount\x12-\n\x08\x65lements\x18\x03 \x03(\x0b\x32\x1b.lighting.stats.StatusCount\"e\n\x0cRegionCounts\x12-\n\trectangle\x18\x01 \x01(\x0b\x32\x1a.lighting.location.MapRect\x12&\n\x06\x63ounts\x18\x02 \x01(\x0b\x32\x16.lighting.stats.Counts\"\xd2\x01\n\x0e\x41ggregateReply\x12%\n\x05total\x18\x01 \x01(\x0b\x32\x16.lighting.stats.Counts\x12\x37\n\x0c\x62\x61sestations\x18\x02 \x03(\x0b\x32!.lighting.stats.BasestationCounts\x12-\n\x07regions\x18\x03 \x03(\x0b\x32\x1c.lighting.stats.RegionCounts\x12\x31\n\rreconciled_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp2V\n\x05Stats\x12M\n\tAggregate\x12 .lighting.stats.AggregateRequest\x1a\x1e.lighting.stats.AggregateReplyb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'stats_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_AGGREGATEREQUEST']._serialized_start=81
+  _globals['_AGGREGATEREQUEST']._serialized_end=213
+  _globals['_STATUSCOUNT']._serialized_start=215
+  _globals['_STATUSCOUNT']._serialized_end=259
+  _globals['_COUNTS']._serialized_start=261
+  _globals['_COUNTS']._serialized_end=364
+  _globals['_BASESTATIONCOUNTS']._serialized_start=367
+  _globals['_BASESTATIONCOUNTS']._serialized_end=505
+  _globals['_REGIONCOUNTS']._serialized_start=507
+  _globals['_REGIONCOUNTS']._serialized_end=608
+  _globals['_AGGREGATEREPLY']._serialized_start=611
+  _globals['_AGGREGATEREPLY']._serialized_end=821
+  _globals['_STATS']._serialized_start=823
+  _globals['_STATS']._serialized_end=909
+# @@protoc_insertion_point(module_scope)
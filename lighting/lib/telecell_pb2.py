@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: telecell.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'telecell.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from . import location_pb2 as location__pb2
+from . import change_pb2 as change__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+from . import element_pb2 as element__pb2
+from . import basestation_pb2 as basestation__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0etelecell.proto\x12\x11lighting.telecell\x1a\x0elocation.proto\x1a\x0c\x63hange.proto\x1a google/protobuf/field_mask.proto\x1a\x1fgoogle/protobuf/timestamp.proto\x1a\relement.proto\x1a\x11\x62\x61sestation.proto\"\xa2\x01\n\x0bListRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x0e\n\x06offset\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\x12\x31\n\rupdated_since\x18\x05 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\x94\x01\n\tListReply\x12+\n\ttelecells\x18\x01 \x03(\x0b\x32\x18.lighting.telecell.Reply\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x12\n\npruned_ids\x18\x03 \x03(\x05\x12-\n\tsynced_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"e\n\x07Request\x12\x0c\n\x02id\x18\x01 \x01(\x05H\x00\x12\x0e\n\x04uuid\x18\x02 \x01(\x05H\x00\x12-\n\tread_mask\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMaskB\r\n\x0btelecell_id\"\xca\x02\n\x05Reply\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04uuid\x18\x02 \x01(\x03\x12\r\n\x05relay\x18\x03 \x01(\x08\x12\x30\n\x0b\x62\x61sestation\x18\x04 \x01(\x0b\x32\x1b.lighting.basestation.Reply\x12\x31\n\x06status\x18\x05 \x01(\x0e\x32!.lighting.telecell.ActivityStatus\x12.\n\nupdated_at\x18\x06 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12)\n\x08\x65lements\x18\x07 \x03(\x0b\x32\x17.lighting.element.Reply\x12\x15\n\x0bno_location\x18\x0e \x01(\x08H\x00\x12/\n\x08location\x18\x0f \x01(\x0b\x32\x1b.lighting.location.LocationH\x00\x42\x10\n\x0elocation_oneof\"v\n\x0f\x42ulkCreateReply\x12+\n\ttelecells\x18\x01 \x03(\x0b\x32\x18.lighting.telecell.Reply\x12\x36\n\x08\x66\x61ilures\x18\x02 \x03(\x0b\x32$.lighting.telecell.BulkCreateFailure\"@\n\x11\x42ulkCreateFailure\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x0c\n\x04uuid\x18\x02 \x01(\x03\x12\x0e\n\x06reason\x18\x03 \x01(\t\"\x7f\n\x0cStatusReport\x12\x0c\n\x04uuid\x18\x01 \x01(\x03\x12\x31\n\x06status\x18\x02 \x01(\x0e\x32!.lighting.telecell.ActivityStatus\x12.\n\nupdated_at\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"%\n\x11ReportStatusReply\x12\x10\n\x08received\x18\x01 \x01(\x05\"h\n\x0e\x45lementRequest\x12)\n\x05tc_id\x18\x01 \x01(\x0b\x32\x1a.lighting.telecell.Request\x12+\n\x08\x65lements\x18\x02 \x03(\x0b\x32\x19.lighting.element.Request\"I\n\tNeighbour\x12\x10\n\x08\x64istance\x18\x01 \x01(\x01\x12*\n\x08telecell\x18\x02 \x01(\x0b\x32\x18.lighting.telecell.Reply\"\x8f\x01\n\x06\x43hange\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12\x0e\n\x06\x62us_id\x18\x02 \x01(\t\x12\'\n\x06\x61\x63tion\x18\x03 \x01(\x0e\x32\x17.lighting.change.Action\x12*\n\x08telecell\x18\x04 \x01(\x0b\x32\x18.lighting.telecell.Reply\x12\x0e\n\x06resync\x18\x05 \x01(\x08*H\n\x0e\x41\x63tivityStatus\x12\x0f\n\x0bUNAVAILABLE\x10\x00\x12\n\n\x06\x41\x43TIVE\x10\x01\x12\x0c\n\x08INACTIVE\x10\x02\x12\x0b\n\x07\x44\x45LETED\x10\x0f\x32\xae\x08\n\x08Telecell\x12;\n\x03Get\x12\x1a.lighting.telecell.Request\x1a\x18.lighting.telecell.Reply\x12\x46\n\x04List\x12\x1e.lighting.telecell.ListRequest\x1a\x1c.lighting.telecell.ListReply0\x01\x12Z\n\x10SearchByLocation\x12*.lighting.location.FilterByLocationRequest\x1a\x18.lighting.telecell.Reply0\x01\x12\x65\n\x17SearchByLocationBatched\x12*.lighting.location.FilterByLocationRequest\x1a\x1c.lighting.telecell.ListReply0\x01\x12R\n\rSearchNearest\x12!.lighting.location.NearestRequest\x1a\x1c.lighting.telecell.Neighbour0\x01\x12<\n\x06\x43reate\x12\x18.lighting.telecell.Reply\x1a\x18.lighting.telecell.Reply\x12L\n\nBulkCreate\x12\x18.lighting.telecell.Reply\x1a\".lighting.telecell.BulkCreateReply(\x01\x12<\n\x06Update\x12\x18.lighting.telecell.Reply\x1a\x18.lighting.telecell.Reply\x12>\n\x06\x44\x65lete\x12\x1a.lighting.telecell.Request\x1a\x18.lighting.telecell.Reply\x12=\n\x05Prune\x12\x1a.lighting.telecell.Request\x1a\x18.lighting.telecell.Reply\x12L\n\rAddToElements\x12!.lighting.telecell.ElementRequest\x1a\x18.lighting.telecell.Reply\x12Q\n\x12RemoveFromElements\x12!.lighting.telecell.ElementRequest\x1a\x18.lighting.telecell.Reply\x12W\n\x0cReportStatus\x12\x1f.lighting.telecell.StatusReport\x1a$.lighting.telecell.ReportStatusReply(\x01\x12\x43\n\x05Watch\x12\x1d.lighting.change.WatchRequest\x1a\x19.lighting.telecell.Change0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'telecell_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ACTIVITYSTATUS']._serialized_start=1601
+  _globals['_ACTIVITYSTATUS']._serialized_end=1673
+  _globals['_LISTREQUEST']._serialized_start=169
+  _globals['_LISTREQUEST']._serialized_end=331
+  _globals['_LISTREPLY']._serialized_start=334
+  _globals['_LISTREPLY']._serialized_end=482
+  _globals['_REQUEST']._serialized_start=484
+  _globals['_REQUEST']._serialized_end=585
+  _globals['_REPLY']._serialized_start=588
+  _globals['_REPLY']._serialized_end=918
+  _globals['_BULKCREATEREPLY']._serialized_start=920
+  _globals['_BULKCREATEREPLY']._serialized_end=1038
+  _globals['_BULKCREATEFAILURE']._serialized_start=1040
+  _globals['_BULKCREATEFAILURE']._serialized_end=1104
+  _globals['_STATUSREPORT']._serialized_start=1106
+  _globals['_STATUSREPORT']._serialized_end=1233
+  _globals['_REPORTSTATUSREPLY']._serialized_start=1235
+  _globals['_REPORTSTATUSREPLY']._serialized_end=1272
+  _globals['_ELEMENTREQUEST']._serialized_start=1274
+  _globals['_ELEMENTREQUEST']._serialized_end=1378
+  _globals['_NEIGHBOUR']._serialized_start=1380
+  _globals['_NEIGHBOUR']._serialized_end=1453
+  _globals['_CHANGE']._serialized_start=1456
+  _globals['_CHANGE']._serialized_end=1599
+  _globals['_TELECELL']._serialized_start=1676
+  _globals['_TELECELL']._serialized_end=2746
+# @@protoc_insertion_point(module_scope)
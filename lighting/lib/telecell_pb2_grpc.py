@@ -0,0 +1,667 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from . import change_pb2 as change__pb2
+from . import location_pb2 as location__pb2
+from . import telecell_pb2 as telecell__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in telecell_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class TelecellStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Get = channel.unary_unary(
+                '/lighting.telecell.Telecell/Get',
+                request_serializer=telecell__pb2.Request.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.List = channel.unary_stream(
+                '/lighting.telecell.Telecell/List',
+                request_serializer=telecell__pb2.ListRequest.SerializeToString,
+                response_deserializer=telecell__pb2.ListReply.FromString,
+                _registered_method=True)
+        self.SearchByLocation = channel.unary_stream(
+                '/lighting.telecell.Telecell/SearchByLocation',
+                request_serializer=location__pb2.FilterByLocationRequest.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.SearchByLocationBatched = channel.unary_stream(
+                '/lighting.telecell.Telecell/SearchByLocationBatched',
+                request_serializer=location__pb2.FilterByLocationRequest.SerializeToString,
+                response_deserializer=telecell__pb2.ListReply.FromString,
+                _registered_method=True)
+        self.SearchNearest = channel.unary_stream(
+                '/lighting.telecell.Telecell/SearchNearest',
+                request_serializer=location__pb2.NearestRequest.SerializeToString,
+                response_deserializer=telecell__pb2.Neighbour.FromString,
+                _registered_method=True)
+        self.Create = channel.unary_unary(
+                '/lighting.telecell.Telecell/Create',
+                request_serializer=telecell__pb2.Reply.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.BulkCreate = channel.stream_unary(
+                '/lighting.telecell.Telecell/BulkCreate',
+                request_serializer=telecell__pb2.Reply.SerializeToString,
+                response_deserializer=telecell__pb2.BulkCreateReply.FromString,
+                _registered_method=True)
+        self.Update = channel.unary_unary(
+                '/lighting.telecell.Telecell/Update',
+                request_serializer=telecell__pb2.Reply.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.Delete = channel.unary_unary(
+                '/lighting.telecell.Telecell/Delete',
+                request_serializer=telecell__pb2.Request.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.Prune = channel.unary_unary(
+                '/lighting.telecell.Telecell/Prune',
+                request_serializer=telecell__pb2.Request.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.AddToElements = channel.unary_unary(
+                '/lighting.telecell.Telecell/AddToElements',
+                request_serializer=telecell__pb2.ElementRequest.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.RemoveFromElements = channel.unary_unary(
+                '/lighting.telecell.Telecell/RemoveFromElements',
+                request_serializer=telecell__pb2.ElementRequest.SerializeToString,
+                response_deserializer=telecell__pb2.Reply.FromString,
+                _registered_method=True)
+        self.ReportStatus = channel.stream_unary(
+                '/lighting.telecell.Telecell/ReportStatus',
+                request_serializer=telecell__pb2.StatusReport.SerializeToString,
+                response_deserializer=telecell__pb2.ReportStatusReply.FromString,
+                _registered_method=True)
+        self.Watch = channel.unary_stream(
+                '/lighting.telecell.Telecell/Watch',
+                request_serializer=change__pb2.WatchRequest.SerializeToString,
+                response_deserializer=telecell__pb2.Change.FromString,
+                _registered_method=True)
+
+
+class TelecellServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def Get(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def List(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchByLocation(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchByLocationBatched(self, request, context):
+        """same as SearchByLocation, but packs as many results as fit in the server's size budget into each message.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchNearest(self, request, context):
+        """streams the telecells closest to a location (as the crow flies), nearest first. Answered from the server's
+        location index, so only the telecells found are loaded from the DB.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Create(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BulkCreate(self, request_iterator, context):
+        """creates many telecells from one stream, committing them in batches. Basestations and elements are ignored, as
+        with Create.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Update(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Delete(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Prune(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AddToElements(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RemoveFromElements(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReportStatus(self, request_iterator, context):
+        """takes in status reports for as long as the stream is kept open. Reports are written to the DB in batches, and
+        all of them have been written by the time the reply is sent - except ones older than the telecell's status.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Watch(self, request, context):
+        """streams changes made to telecells from now on, or from after_sequence. Changes are only sent for writes made
+        through the server process serving the stream.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_TelecellServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Get': grpc.unary_unary_rpc_method_handler(
+                    servicer.Get,
+                    request_deserializer=telecell__pb2.Request.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'List': grpc.unary_stream_rpc_method_handler(
+                    servicer.List,
+                    request_deserializer=telecell__pb2.ListRequest.FromString,
+                    response_serializer=telecell__pb2.ListReply.SerializeToString,
+            ),
+            'SearchByLocation': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchByLocation,
+                    request_deserializer=location__pb2.FilterByLocationRequest.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'SearchByLocationBatched': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchByLocationBatched,
+                    request_deserializer=location__pb2.FilterByLocationRequest.FromString,
+                    response_serializer=telecell__pb2.ListReply.SerializeToString,
+            ),
+            'SearchNearest': grpc.unary_stream_rpc_method_handler(
+                    servicer.SearchNearest,
+                    request_deserializer=location__pb2.NearestRequest.FromString,
+                    response_serializer=telecell__pb2.Neighbour.SerializeToString,
+            ),
+            'Create': grpc.unary_unary_rpc_method_handler(
+                    servicer.Create,
+                    request_deserializer=telecell__pb2.Reply.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'BulkCreate': grpc.stream_unary_rpc_method_handler(
+                    servicer.BulkCreate,
+                    request_deserializer=telecell__pb2.Reply.FromString,
+                    response_serializer=telecell__pb2.BulkCreateReply.SerializeToString,
+            ),
+            'Update': grpc.unary_unary_rpc_method_handler(
+                    servicer.Update,
+                    request_deserializer=telecell__pb2.Reply.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'Delete': grpc.unary_unary_rpc_method_handler(
+                    servicer.Delete,
+                    request_deserializer=telecell__pb2.Request.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'Prune': grpc.unary_unary_rpc_method_handler(
+                    servicer.Prune,
+                    request_deserializer=telecell__pb2.Request.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'AddToElements': grpc.unary_unary_rpc_method_handler(
+                    servicer.AddToElements,
+                    request_deserializer=telecell__pb2.ElementRequest.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'RemoveFromElements': grpc.unary_unary_rpc_method_handler(
+                    servicer.RemoveFromElements,
+                    request_deserializer=telecell__pb2.ElementRequest.FromString,
+                    response_serializer=telecell__pb2.Reply.SerializeToString,
+            ),
+            'ReportStatus': grpc.stream_unary_rpc_method_handler(
+                    servicer.ReportStatus,
+                    request_deserializer=telecell__pb2.StatusReport.FromString,
+                    response_serializer=telecell__pb2.ReportStatusReply.SerializeToString,
+            ),
+            'Watch': grpc.unary_stream_rpc_method_handler(
+                    servicer.Watch,
+                    request_deserializer=change__pb2.WatchRequest.FromString,
+                    response_serializer=telecell__pb2.Change.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'lighting.telecell.Telecell', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('lighting.telecell.Telecell', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Telecell:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def Get(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/Get',
+            telecell__pb2.Request.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def List(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.telecell.Telecell/List',
+            telecell__pb2.ListRequest.SerializeToString,
+            telecell__pb2.ListReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchByLocation(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.telecell.Telecell/SearchByLocation',
+            location__pb2.FilterByLocationRequest.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchByLocationBatched(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.telecell.Telecell/SearchByLocationBatched',
+            location__pb2.FilterByLocationRequest.SerializeToString,
+            telecell__pb2.ListReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchNearest(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.telecell.Telecell/SearchNearest',
+            location__pb2.NearestRequest.SerializeToString,
+            telecell__pb2.Neighbour.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Create(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/Create',
+            telecell__pb2.Reply.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BulkCreate(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/lighting.telecell.Telecell/BulkCreate',
+            telecell__pb2.Reply.SerializeToString,
+            telecell__pb2.BulkCreateReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Update(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/Update',
+            telecell__pb2.Reply.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Delete(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/Delete',
+            telecell__pb2.Request.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Prune(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/Prune',
+            telecell__pb2.Request.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AddToElements(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/AddToElements',
+            telecell__pb2.ElementRequest.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RemoveFromElements(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/lighting.telecell.Telecell/RemoveFromElements',
+            telecell__pb2.ElementRequest.SerializeToString,
+            telecell__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReportStatus(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/lighting.telecell.Telecell/ReportStatus',
+            telecell__pb2.StatusReport.SerializeToString,
+            telecell__pb2.ReportStatusReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Watch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/lighting.telecell.Telecell/Watch',
+            change__pb2.WatchRequest.SerializeToString,
+            telecell__pb2.Change.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: user.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'user.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nuser.proto\x12\x04user\x1a\x1fgoogle/protobuf/timestamp.proto\"3\n\x07Request\x12\x0c\n\x02id\x18\x01 \x01(\x05H\x00\x12\x12\n\x08username\x18\x02 \x01(\tH\x00\x42\x06\n\x04user\"\x81\x01\n\x05Reply\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x13\n\x0bhashed_pass\x18\x03 \x01(\t\x12\x18\n\x04role\x18\x04 \x01(\x0e\x32\n.user.Role\x12+\n\x07\x63reated\x18\x05 \x01(\x0b\x32\x1a.google.protobuf.Timestamp*B\n\x04Role\x12\x0f\n\x0bUNAVAILABLE\x10\x00\x12\t\n\x05\x41\x44MIN\x10\x02\x12\x07\n\x03\x44\x45V\x10\x04\x12\x0b\n\x07MANAGER\x10\x06\x12\x08\n\x04USER\x10\x08\x32\x97\x01\n\x04User\x12!\n\x03Get\x12\r.user.Request\x1a\x0b.user.Reply\x12\"\n\x06\x43reate\x12\x0b.user.Reply\x1a\x0b.user.Reply\x12\"\n\x06Update\x12\x0b.user.Reply\x1a\x0b.user.Reply\x12$\n\x06\x44\x65lete\x12\r.user.Request\x1a\x0b.user.Replyb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'user_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_ROLE']._serialized_start=238
+  _globals['_ROLE']._serialized_end=304
+  _globals['_REQUEST']._serialized_start=53
+  _globals['_REQUEST']._serialized_end=104
+  _globals['_REPLY']._serialized_start=107
+  _globals['_REPLY']._serialized_end=236
+  _globals['_USER']._serialized_start=307
+  _globals['_USER']._serialized_end=458
+# @@protoc_insertion_point(module_scope)
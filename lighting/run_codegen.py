@@ -27,8 +27,11 @@ if __name__ == "__main__":
         '--grpc_python_out={}'.format(generated_files_outdir),
         '../protos/asset.proto',
         '../protos/basestation.proto',
+        '../protos/change.proto',
         '../protos/element.proto',
+        '../protos/history.proto',
         '../protos/location.proto',
+        '../protos/stats.proto',
         '../protos/telecell.proto',
         '../protos/user.proto'
     ))
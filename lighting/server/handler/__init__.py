@@ -1,5 +1,7 @@
 from .asset import AssetHandler
 from .basestation import BasestationHandler
 from .element import ElementHandler
+from .history import HistoryHandler
+from .stats import StatsHandler
 from .telecell import TelecellHandler
 from .user import UserHandler
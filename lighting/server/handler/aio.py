@@ -0,0 +1,588 @@
+"""
+Servicers for the asyncio server (lighting/server/server.py::serve_async).
+
+Each one extends the threaded handler of its service, and reimplements the read RPCs (Get, List, SearchByLocation and
+SearchByLocationBatched) as coroutines over an async DB engine, so that thousands of them can be in flight at once on a
+single event loop. Watch streams are coroutines too, so they don't hold a thread each while waiting for changes. All
+other RPCs are inherited as they are, and grpc.aio runs them on its migration thread pool with the usual thread-local
+DB session.
+"""
+from sqlalchemy import select
+
+import lighting.lib.asset_pb2 as asset_pb2
+import lighting.lib.basestation_pb2 as bs_pb2
+import lighting.lib.element_pb2 as element_pb2
+import lighting.lib.telecell_pb2 as tc_pb2
+import lighting.lib.user_pb2 as user_pb2
+from dbHandler import Asset, Basestation, Element, Telecell, User
+from .asset import AssetHandler
+from .basestation import BasestationHandler
+from .batching import batch_by_size_async
+from .cache import reply_cache, asset_tags
+from .changes import watch_async
+from .delta import delta_async
+from .element import ElementHandler
+from .masks import FULL, ReadMask, read_mask_async
+from .pagination import paginate_async
+from .spatial import bounding_box, chunks, neighbours
+from .telecell import TelecellHandler
+from .user import UserHandler
+
+
+class AsyncAssetHandler(AssetHandler):
+
+    def __init__(self, async_db, **kwargs):
+        """
+        :param async_db: factory of AsyncSessions, from dbHandler.base.create_async_session_factory.
+        """
+
+        super().__init__(**kwargs)
+        self.async_db = async_db
+        return
+
+    async def Get(self, request, context):
+        self.logger.info("Request Asset with ID of {}".format(request.id))
+
+        mask = await read_mask_async(request, asset_pb2.Reply.DESCRIPTOR, context)
+        key = ("asset", "id", request.id)
+
+        # only complete replies are cached
+        if mask.is_full:
+            asset_reply = reply_cache.get(key)
+
+            if asset_reply is not None:
+                return asset_reply
+
+        generation = reply_cache.generation
+
+        async with self.async_db() as session:
+            asset = await session.get(Asset, request.id, options=self.load_options(mask))
+
+        # if no asset found
+        if not asset:
+            return asset_pb2.Reply()
+
+        asset_reply = self.prepare_asset_message(asset, mask)
+
+        if mask.is_full:
+            reply_cache.put([key], asset_reply, generation=generation)
+
+        return asset_reply
+
+    async def List(self, request, context):
+        self.logger.info("Request list of {} Assets, offset by {}, page token {!r}"
+                         .format(request.limit, request.offset, request.page_token))
+
+        mask = await read_mask_async(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        async with self.async_db() as session:
+            statement = select(Asset).options(*self.load_options(mask))
+            delta_sync = await delta_async(session, "asset", request, context)
+
+            if delta_sync:
+                statement = statement.where(Asset.changed_at >= delta_sync.since)
+
+            lists = paginate_async(session, statement, Asset.id, request, context, self.MAX_LIST_SIZE)
+
+            async for assets, next_page_token in lists:
+                reply_list = asset_pb2.ListReply(next_page_token=next_page_token)
+                reply_list.assets.extend([self.prepare_asset_message(asset, mask) for asset in assets])
+
+                if delta_sync:
+                    delta_sync.fill(reply_list)
+
+                # as in the threaded handlers, the connection is free while the chunk is streamed
+                await session.commit()
+
+                yield reply_list
+
+            if delta_sync and not delta_sync.sent:
+                yield delta_sync.fill(asset_pb2.ListReply())
+
+    async def SearchByLocation(self, request, context):
+        mask = await read_mask_async(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        async for asset_reply in self.search_by_location_async(request, mask):
+            yield asset_reply
+
+    async def SearchByLocationBatched(self, request, context):
+        mask = await read_mask_async(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        async for replies in batch_by_size_async(self.search_by_location_async(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = asset_pb2.ListReply()
+            reply_list.assets.extend(replies)
+
+            yield reply_list
+
+    async def SearchNearest(self, request, context):
+        mask = await read_mask_async(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        async for distance, asset_reply in self.search_nearest_async(request, mask):
+            yield asset_pb2.Neighbour(distance=distance, asset=asset_reply)
+
+    async def Watch(self, request, context):
+        self.logger.info("Watch Assets from sequence {}".format(request.after_sequence))
+
+        async for change in watch_async("asset", request, context, asset_pb2.Change):
+            yield change
+
+    async def search_by_location_async(self, request, mask: ReadMask = FULL):
+        left, bottom, right, top = bounding_box(request.rectangle)
+        self.logger.info("Request for Assets in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
+
+        async with self.async_db() as session:
+            for ids in chunks(self.index.search(left, bottom, right, top), self.MAX_LIST_SIZE):
+                result = await session.execute(select(Asset)
+                                               .options(*self.load_options(mask))
+                                               .where(Asset.id.in_(ids))
+                                               .order_by(Asset.id))
+
+                for asset in result.scalars().all():
+                    yield self.prepare_asset_message(asset, mask)
+
+    async def search_nearest_async(self, request, mask: ReadMask = FULL):
+        found = neighbours(self.index, request)
+        self.logger.info("Request for Assets nearest to ({}, {}): found {}"
+                         .format(request.location.lat, request.location.long, len(found)))
+
+        async with self.async_db() as session:
+            for nearest in chunks(found, self.MAX_LIST_SIZE):
+                result = await session.execute(select(Asset)
+                                               .options(*self.load_options(mask))
+                                               .where(Asset.id.in_([row_id for _, row_id in nearest])))
+                loaded = {asset.id: asset for asset in result.scalars().all()}
+
+                for distance, row_id in nearest:
+                    if row_id in loaded:
+                        yield distance, self.prepare_asset_message(loaded[row_id], mask)
+
+
+class AsyncElementHandler(ElementHandler):
+
+    def __init__(self, async_db, **kwargs):
+        """
+        :param async_db: factory of AsyncSessions, from dbHandler.base.create_async_session_factory.
+        """
+
+        super().__init__(**kwargs)
+        self.async_db = async_db
+        return
+
+    async def Get(self, request, context):
+        self.logger.info("Request Element with ID of {}".format(request.id))
+
+        mask = await read_mask_async(request, element_pb2.Reply.DESCRIPTOR, context)
+        key = ("element", "id", request.id)
+
+        # only complete replies are cached
+        if mask.is_full:
+            element_reply = reply_cache.get(key)
+
+            if element_reply is not None:
+                return element_reply
+
+        generation = reply_cache.generation
+
+        async with self.async_db() as session:
+            element = await session.get(Element, request.id, options=self.load_options(mask))
+
+        # if no element found
+        if not element:
+            context.set_details("Element {} not found in system.".format(request.id))
+            return element_pb2.Reply()
+
+        element_reply = self.prepare_element_message(element, mask)
+
+        if mask.is_full:
+            reply_cache.put([key], element_reply, tags=asset_tags([element.asset_id]), generation=generation)
+
+        return element_reply
+
+    async def List(self, request, context):
+        self.logger.info("Request list of {} Elements, offset by {}, page token {!r}"
+                         .format(request.limit, request.offset, request.page_token))
+
+        mask = await read_mask_async(request, element_pb2.Reply.DESCRIPTOR, context)
+
+        async with self.async_db() as session:
+            statement = select(Element).options(*self.load_options(mask))
+            delta_sync = await delta_async(session, "element", request, context)
+
+            if delta_sync:
+                statement = statement.where(Element.changed_at >= delta_sync.since)
+
+            lists = paginate_async(session, statement, Element.id, request, context, self.MAX_LIST_SIZE)
+
+            async for elements, next_page_token in lists:
+                reply_list = element_pb2.ListReply(next_page_token=next_page_token)
+                reply_list.elements.extend([self.prepare_element_message(element, mask) for element in elements])
+
+                if delta_sync:
+                    delta_sync.fill(reply_list)
+
+                # as in the threaded handlers, the connection is free while the chunk is streamed
+                await session.commit()
+
+                yield reply_list
+
+            if delta_sync and not delta_sync.sent:
+                yield delta_sync.fill(element_pb2.ListReply())
+
+    async def SearchByLocation(self, request, context):
+        mask = await read_mask_async(request, element_pb2.Reply.DESCRIPTOR, context)
+
+        async for element_reply in self.search_by_location_async(request, mask):
+            yield element_reply
+
+    async def SearchByLocationBatched(self, request, context):
+        mask = await read_mask_async(request, element_pb2.Reply.DESCRIPTOR, context)
+
+        async for replies in batch_by_size_async(self.search_by_location_async(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = element_pb2.ListReply()
+            reply_list.elements.extend(replies)
+
+            yield reply_list
+
+    async def Watch(self, request, context):
+        self.logger.info("Watch Elements from sequence {}".format(request.after_sequence))
+
+        async for change in watch_async("element", request, context, element_pb2.Change):
+            yield change
+
+    async def search_by_location_async(self, request, mask: ReadMask = FULL):
+        left, bottom, right, top = bounding_box(request.rectangle)
+        self.logger.info("Request for Elements in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
+
+        async with self.async_db() as session:
+            for ids in chunks(self.asset_index.search(left, bottom, right, top), self.MAX_LIST_SIZE):
+                result = await session.execute(select(Element)
+                                               .options(*self.load_options(mask))
+                                               .where(Element.asset_id.in_(ids))
+                                               .order_by(Element.id))
+
+                for element in result.scalars().all():
+                    yield self.prepare_element_message(element, mask)
+
+
+class AsyncTelecellHandler(TelecellHandler):
+
+    def __init__(self, async_db, **kwargs):
+        """
+        :param async_db: factory of AsyncSessions, from dbHandler.base.create_async_session_factory.
+        """
+
+        super().__init__(**kwargs)
+        self.async_db = async_db
+        return
+
+    async def Get(self, request, context):
+        if not request.id and not request.uuid:
+            message = "Need to provide Telecell ID or UUID for this RPC."
+            self.logger.warn(message)
+            context.set_details(message)
+            return tc_pb2.Reply(no_location=True)
+
+        mask = await read_mask_async(request, tc_pb2.Reply.DESCRIPTOR, context)
+        key = ("telecell", "id", request.id) if request.id else ("telecell", "uuid", request.uuid)
+
+        # only complete replies are cached
+        if mask.is_full:
+            tc_reply = reply_cache.get(key)
+
+            if tc_reply is not None:
+                return tc_reply
+
+        generation = reply_cache.generation
+
+        async with self.async_db() as session:
+            if request.id:
+                tc = await session.get(Telecell, request.id, options=self.load_options(mask))
+
+            else:
+                result = await session.execute(select(Telecell)
+                                               .options(*self.load_options(mask))
+                                               .where(Telecell.uuid == request.uuid))
+                tc = result.scalars().first()
+
+        if not tc:
+            message = "Telecell with {}: {} not found." \
+                .format("ID" if request.id else "UUID",
+                        request.id or request.uuid)
+
+            self.logger.warn(message)
+            context.set_details(message)
+            return tc_pb2.Reply(no_location=True)
+
+        tc_reply = self.prepare_telecell_message(tc, mask)
+
+        if mask.is_full:
+            reply_cache.put([("telecell", "id", tc.id), ("telecell", "uuid", tc.uuid)], tc_reply,
+                            tags=self.embedded_tags(tc), generation=generation)
+
+        return tc_reply
+
+    async def List(self, request, context):
+        mask = await read_mask_async(request, tc_pb2.Reply.DESCRIPTOR, context)
+
+        async with self.async_db() as session:
+            statement = select(Telecell).options(*self.load_options(mask))
+            delta_sync = await delta_async(session, "telecell", request, context)
+
+            if delta_sync:
+                statement = statement.where(Telecell.changed_at >= delta_sync.since)
+
+            lists = paginate_async(session, statement, Telecell.id, request, context, self.MAX_LIST_SIZE)
+
+            async for telecells, next_page_token in lists:
+                tc_reply_list = tc_pb2.ListReply(next_page_token=next_page_token)
+                tc_reply_list.telecells.extend([self.prepare_telecell_message(tc, mask) for tc in telecells])
+
+                if delta_sync:
+                    delta_sync.fill(tc_reply_list)
+
+                # as in the threaded handlers, the connection is free while the chunk is streamed
+                await session.commit()
+
+                yield tc_reply_list
+
+            if delta_sync and not delta_sync.sent:
+                yield delta_sync.fill(tc_pb2.ListReply())
+
+    async def SearchByLocation(self, request, context):
+        mask = await read_mask_async(request, tc_pb2.Reply.DESCRIPTOR, context)
+
+        async for tc_reply in self.search_by_location_async(request, mask):
+            yield tc_reply
+
+    async def SearchByLocationBatched(self, request, context):
+        mask = await read_mask_async(request, tc_pb2.Reply.DESCRIPTOR, context)
+
+        async for replies in batch_by_size_async(self.search_by_location_async(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = tc_pb2.ListReply()
+            reply_list.telecells.extend(replies)
+
+            yield reply_list
+
+    async def SearchNearest(self, request, context):
+        mask = await read_mask_async(request, tc_pb2.Reply.DESCRIPTOR, context)
+
+        async for distance, tc_reply in self.search_nearest_async(request, mask):
+            yield tc_pb2.Neighbour(distance=distance, telecell=tc_reply)
+
+    async def Watch(self, request, context):
+        self.logger.info("Watch Telecells from sequence {}".format(request.after_sequence))
+
+        async for change in watch_async("telecell", request, context, tc_pb2.Change):
+            yield change
+
+    async def search_by_location_async(self, request, mask: ReadMask = FULL):
+        left, bottom, right, top = bounding_box(request.rectangle)
+        self.logger.info(
+            "Request for Telecells in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
+
+        async with self.async_db() as session:
+            for ids in chunks(self.index.search(left, bottom, right, top), self.MAX_LIST_SIZE):
+                result = await session.execute(select(Telecell)
+                                               .options(*self.load_options(mask))
+                                               .where(Telecell.id.in_(ids))
+                                               .order_by(Telecell.id))
+
+                for tc in result.scalars().all():
+                    yield self.prepare_telecell_message(tc, mask)
+
+    async def search_nearest_async(self, request, mask: ReadMask = FULL):
+        found = neighbours(self.index, request)
+        self.logger.info("Request for Telecells nearest to ({}, {}): found {}"
+                         .format(request.location.lat, request.location.long, len(found)))
+
+        async with self.async_db() as session:
+            for nearest in chunks(found, self.MAX_LIST_SIZE):
+                result = await session.execute(select(Telecell)
+                                               .options(*self.load_options(mask))
+                                               .where(Telecell.id.in_([row_id for _, row_id in nearest])))
+                loaded = {tc.id: tc for tc in result.scalars().all()}
+
+                for distance, row_id in nearest:
+                    if row_id in loaded:
+                        yield distance, self.prepare_telecell_message(loaded[row_id], mask)
+
+
+class AsyncBasestationHandler(BasestationHandler):
+
+    def __init__(self, async_db, **kwargs):
+        """
+        :param async_db: factory of AsyncSessions, from dbHandler.base.create_async_session_factory.
+        """
+
+        super().__init__(**kwargs)
+        self.async_db = async_db
+        return
+
+    async def Get(self, request, context):
+        if not request.id and not request.uuid:
+            message = "Need to provide Basestation ID or UUID for this RPC."
+            self.logger.info(message)
+            context.set_details(message)
+            return bs_pb2.Reply(no_location=True)
+
+        mask = await read_mask_async(request, bs_pb2.Reply.DESCRIPTOR, context)
+        key = ("basestation", "id", request.id) if request.id else ("basestation", "uuid", request.uuid)
+
+        # only complete replies are cached
+        if mask.is_full:
+            bs_reply = reply_cache.get(key)
+
+            if bs_reply is not None:
+                return bs_reply
+
+        generation = reply_cache.generation
+
+        async with self.async_db() as session:
+            if request.id:
+                bs = await session.get(Basestation, request.id)
+
+            else:
+                result = await session.execute(select(Basestation).where(Basestation.uuid == request.uuid))
+                bs = result.scalars().first()
+
+        if not bs:
+            message = "Basestation with {}: {} not found." \
+                .format("ID" if request.id else "UUID",
+                        request.id or request.uuid)
+
+            self.logger.info(message)
+            context.set_details(message)
+            return bs_pb2.Reply(no_location=True)
+
+        bs_reply = self.prepare_basestation_message(bs, mask)
+
+        if mask.is_full:
+            reply_cache.put([("basestation", "id", bs.id), ("basestation", "uuid", bs.uuid)], bs_reply,
+                            generation=generation)
+
+        return bs_reply
+
+    async def List(self, request, context):
+        self.logger.info("Request list of {} Basestations, offset by {}, page token {!r}"
+                         .format(request.limit, request.offset, request.page_token))
+
+        mask = await read_mask_async(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        async with self.async_db() as session:
+            statement = select(Basestation)
+            delta_sync = await delta_async(session, "basestation", request, context)
+
+            if delta_sync:
+                statement = statement.where(Basestation.changed_at >= delta_sync.since)
+
+            lists = paginate_async(session, statement, Basestation.id, request, context, self.MAX_LIST_SIZE)
+
+            async for basestations, next_page_token in lists:
+                bs_reply_list = bs_pb2.ListReply(next_page_token=next_page_token)
+                bs_reply_list.basestations.extend([self.prepare_basestation_message(bs, mask) for bs in basestations])
+
+                if delta_sync:
+                    delta_sync.fill(bs_reply_list)
+
+                # as in the threaded handlers, the connection is free while the chunk is streamed
+                await session.commit()
+
+                yield bs_reply_list
+
+            if delta_sync and not delta_sync.sent:
+                yield delta_sync.fill(bs_pb2.ListReply())
+
+    async def SearchByLocation(self, request, context):
+        mask = await read_mask_async(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        async for bs_reply in self.search_by_location_async(request, mask):
+            yield bs_reply
+
+    async def SearchByLocationBatched(self, request, context):
+        mask = await read_mask_async(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        async for replies in batch_by_size_async(self.search_by_location_async(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = bs_pb2.ListReply()
+            reply_list.basestations.extend(replies)
+
+            yield reply_list
+
+    async def SearchNearest(self, request, context):
+        mask = await read_mask_async(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        async for distance, bs_reply in self.search_nearest_async(request, mask):
+            yield bs_pb2.Neighbour(distance=distance, basestation=bs_reply)
+
+    async def Watch(self, request, context):
+        self.logger.info("Watch Basestations from sequence {}".format(request.after_sequence))
+
+        async for change in watch_async("basestation", request, context, bs_pb2.Change):
+            yield change
+
+    async def search_by_location_async(self, request, mask: ReadMask = FULL):
+        left, bottom, right, top = bounding_box(request.rectangle)
+        self.logger.info(
+            "Request for Basestations in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
+
+        async with self.async_db() as session:
+            for ids in chunks(self.index.search(left, bottom, right, top), self.MAX_LIST_SIZE):
+                result = await session.execute(select(Basestation)
+                                               .where(Basestation.id.in_(ids))
+                                               .order_by(Basestation.id))
+
+                for basestation in result.scalars().all():
+                    yield self.prepare_basestation_message(basestation, mask)
+
+    async def search_nearest_async(self, request, mask: ReadMask = FULL):
+        found = neighbours(self.index, request)
+        self.logger.info("Request for Basestations nearest to ({}, {}): found {}"
+                         .format(request.location.lat, request.location.long, len(found)))
+
+        async with self.async_db() as session:
+            for nearest in chunks(found, self.MAX_LIST_SIZE):
+                result = await session.execute(select(Basestation)
+                                               .where(Basestation.id.in_([row_id for _, row_id in nearest])))
+                loaded = {basestation.id: basestation for basestation in result.scalars().all()}
+
+                for distance, row_id in nearest:
+                    if row_id in loaded:
+                        yield distance, self.prepare_basestation_message(loaded[row_id], mask)
+
+
+class AsyncUserHandler(UserHandler):
+
+    def __init__(self, async_db, **kwargs):
+        """
+        :param async_db: factory of AsyncSessions, from dbHandler.base.create_async_session_factory.
+        """
+
+        super().__init__(**kwargs)
+        self.async_db = async_db
+        return
+
+    async def Get(self, request, context):
+        async with self.async_db() as session:
+            if request.id:
+                user = await session.get(User, request.id)
+
+            elif request.username:
+                result = await session.execute(select(User).where(User.username == request.username))
+                user = result.scalars().first()
+
+            else:
+                user = None
+
+        if not user:
+            if request.id:
+                message = "Could not find User with ID {}".format(request.id)
+            elif request.username:
+                message = "Could not find User with username {}".format(request.username)
+            else:
+                message = "Expected to have User ID or username -- none passed in as params in procedure call."
+
+            self.logger.info(message)
+            context.set_details(message)
+            return user_pb2.Reply()
+
+        return self.prepare_user_message(user)
+
@@ -1,22 +1,63 @@
 import logging
 
-import sqlalchemy as db
-from sqlalchemy.orm import sessionmaker
+import grpc
+from sqlalchemy.orm import selectinload
 
 import lighting.lib.asset_pb2 as asset_pb2
 import lighting.lib.element_pb2 as element_pb2
+import lighting.lib.location_pb2 as location_pb2
 import lighting.lib.telecell_pb2 as telecell_pb2
-from dbHandler import Asset, engine
+from dbHandler import Asset, Element, Telecell, Session
 from lighting.lib.asset_pb2_grpc import AssetServicer
 from log import setup_logger
+from .batching import batch_by_size
+from .cache import reply_cache, asset_tags, element_tags, telecell_tags
+from .changes import CREATED, UPDATED, DELETED, PRUNED, change_bus, watch
+from .counters import element_keys, fleet_counters
+from .delta import delta, bury, touch
+from .masks import FULL, ReadMask, read_mask
+from .pagination import paginate
+from .spatial import SpatialIndex, bounding_box, chunks, neighbours
+from .statuslog import status_log
 
 
 class AssetHandler(AssetServicer):
     MAX_LIST_SIZE = 100
 
+    # size budget of each message streamed back by SearchByLocationBatched
+    MAX_BATCH_BYTES = 1 << 20
+
+    # assets soft deleted by each round of UPDATE statements
+    DELETE_CHUNK_SIZE = 1000
+
+    # most grid cells SearchClusters splits each side of a rectangle into, which bounds the size of its reply
+    MAX_CLUSTERS_PER_SIDE = 64
+
+    # cells per side of a web map tile, for SearchClusters requests that give a zoom level rather than a cell size
+    CLUSTERS_PER_TILE = 4
+
+    # fields of the assets published to Watch streams - none of which need relations to be loaded
+    CHANGE_MASK = ReadMask.from_paths(["id", "status", "location"])
+
     def __init__(self):
-        self.db = sessionmaker(bind=engine)()
+        # thread-local session, scoped to the RPC being served - see lighting/server/interceptors.py
+        self.db = Session
         self.logger = setup_logger("assetHandler", logging.DEBUG)
+
+        # locations and statuses of all assets, for SearchByLocation and SearchClusters
+        self.index = SpatialIndex()
+        self.load_index()
+        return
+
+    def load_index(self):
+        """
+        (Re)builds the location index from the DB.
+
+        :return:
+        """
+
+        self.index.load(self.db.query(Asset.id, Asset.longitude, Asset.latitude, Asset.status))
+        self.logger.debug("Indexed locations of {} Assets".format(len(self.index)))
         return
 
     def Get(self, request, context):
@@ -30,14 +71,29 @@ class AssetHandler(AssetServicer):
 
         self.logger.info("Request Asset with ID of {}".format(request.id))
 
-        asset = self.db.query(Asset).get(request.id)
+        mask = read_mask(request, asset_pb2.Reply.DESCRIPTOR, context)
+        key = ("asset", "id", request.id)
+
+        # only complete replies are cached
+        if mask.is_full:
+            asset_reply = reply_cache.get(key)
+
+            if asset_reply is not None:
+                return asset_reply
+
+        generation = reply_cache.generation
+
+        asset = self.db.query(Asset).options(*self.load_options(mask)).get(request.id)
 
         # if no asset found
         if not asset:
             return asset_pb2.Reply()
 
         # populate reply message
-        asset_reply = self.prepare_asset_message(asset)
+        asset_reply = self.prepare_asset_message(asset, mask)
+
+        if mask.is_full:
+            reply_cache.put([key], asset_reply, generation=generation)
 
         return asset_reply
 
@@ -52,30 +108,38 @@ class AssetHandler(AssetServicer):
         :return:
         """
 
-        self.logger.info("Request list of {} Assets, offset by {}".format(request.limit, request.offset))
-
-        assets = self.db.query(Asset)
+        self.logger.info("Request list of {} Assets, offset by {}, page token {!r}"
+                         .format(request.limit, request.offset, request.page_token))
 
-        if request.limit:
-            assets = assets.limit(request.limit)
+        mask = read_mask(request, asset_pb2.Reply.DESCRIPTOR, context)
+        query = self.db.query(Asset).options(*self.load_options(mask))
 
-        if request.offset:
-            assets = assets.offset(request.offset)
+        # with updated_since, only what changed since then
+        delta_sync = delta(self.db, "asset", request, context)
 
-        assets = assets.all()
+        if delta_sync:
+            query = query.filter(Asset.changed_at >= delta_sync.since)
 
-        replies = []
+        lists = paginate(query, Asset.id, request, context, self.MAX_LIST_SIZE)
 
-        for i, asset in enumerate(assets):
+        # each chunk is streamed as soon as it has been fetched and serialised
+        for assets, next_page_token in lists:
             # populate reply message
-            asset_reply = self.prepare_asset_message(asset)
-            replies.append(asset_reply)
+            reply_list = asset_pb2.ListReply(next_page_token=next_page_token)
+            reply_list.assets.extend([self.prepare_asset_message(asset, mask) for asset in assets])
+
+            if delta_sync:
+                delta_sync.fill(reply_list)
+
+            # end the read transaction before the chunk is streamed, so that its connection goes back to the pool
+            # while the client takes it - the next chunk is fetched in a new one
+            self.db.commit()
 
-            if len(replies) == self.MAX_LIST_SIZE or i == len(assets) - 1:
-                reply_list = asset_pb2.ListReply()
-                reply_list.assets.extend(replies)
-                replies = []
-                yield reply_list
+            yield reply_list
+
+        # nothing changed, but the client still gets the pruned IDs and synced_at
+        if delta_sync and not delta_sync.sent:
+            yield delta_sync.fill(asset_pb2.ListReply())
 
     def SearchByLocation(self, request, context):
         """
@@ -88,25 +152,140 @@ class AssetHandler(AssetServicer):
         :return:
         """
 
+        mask = read_mask(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        for asset_reply in self.search_by_location(request, mask):
+            # stream reply to client
+            yield asset_reply
+
+    def SearchByLocationBatched(self, request, context):
+        """
+        Search for assets based on a map rectangle, like SearchByLocation.
+
+        Rather than streaming back one message per asset, matches are packed into ListReply messages of up to
+        MAX_BATCH_BYTES each, which saves most of the per-message overhead on big map areas.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        for replies in batch_by_size(self.search_by_location(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = asset_pb2.ListReply()
+            reply_list.assets.extend(replies)
+
+            # stream
+            yield reply_list
+
+    def search_by_location(self, request, mask: ReadMask = FULL):
+        """
+        Finds everything inside the map rectangle of a FilterByLocationRequest.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of reply messages, one per match.
+        """
+
         # find the bounding box on the map
-        left = min(request.rectangle.lo.long, request.rectangle.hi.long)
-        right = max(request.rectangle.lo.long, request.rectangle.hi.long)
-        top = max(request.rectangle.lo.lat, request.rectangle.hi.lat)
-        bottom = min(request.rectangle.lo.lat, request.rectangle.hi.lat)
+        left, bottom, right, top = bounding_box(request.rectangle)
 
         self.logger.info("Request for Assets in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
 
-        # find assets in that fall in bounding box
-        assets = self.db.query(Asset) \
-            .filter(db.and_(Asset.longitude >= left, Asset.longitude <= right,
-                            Asset.latitude >= bottom, Asset.latitude <= top)) \
-            .all()
+        # find assets in that fall in bounding box, then load only those
+        asset_ids = self.index.search(left, bottom, right, top)
 
-        for asset in assets:
-            asset_reply = self.prepare_asset_message(asset)
+        for ids in chunks(asset_ids, self.MAX_LIST_SIZE):
+            assets = self.db.query(Asset) \
+                .options(*self.load_options(mask)) \
+                .filter(Asset.id.in_(ids)) \
+                .order_by(Asset.id) \
+                .all()
 
-            # stream reply to client
-            yield asset_reply
+            for asset in assets:
+                asset_reply = self.prepare_asset_message(asset, mask)
+
+                yield asset_reply
+
+    def SearchNearest(self, request, context):
+        """
+        Streams the assets closest to a location, nearest first, each with its distance in metres.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, asset_pb2.Reply.DESCRIPTOR, context)
+
+        for distance, asset_reply in self.search_nearest(request, mask):
+            yield asset_pb2.Neighbour(distance=distance, asset=asset_reply)
+
+    def search_nearest(self, request, mask: ReadMask = FULL):
+        """
+        Finds the assets closest to the location of a NearestRequest in the location index, then loads only those.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of (distance in metres, reply message), nearest first.
+        """
+
+        found = neighbours(self.index, request)
+
+        self.logger.info("Request for Assets nearest to ({}, {}): found {}"
+                         .format(request.location.lat, request.location.long, len(found)))
+
+        for nearest in chunks(found, self.MAX_LIST_SIZE):
+            assets = self.db.query(Asset) \
+                .options(*self.load_options(mask)) \
+                .filter(Asset.id.in_([row_id for _, row_id in nearest])) \
+                .all()
+            loaded = {asset.id: asset for asset in assets}
+
+            for distance, row_id in nearest:
+                # skip rows pruned since they were found
+                if row_id in loaded:
+                    yield distance, self.prepare_asset_message(loaded[row_id], mask)
+
+    def SearchClusters(self, request, context):
+        """
+        Groups the assets in a map rectangle by the square cells of a grid, with their centroid, number and statuses.
+
+        Cells are made bigger if the rectangle would span more than MAX_CLUSTERS_PER_SIDE of them either way, so the
+        reply never has more than MAX_CLUSTERS_PER_SIDE ** 2 clusters. Only the location index is searched.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        left, bottom, right, top = bounding_box(request.rectangle)
+
+        if request.cell_size < 0 or not 0 <= request.zoom <= 30:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                          "cell_size can't be negative, and zoom must be between 0 and 30")
+
+        cell_size = request.cell_size or 360 / 2 ** request.zoom / self.CLUSTERS_PER_TILE
+        cell_size = max(cell_size, (right - left) / self.MAX_CLUSTERS_PER_SIDE,
+                        (top - bottom) / self.MAX_CLUSTERS_PER_SIDE)
+
+        cell_size, clusters = self.index.cluster(left, bottom, right, top, cell_size)
+
+        self.logger.info("Request for Asset clusters in box between ({}, {}) and ({}, {}): {} clusters of {} degrees"
+                         .format(bottom, left, top, right, len(clusters), cell_size))
+
+        cluster_reply = location_pb2.ClusterReply(cell_size=cell_size)
+
+        for (x, y), cluster in sorted(clusters.items()):
+            longitude, latitude = cluster.centroid
+            cell = location_pb2.MapRect(lo=location_pb2.Location(long=x * cell_size, lat=y * cell_size),
+                                        hi=location_pb2.Location(long=(x + 1) * cell_size, lat=(y + 1) * cell_size))
+
+            cluster_reply.clusters.add(centroid=location_pb2.Location(long=longitude, lat=latitude),
+                                       count=cluster.count, cell=cell, statuses=cluster.statuses)
+
+        return cluster_reply
 
     def Create(self, request, context):
         """
@@ -128,6 +307,9 @@ class AssetHandler(AssetServicer):
         self.db.commit()
         self.db.refresh(asset)
 
+        self.index.insert(asset.id, asset.longitude, asset.latitude, asset.status)
+        self.publish_change(CREATED, asset)
+
         message = "Created Asset {} (status: {}). Note: no elements created/associated for/to this asset." \
             .format(asset.id, asset_pb2.ActivityStatus.Name(asset.status))
         self.logger.info(message)
@@ -157,6 +339,9 @@ class AssetHandler(AssetServicer):
             asset.status = request.status
 
         self.db.commit()
+        self.index.insert(asset.id, asset.longitude, asset.latitude, asset.status)
+        reply_cache.invalidate(*asset_tags([asset.id]))
+        self.publish_change(UPDATED, asset)
 
         message = "Updated {} (status: {}). Note: no elements associations modified for this asset." \
             .format(asset.id, asset_pb2.ActivityStatus.Name(asset.status))
@@ -180,42 +365,183 @@ class AssetHandler(AssetServicer):
         :return:
         """
 
-        deleted_asset = self.db.query(Asset).get(request.id)
-
-        # change status of affected asset
-        deleted_asset.status = asset_pb2.ActivityStatus.Value("DELETED")
-
-        deleted_elements = []
-        deleted_telecells = []
-
-        # Cascade soft deletes through chain of elements and telecells
-        if deleted_asset.elements:
-            for element in deleted_asset.elements:
-                element.status = element_pb2.ActivityStatus.Value("DELETED")
-                deleted_elements.append(element.id)
+        deleted_elements, deleted_telecells = self.soft_delete([request.id])
 
-                if element.telecell:
-                    element.telecell.status = telecell_pb2.ActivityStatus.Value("DELETED")
-                    deleted_telecells.append(element.telecell_id)
-
-        self.db.commit()
-        self.db.refresh(deleted_asset)
+        if request.id not in deleted_elements:
+            message = "Asset {} does not exist in system!".format(request.id)
+            context.set_details(message)
+            return asset_pb2.Reply()
 
         message = "Deleted Asset {}; Deleted Elements {}; Deleted Telecells {}" \
-            .format(deleted_asset.id,
-                    ", ".join(map(str, deleted_elements)),
+            .format(request.id,
+                    ", ".join(map(str, deleted_elements[request.id])),
                     ", ".join(map(str, deleted_telecells)))
 
         self.logger.info(message)
 
         # populate reply message
-        asset_reply = asset_pb2.Reply(id=deleted_asset.id,
-                                      status=deleted_asset.status)
-        asset_reply.element_uids.extend(deleted_elements)
+        asset_reply = asset_pb2.Reply(id=request.id,
+                                      status=asset_pb2.ActivityStatus.Value("DELETED"))
+        asset_reply.element_uids.extend(deleted_elements[request.id])
         context.set_details(message)
 
         return asset_reply
 
+    def DeleteMany(self, request, context):
+        """
+        Soft deletes many assets, cascading down to each element and TC associated to them, as Delete does.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        deleted_elements, deleted_telecells = self.soft_delete(request.ids)
+        not_found = sorted(set(request.ids).difference(deleted_elements))
+
+        message = "Deleted {} Assets, {} Elements and {} Telecells; {} Assets not found" \
+            .format(len(deleted_elements), sum(map(len, deleted_elements.values())), len(deleted_telecells),
+                    len(not_found))
+
+        self.logger.info(message)
+        context.set_details(message)
+
+        # populate reply message
+        delete_reply = asset_pb2.DeleteManyReply(telecell_ids=deleted_telecells, not_found=not_found)
+
+        for asset_id, element_ids in deleted_elements.items():
+            delete_reply.assets.add(id=asset_id, status=asset_pb2.ActivityStatus.Value("DELETED"),
+                                    element_uids=element_ids)
+
+        return delete_reply
+
+    def soft_delete(self, asset_ids) -> tuple:
+        """
+        Soft deletes assets, their elements, and the telecells connected to those elements, and commits.
+
+        Statuses are changed with set-based UPDATE statements, one per table for each DELETE_CHUNK_SIZE assets, rather
+        than loading and changing the rows one by one.
+
+        :param asset_ids:
+        :return: IDs of the elements of each asset deleted (i.e. of those that exist), by asset ID, and the sorted IDs
+            of the telecells deleted.
+        """
+
+        deleted_elements = {}
+        deleted_telecells = set()
+
+        # asset ID -> (longitude, latitude), and the elements deleted, for Watch streams and the fleet counters
+        locations = {}
+        elements_deleted = []
+
+        for ids in chunks(sorted(set(asset_ids)), self.DELETE_CHUNK_SIZE):
+            for asset_id, longitude, latitude in self.db.query(Asset.id, Asset.longitude, Asset.latitude) \
+                    .filter(Asset.id.in_(ids)):
+                deleted_elements[asset_id] = []
+                locations[asset_id] = (longitude, latitude)
+
+            found_ids = [asset_id for asset_id in ids if asset_id in deleted_elements]
+
+            if not found_ids:
+                continue
+
+            elements = self.db.query(Element.id, Element.asset_id, Element.telecell_id, Element.description,
+                                     Element.status, Telecell.bs_id) \
+                .outerjoin(Telecell, Element.telecell_id == Telecell.id) \
+                .filter(Element.asset_id.in_(found_ids)) \
+                .order_by(Element.id)
+
+            for element_id, asset_id, telecell_id, description, status, bs_id in elements:
+                deleted_elements[asset_id].append(element_id)
+                elements_deleted.append((element_id, asset_id, description, status, bs_id))
+
+                if telecell_id is not None:
+                    deleted_telecells.add(telecell_id)
+
+            self.db.query(Asset) \
+                .filter(Asset.id.in_(found_ids)) \
+                .update({Asset.status: asset_pb2.ActivityStatus.Value("DELETED")}, synchronize_session=False)
+
+            self.db.query(Element) \
+                .filter(Element.asset_id.in_(found_ids)) \
+                .update({Element.status: element_pb2.ActivityStatus.Value("DELETED")}, synchronize_session=False)
+
+        telecells_deleted = []
+        telecell_statuses = {}
+
+        for telecell_ids in chunks(sorted(deleted_telecells), self.DELETE_CHUNK_SIZE):
+            telecell_statuses.update(self.db.query(Telecell.id, Telecell.status).filter(Telecell.id.in_(telecell_ids)))
+
+            self.db.query(Telecell) \
+                .filter(Telecell.id.in_(telecell_ids)) \
+                .update({Telecell.status: telecell_pb2.ActivityStatus.Value("DELETED")}, synchronize_session=False)
+
+            telecells_deleted.extend(self.db.query(Telecell).filter(Telecell.id.in_(telecell_ids)))
+
+        self.db.commit()
+
+        for asset_id, (longitude, latitude) in locations.items():
+            self.index.insert(asset_id, longitude, latitude, asset_pb2.ActivityStatus.Value("DELETED"))
+
+        reply_cache.invalidate(*asset_tags(deleted_elements),
+                               *element_tags([element_id for ids in deleted_elements.values() for element_id in ids]),
+                               *telecell_tags(deleted_telecells))
+
+        self.publish_deleted(locations, elements_deleted, telecells_deleted, telecell_statuses)
+
+        return deleted_elements, sorted(deleted_telecells)
+
+    @staticmethod
+    def publish_deleted(locations: dict, elements: list, telecells: list, telecell_statuses: dict):
+        """
+        Publishes what soft_delete deleted to Watch streams, the fleet counters and the status log.
+
+        :param locations: (longitude, latitude) of each asset deleted, by asset ID.
+        :param elements: (ID, asset ID, description, status before deletion, basestation ID of its telecell) of each
+            element deleted.
+        :param telecells: Telecell rows deleted, as loaded after their status was changed.
+        :param telecell_statuses: status of each telecell deleted before deletion, by ID.
+        :return:
+        """
+
+        # imported here, as the telecell handler imports this module
+        from .telecell import TelecellHandler
+
+        asset_status = asset_pb2.ActivityStatus.Value("DELETED")
+        element_status = element_pb2.ActivityStatus.Value("DELETED")
+
+        for asset_id, (longitude, latitude) in locations.items():
+            asset_reply = asset_pb2.Reply(id=asset_id, status=asset_status)
+
+            if latitude and longitude:
+                asset_reply.location.long, asset_reply.location.lat = longitude, latitude
+
+            else:
+                asset_reply.no_location = True
+
+            change_bus.publish("asset", DELETED, asset_reply, status=asset_status, longitude=longitude,
+                               latitude=latitude)
+
+        for element_id, asset_id, description, status, bs_id in elements:
+            longitude, latitude = locations[asset_id]
+            element_reply = element_pb2.Reply(id=element_id, status=element_status, description=description,
+                                              asset_id=asset_id)
+
+            change_bus.publish("element", DELETED, element_reply, status=element_status, longitude=longitude,
+                               latitude=latitude)
+            fleet_counters.move("element", fleet_counters.key(status, bs_id, longitude, latitude),
+                                fleet_counters.key(element_status, bs_id, longitude, latitude))
+
+        for telecell in telecells:
+            TelecellHandler.publish_change(DELETED, telecell)
+
+            previous_status = telecell_statuses.get(telecell.id, telecell.status)
+            counted = fleet_counters.key(previous_status, telecell.bs_id, telecell.longitude, telecell.latitude)
+            fleet_counters.move("telecell", counted, TelecellHandler.counter_key(telecell))
+            status_log.record(telecell.id, telecell.bs_id, telecell.status, previous_status)
+
+        return
+
     def Prune(self, request, context):
         """
 
@@ -233,9 +559,16 @@ class AssetHandler(AssetServicer):
 
         # get associated elements before they disappear forever...
         associated_element_ids = [element.id for element in asset_to_be_deleted.elements]
+        telecell_ids = [element.telecell_id for element in asset_to_be_deleted.elements]
+        counted = element_keys(self.db, Element.asset_id == request.id).values()
 
         # Going....
         self.db.delete(asset_to_be_deleted)
+        bury(self.db, "asset", [request.id])
+        bury(self.db, "element", associated_element_ids)
+
+        # the telecells the elements were connected to have lost them
+        touch(self.db, Telecell, telecell_ids)
 
         # ... Going.....
         message = "Permanently deleting Asset {} and associated Elements {}." \
@@ -244,6 +577,16 @@ class AssetHandler(AssetServicer):
 
         # ... Gone.
         self.db.commit()
+        self.index.remove(request.id)
+        reply_cache.invalidate(*asset_tags([request.id]), *element_tags(associated_element_ids))
+
+        change_bus.publish("asset", PRUNED, asset_pb2.Reply(id=request.id))
+
+        for element_id in associated_element_ids:
+            change_bus.publish("element", PRUNED, element_pb2.Reply(id=element_id))
+
+        for key in counted:
+            fleet_counters.move("element", before=key)
 
         # populate reply message
         asset = asset_pb2.Reply(id=request.id,
@@ -253,18 +596,65 @@ class AssetHandler(AssetServicer):
 
         return asset
 
+    def Watch(self, request, context):
+        """
+        Streams changes made to assets, as they are committed.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        self.logger.info("Watch Assets from sequence {}".format(request.after_sequence))
+
+        for change in watch("asset", request, context, asset_pb2.Change):
+            yield change
+
+    @staticmethod
+    def publish_change(action: int, asset: Asset):
+        """
+        Publishes a change made to an asset to Watch streams, once it has been committed.
+
+        :param action: CREATED, UPDATED or DELETED.
+        :param asset:
+        :return:
+        """
+
+        change_bus.publish("asset", action, AssetHandler.prepare_asset_message(asset, AssetHandler.CHANGE_MASK),
+                           status=asset.status, longitude=asset.longitude, latitude=asset.latitude)
+        return
+
     @staticmethod
-    def prepare_asset_message(asset: Asset) -> asset_pb2.Reply:
+    def load_options(mask: ReadMask = FULL) -> list:
+        """
+        Loader options for every relation that prepare_asset_message walks.
+
+        The elements of every asset in a result are fetched with one extra SELECT ... IN query, instead of one lazy
+        load per asset - unless the mask leaves out element_uids.
+
+        :param mask: fields of the replies that will be prepared.
+        :return:
+        """
+
+        if not mask.includes("element_uids"):
+            return []
+
+        return [selectinload(Asset.elements)]
+
+    @staticmethod
+    def prepare_asset_message(asset: Asset, mask: ReadMask = FULL) -> asset_pb2.Reply:
         """
         Given an Asset, prepare an Asset.Reply message which contains Asset's details.
 
         :param asset:
+        :param mask: fields to fill in. The asset's elements are only touched for element_uids.
         :return:
         """
 
         asset_reply = asset_pb2.Reply(id=asset.id, status=asset.status)
 
-        asset_reply.element_uids.extend([element.id for element in asset.elements])
+        if mask.includes("element_uids"):
+            asset_reply.element_uids.extend([element.id for element in asset.elements])
 
         if asset.latitude and asset.longitude:
             asset_reply.location.long, asset_reply.location.lat = asset.longitude, asset.latitude
@@ -272,4 +662,4 @@ class AssetHandler(AssetServicer):
         else:
             asset_reply.no_location = True
 
-        return asset_reply
+        return mask.trim(asset_reply)
@@ -1,20 +1,44 @@
 import logging
 
-import sqlalchemy as db
-from sqlalchemy.orm import sessionmaker
-
 import lighting.lib.basestation_pb2 as bs_pb2
-from dbHandler import Basestation, engine
+from dbHandler import Basestation, Session, Telecell
 from lighting.lib.basestation_pb2_grpc import BasestationServicer
 from log import setup_logger
+from .batching import batch_by_size
+from .cache import reply_cache, basestation_tags, basestation_messages
+from .changes import CREATED, UPDATED, DELETED, PRUNED, change_bus, watch
+from .counters import element_keys, fleet_counters
+from .delta import delta, bury
+from .masks import FULL, ReadMask, read_mask
+from .pagination import paginate
+from .spatial import SpatialIndex, bounding_box, chunks, neighbours
 
 
 class BasestationHandler(BasestationServicer):
     MAX_LIST_SIZE = 1000
 
+    # size budget of each message streamed back by SearchByLocationBatched
+    MAX_BATCH_BYTES = 1 << 20
+
     def __init__(self):
-        self.db = sessionmaker(bind=engine)()
+        # thread-local session, scoped to the RPC being served - see lighting/server/interceptors.py
+        self.db = Session
         self.logger = setup_logger("basestationHandler", logging.DEBUG)
+
+        # locations of all basestations, for SearchByLocation
+        self.index = SpatialIndex()
+        self.load_index()
+        return
+
+    def load_index(self):
+        """
+        (Re)builds the location index from the DB.
+
+        :return:
+        """
+
+        self.index.load(self.db.query(Basestation.id, Basestation.longitude, Basestation.latitude))
+        self.logger.debug("Indexed locations of {} Basestations".format(len(self.index)))
         return
 
     def Get(self, request, context):
@@ -26,8 +50,19 @@ class BasestationHandler(BasestationServicer):
         :return:
         """
 
+        mask = read_mask(request, bs_pb2.Reply.DESCRIPTOR, context)
         message = ""
 
+        # only complete replies are cached
+        if mask.is_full and (request.id or request.uuid):
+            key = ("basestation", "id", request.id) if request.id else ("basestation", "uuid", request.uuid)
+            bs_message = reply_cache.get(key)
+
+            if bs_message is not None:
+                return bs_message
+
+        generation = reply_cache.generation
+
         if request.id:
             bs = self.db.query(Basestation).get(request.id)
 
@@ -49,7 +84,12 @@ class BasestationHandler(BasestationServicer):
             bs_message = bs_pb2.Reply(no_location=True)
             return bs_message
 
-        bs_message = self.prepare_basestation_message(bs)
+        bs_message = self.prepare_basestation_message(bs, mask)
+
+        if mask.is_full:
+            reply_cache.put([("basestation", "id", bs.id), ("basestation", "uuid", bs.uuid)], bs_message,
+                            generation=generation)
+
         return bs_message
 
     def List(self, request, context):
@@ -61,35 +101,41 @@ class BasestationHandler(BasestationServicer):
         :return:
         """
 
-        self.logger.info("Request list of {} Basestations, offset by {}".format(request.limit, request.offset))
+        self.logger.info("Request list of {} Basestations, offset by {}, page token {!r}"
+                         .format(request.limit, request.offset, request.page_token))
 
-        # get all elements if no limit or offset specified.
-        basestations = self.db.query(Basestation)
+        mask = read_mask(request, bs_pb2.Reply.DESCRIPTOR, context)
 
-        if request.limit:
-            basestations = basestations.limit(request.limit)
+        query = self.db.query(Basestation)
 
-        if request.offset:
-            basestations = basestations.offset(request.offset)
+        # with updated_since, only what changed since then
+        delta_sync = delta(self.db, "basestation", request, context)
 
-        basestations = basestations.all()
+        if delta_sync:
+            query = query.filter(Basestation.changed_at >= delta_sync.since)
 
-        replies = []
+        # get all basestations if no limit, offset or page token specified.
+        lists = paginate(query, Basestation.id, request, context, self.MAX_LIST_SIZE)
 
-        for i, basestation in enumerate(basestations):
-            bs_reply = self.prepare_basestation_message(basestation)
-            replies.append(bs_reply)
+        # each chunk is streamed as soon as it has been fetched and serialised
+        for basestations, next_page_token in lists:
+            # populate outgoing message
+            bs_reply_list = bs_pb2.ListReply(next_page_token=next_page_token)
+            bs_reply_list.basestations.extend([self.prepare_basestation_message(bs, mask) for bs in basestations])
 
-            if len(replies) == self.MAX_LIST_SIZE or i == len(basestations) - 1:
-                # populate outgoing message
-                bs_reply_list = bs_pb2.ListReply()
-                bs_reply_list.basestations.extend(replies)
+            if delta_sync:
+                delta_sync.fill(bs_reply_list)
 
-                # reset list for next batch of messages that'll go in the next stream
-                replies = []
+            # end the read transaction before the chunk is streamed, so that its connection goes back to the pool
+            # while the client takes it - the next chunk is fetched in a new one
+            self.db.commit()
 
-                # stream
-                yield bs_reply_list
+            # stream
+            yield bs_reply_list
+
+        # nothing changed, but the client still gets the pruned IDs and synced_at
+        if delta_sync and not delta_sync.sent:
+            yield delta_sync.fill(bs_pb2.ListReply())
 
     def SearchByLocation(self, request, context):
         """
@@ -100,27 +146,101 @@ class BasestationHandler(BasestationServicer):
         :return:
         """
 
+        mask = read_mask(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        for bs_reply in self.search_by_location(request, mask):
+            # stream reply to client
+            yield bs_reply
+
+    def SearchByLocationBatched(self, request, context):
+        """
+        Search for basestations based on a map rectangle, like SearchByLocation.
+
+        Rather than streaming back one message per basestation, matches are packed into ListReply messages of up to
+        MAX_BATCH_BYTES each, which saves most of the per-message overhead on big map areas.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        for replies in batch_by_size(self.search_by_location(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = bs_pb2.ListReply()
+            reply_list.basestations.extend(replies)
+
+            # stream
+            yield reply_list
+
+    def search_by_location(self, request, mask: ReadMask = FULL):
+        """
+        Finds everything inside the map rectangle of a FilterByLocationRequest.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of reply messages, one per match.
+        """
+
         # find the bounding box on the map
-        left = min(request.rectangle.lo.long, request.rectangle.hi.long)
-        right = max(request.rectangle.lo.long, request.rectangle.hi.long)
-        top = max(request.rectangle.lo.lat, request.rectangle.hi.lat)
-        bottom = min(request.rectangle.lo.lat, request.rectangle.hi.lat)
+        left, bottom, right, top = bounding_box(request.rectangle)
 
         self.logger.info(
             "Request for Basestations in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
 
-        # find elements in that fall in bounding box
-        basestations = self.db.query(Basestation) \
-            .filter(
-            db.and_(Basestation.longitude >= left, Basestation.longitude <= right,
-                    Basestation.latitude >= bottom, Basestation.latitude <= top)) \
-            .all()
+        # find basestations that fall in bounding box, then load only those
+        bs_ids = self.index.search(left, bottom, right, top)
 
-        for basestation in basestations:
-            bs_reply = self.prepare_basestation_message(basestation)
+        for ids in chunks(bs_ids, self.MAX_LIST_SIZE):
+            basestations = self.db.query(Basestation) \
+                .filter(Basestation.id.in_(ids)) \
+                .order_by(Basestation.id) \
+                .all()
 
-            # stream reply to client
-            yield bs_reply
+            for basestation in basestations:
+                bs_reply = self.prepare_basestation_message(basestation, mask)
+
+                yield bs_reply
+
+    def SearchNearest(self, request, context):
+        """
+        Streams the basestations closest to a location, nearest first, each with its distance in metres.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, bs_pb2.Reply.DESCRIPTOR, context)
+
+        for distance, bs_reply in self.search_nearest(request, mask):
+            yield bs_pb2.Neighbour(distance=distance, basestation=bs_reply)
+
+    def search_nearest(self, request, mask: ReadMask = FULL):
+        """
+        Finds the basestations closest to the location of a NearestRequest in the location index, then loads only
+        those.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of (distance in metres, reply message), nearest first.
+        """
+
+        found = neighbours(self.index, request)
+
+        self.logger.info("Request for Basestations nearest to ({}, {}): found {}"
+                         .format(request.location.lat, request.location.long, len(found)))
+
+        for nearest in chunks(found, self.MAX_LIST_SIZE):
+            basestations = self.db.query(Basestation) \
+                .filter(Basestation.id.in_([row_id for _, row_id in nearest])) \
+                .all()
+            loaded = {bs.id: bs for bs in basestations}
+
+            for distance, row_id in nearest:
+                # skip rows pruned since they were found
+                if row_id in loaded:
+                    yield distance, self.prepare_basestation_message(loaded[row_id], mask)
 
     def Create(self, request, context):
         """
@@ -147,6 +267,9 @@ class BasestationHandler(BasestationServicer):
         self.db.commit()
         self.db.refresh(new_bs)
 
+        self.index.insert(new_bs.id, new_bs.longitude, new_bs.latitude)
+        self.publish_change(CREATED, new_bs)
+
         bs_reply = self.prepare_basestation_message(new_bs)
 
         return bs_reply
@@ -201,6 +324,10 @@ class BasestationHandler(BasestationServicer):
             bs.latitude, bs.longitude = None, None
 
         self.db.commit()
+        self.index.insert(bs.id, bs.longitude, bs.latitude)
+        reply_cache.invalidate(*basestation_tags([bs.id]))
+        basestation_messages.invalidate(bs.id)
+        self.publish_change(UPDATED, bs)
 
         message += "Basestation ({}, {}) (ID: {}, UUID: {}, version: {}, status: {})" \
             .format(bs.latitude, bs.longitude, bs.id, bs.uuid, bs.version, bs_pb2.ActivityStatus.Name(bs.status))
@@ -246,6 +373,9 @@ class BasestationHandler(BasestationServicer):
         bs.status = bs_pb2.ActivityStatus.Value("DELETED")
 
         self.db.commit()
+        reply_cache.invalidate(*basestation_tags([bs.id]))
+        basestation_messages.invalidate(bs.id)
+        self.publish_change(DELETED, bs)
         self.logger.info(message)
         bs_reply = self.prepare_basestation_message(bs)
 
@@ -291,13 +421,74 @@ class BasestationHandler(BasestationServicer):
         bs_reply = bs_pb2.Reply(id=bs.id, uuid=bs.uuid, no_location=True)
         self.logger.info(message)
 
+        # the fleet counters count telecells and their elements per basestation, so they move to "no basestation"
+        counted = [fleet_counters.key(telecell.status, bs.id, telecell.longitude, telecell.latitude)
+                   for telecell in bs.telecells]
+        counted_elements = element_keys(self.db, Telecell.bs_id == bs.id).values()
+
         self.db.delete(bs)
+        bury(self.db, "basestation", [bs_reply.id])
         self.db.commit()
+        self.index.remove(bs_reply.id)
+
+        # telecells embed their basestation, and have just lost it
+        reply_cache.invalidate(*basestation_tags([bs_reply.id]))
+        basestation_messages.invalidate(bs_reply.id)
+        change_bus.publish("basestation", PRUNED, bs_pb2.Reply(id=bs_reply.id, uuid=bs_reply.uuid))
+
+        fleet_counters.move_basestation("telecell", counted)
+        fleet_counters.move_basestation("element", counted_elements)
 
         return bs_reply
 
+    def Watch(self, request, context):
+        """
+        Streams changes made to basestations, as they are committed.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        self.logger.info("Watch Basestations from sequence {}".format(request.after_sequence))
+
+        for change in watch("basestation", request, context, bs_pb2.Change):
+            yield change
+
+    @staticmethod
+    def publish_change(action: int, basestation: Basestation):
+        """
+        Publishes a change made to a basestation to Watch streams, once it has been committed.
+
+        :param action: CREATED, UPDATED or DELETED.
+        :param basestation:
+        :return:
+        """
+
+        change_bus.publish("basestation", action, BasestationHandler.prepare_basestation_message(basestation),
+                           status=basestation.status, longitude=basestation.longitude, latitude=basestation.latitude)
+        return
+
     @staticmethod
-    def prepare_basestation_message(basestation: Basestation):
+    def prepare_embedded_basestation_message(basestation: Basestation, mask: ReadMask = FULL):
+        """
+        Same as prepare_basestation_message, but memoised - for replies that embed the basestation, such as telecells'.
+
+        The message returned is shared, and must not be modified.
+
+        :param basestation:
+        :param mask: only complete messages are memoised.
+        :return:
+        """
+
+        if not mask.is_full:
+            return BasestationHandler.prepare_basestation_message(basestation, mask)
+
+        return basestation_messages.get(basestation.id, basestation.changed_at,
+                                        BasestationHandler.prepare_basestation_message, basestation)
+
+    @staticmethod
+    def prepare_basestation_message(basestation: Basestation, mask: ReadMask = FULL):
         """
         Given a row from the basestation table, populate the lighting.basestation.Reply message.
 
@@ -305,6 +496,7 @@ class BasestationHandler(BasestationServicer):
         the reply.
 
         :param basestation:
+        :param mask: fields to fill in.
         :return:
         """
 
@@ -317,4 +509,4 @@ class BasestationHandler(BasestationServicer):
         else:
             bs_reply.location.lat, bs_reply.location.long = basestation.latitude, basestation.longitude
 
-        return bs_reply
+        return mask.trim(bs_reply)
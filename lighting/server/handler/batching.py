@@ -0,0 +1,58 @@
+# bytes of framing around each item of a repeated message field: 1 byte tag, and up to 5 bytes for the length.
+ITEM_OVERHEAD = 6
+
+
+def batch_by_size(replies, max_bytes: int):
+    """
+    Groups a stream of reply messages into batches whose serialised size stays within a byte budget.
+
+    A single message larger than the budget still goes out, in a batch of its own.
+
+    :param replies: iterable of protobuf messages.
+    :param max_bytes: size budget of each batch once it is put in a repeated field.
+    :return: generator of lists of messages.
+    """
+
+    batch = []
+    batch_size = 0
+
+    for reply in replies:
+        reply_size = reply.ByteSize() + ITEM_OVERHEAD
+
+        if batch and batch_size + reply_size > max_bytes:
+            yield batch
+            batch = []
+            batch_size = 0
+
+        batch.append(reply)
+        batch_size += reply_size
+
+    if batch:
+        yield batch
+
+
+async def batch_by_size_async(replies, max_bytes: int):
+    """
+    Same as batch_by_size, for an async iterable of reply messages.
+
+    :param replies:
+    :param max_bytes:
+    :return: async generator of lists of messages.
+    """
+
+    batch = []
+    batch_size = 0
+
+    async for reply in replies:
+        reply_size = reply.ByteSize() + ITEM_OVERHEAD
+
+        if batch and batch_size + reply_size > max_bytes:
+            yield batch
+            batch = []
+            batch_size = 0
+
+        batch.append(reply)
+        batch_size += reply_size
+
+    if batch:
+        yield batch
@@ -0,0 +1,297 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ("keys", "tags", "reply", "expires_at")
+
+    def __init__(self, keys: tuple, tags: frozenset, reply, expires_at: float):
+        self.keys = keys
+        self.tags = tags
+        self.reply = reply
+        self.expires_at = expires_at
+        return
+
+
+class ReplyCache:
+    """
+    Bounded LRU cache of built reply messages, with a time-to-live.
+
+    An entry can be stored under several keys (e.g. a telecell's ID and its UUID), and carries tags for the rows its
+    reply was built from (e.g. the telecell's basestation, elements and assets). Keys and tags have the same shape,
+    (entity, field, value), such as ("telecell", "uuid", 1234) or ("asset", "id", 5). Invalidating a tag drops every
+    entry that is stored under it or was built from it, so a write only needs to name the rows it changed.
+
+    A reply read from the DB while a write to the same rows was being committed could be put in the cache after the
+    write invalidated it. To avoid that, take the cache's generation before reading, and pass it to put: the reply is
+    then only cached if none of its keys and tags has been invalidated in between. Writes to other rows don't stop it.
+
+    Cached replies are shared between RPCs, so they must not be modified once put in the cache.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        :param max_size: maximum number of keys held; least recently used entries are evicted beyond that.
+        :param ttl: seconds an entry is served for before it has to be rebuilt. Bounds how stale an entry can get
+            when rows are changed by other processes.
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # key -> entry, least recently used first
+        self._entries = OrderedDict()
+
+        # tag -> set of entries stored under or built from it
+        self._tagged = {}
+
+        # bumped by every invalidation
+        self.generation = 0
+
+        # tag -> generation it was last invalidated in, least recently invalidated first. Only the last max_size tags
+        # are remembered; a put from before the last one forgotten is turned down, as it can't be checked.
+        self._invalidated = OrderedDict()
+        self._forgotten = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        return
+
+    def get(self, key: tuple):
+        """
+        :param key:
+        :return: the cached reply, or None.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    self._drop(entry)
+
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.reply
+
+    def put(self, keys, reply, tags=(), generation: int = None):
+        """
+        :param keys: all the keys the reply can be looked up by.
+        :param reply:
+        :param tags: rows the reply was built from, besides the one it is about.
+        :param generation: the cache's generation from before the rows were read. The reply isn't cached if any of its
+            keys or tags has been invalidated since.
+        :return:
+        """
+
+        keys = tuple(keys)
+        entry = _Entry(keys, frozenset(tags).union(keys), reply, time.monotonic() + self.ttl)
+
+        with self._lock:
+            if generation is not None and self._invalidated_since(entry.tags, generation):
+                return
+
+            for key in keys:
+                previous = self._entries.get(key)
+
+                if previous is not None:
+                    self._drop(previous)
+
+            for key in keys:
+                self._entries[key] = entry
+
+            for tag in entry.tags:
+                self._tagged.setdefault(tag, set()).add(entry)
+
+            while len(self._entries) > self.max_size:
+                _, oldest = self._entries.popitem(last=False)
+                self._drop(oldest)
+                self.evictions += 1
+
+        return
+
+    def invalidate(self, *tags):
+        """
+        Drops every entry stored under, or built from, any of the tags.
+
+        :param tags:
+        :return:
+        """
+
+        with self._lock:
+            self.generation += 1
+
+            for tag in tags:
+                self._invalidated[tag] = self.generation
+                self._invalidated.move_to_end(tag)
+
+                for entry in list(self._tagged.get(tag, ())):
+                    self._drop(entry)
+                    self.invalidations += 1
+
+            while len(self._invalidated) > self.max_size:
+                _, self._forgotten = self._invalidated.popitem(last=False)
+
+        return
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+
+        return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _invalidated_since(self, tags, generation: int) -> bool:
+        if generation < self._forgotten:
+            return True
+
+        return any(self._invalidated.get(tag, 0) > generation for tag in tags)
+
+    def _drop(self, entry: _Entry):
+        for key in entry.keys:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+
+        for tag in entry.tags:
+            tagged = self._tagged.get(tag)
+
+            if tagged is not None:
+                tagged.discard(entry)
+
+                if not tagged:
+                    del self._tagged[tag]
+
+        return
+
+
+class MessageMemo:
+    """
+    Bounded memo of sub-messages that many replies embed, e.g. the basestation of every telecell connected to it.
+
+    Messages are kept by row ID, along with the version of the row they were built from - its changed_at. A lookup with
+    another version misses and replaces the message, which catches writes made by other server processes. The write
+    paths of this process also invalidate the rows they change, as changed_at only moves on once a second. Once
+    max_size is reached, the rows memoised longest ago are evicted first.
+
+    Memoised messages are shared by every reply that embeds them, so they must only ever be copied (e.g. by passing
+    them to a message constructor), never modified.
+
+    Lookups don't take a lock, as they happen once per embedded message; the counters are approximate.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        :param max_size: maximum number of messages held. 0 turns the memo off.
+        """
+
+        self.max_size = max_size
+
+        # row ID -> (version, message)
+        self._messages = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        return
+
+    def get(self, row_id: int, version, build, *args):
+        """
+        :param row_id:
+        :param version: the row's changed_at.
+        :param build: builds the message from args, on a miss.
+        :param args:
+        :return:
+        """
+
+        memoised = self._messages.get(row_id)
+
+        if memoised is not None and memoised[0] == version:
+            self.hits += 1
+            return memoised[1]
+
+        self.misses += 1
+        message = build(*args)
+
+        if self.max_size > 0:
+            with self._lock:
+                self._messages[row_id] = version, message
+
+                while len(self._messages) > self.max_size:
+                    self._messages.popitem(last=False)
+
+        return message
+
+    def invalidate(self, *row_ids):
+        """
+        Drops the messages of rows that have just been written.
+
+        :param row_ids:
+        :return:
+        """
+
+        with self._lock:
+            for row_id in row_ids:
+                self._messages.pop(row_id, None)
+
+        return
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+
+        return
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._messages),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def asset_tags(asset_ids) -> list:
+    return [("asset", "id", asset_id) for asset_id in asset_ids]
+
+
+def element_tags(element_ids) -> list:
+    return [("element", "id", element_id) for element_id in element_ids]
+
+
+def telecell_tags(telecell_ids) -> list:
+    return [("telecell", "id", telecell_id) for telecell_id in telecell_ids]
+
+
+def basestation_tags(basestation_ids) -> list:
+    return [("basestation", "id", basestation_id) for basestation_id in basestation_ids]
+
+
+# Replies of the Get RPCs, shared by all handlers so that a write through one service invalidates the replies of the
+# others that embed the changed rows.
+reply_cache = ReplyCache(max_size=int(os.getenv("REPLY_CACHE_SIZE") or 10000),
+                         ttl=float(os.getenv("REPLY_CACHE_TTL") or 60))
+
+# Basestation messages embedded in telecell replies - there are only a few hundred basestations behind hundreds of
+# thousands of telecells.
+basestation_messages = MessageMemo(max_size=int(os.getenv("MESSAGE_MEMO_SIZE") or 10000))
@@ -0,0 +1,460 @@
+import asyncio
+import os
+import threading
+import uuid
+from collections import deque
+
+import grpc
+
+from dbHandler.base import SERVER_MAX_WORKERS
+from .spatial import bounding_box
+
+# change actions, with the same values as lighting.change.Action
+CREATED = 1
+UPDATED = 2
+DELETED = 3
+PRUNED = 4
+
+
+class Change:
+    """
+    A write to one row, as published on a ChangeBus.
+
+    The filtering attributes (status, location and basestation) are None when not known, e.g. for a pruned row.
+    """
+
+    __slots__ = ("sequence", "entity", "action", "reply", "status", "longitude", "latitude", "basestation_id")
+
+    def __init__(self, sequence: int, entity: str, action: int, reply, status: int = None, longitude: float = None,
+                 latitude: float = None, basestation_id: int = None):
+        """
+        :param sequence: position of the change on its bus.
+        :param entity: "asset", "basestation", "element" or "telecell".
+        :param action: CREATED, UPDATED, DELETED or PRUNED.
+        :param reply: the row after the change, as a Reply message of its service - shared, so never modified.
+        :param status:
+        :param longitude:
+        :param latitude:
+        :param basestation_id: for telecells, the basestation they are connected to.
+        """
+
+        self.sequence = sequence
+        self.entity = entity
+        self.action = action
+        self.reply = reply
+        self.status = status
+        self.longitude = longitude
+        self.latitude = latitude
+        self.basestation_id = basestation_id
+        return
+
+
+class ChangeFilter:
+    """
+    Which changes a subscriber wants, from the fields of a lighting.change.WatchRequest.
+
+    Prunes always pass, so that subscribers can drop the rows they hold. Other changes must match every criterion set.
+    """
+
+    def __init__(self, box: tuple = None, statuses=None, basestation_id: int = None):
+        """
+        :param box: (left, bottom, right, top) the row must be located in, e.g. from spatial.bounding_box.
+        :param statuses: statuses the row must be left in.
+        :param basestation_id: basestation a telecell must be connected to.
+        """
+
+        self.box = box
+        self.statuses = frozenset(statuses or ())
+        self.basestation_id = basestation_id
+        return
+
+    def __call__(self, change: Change) -> bool:
+        if change.action == PRUNED:
+            return True
+
+        if self.statuses and change.status not in self.statuses:
+            return False
+
+        if self.basestation_id and change.entity == "telecell" and change.basestation_id != self.basestation_id:
+            return False
+
+        if self.box is not None:
+            if change.longitude is None or change.latitude is None:
+                return False
+
+            left, bottom, right, top = self.box
+            if not (left <= change.longitude <= right and bottom <= change.latitude <= top):
+                return False
+
+        return True
+
+
+class Subscription:
+    """
+    One subscriber's view of a ChangeBus: the changes to one entity that pass its filter, in sequence order.
+
+    Changes are buffered up to max_buffered. A subscriber that falls further behind is not allowed to hold up the bus
+    or grow the buffer: the buffer is dropped, and the subscriber catches up from the bus's history the next time it
+    reads. If the history doesn't go back far enough, it gets a resync instead (see next).
+    """
+
+    def __init__(self, bus: "ChangeBus", entity: str, change_filter, max_buffered: int, last_sequence: int,
+                 lagging: bool):
+        """
+        :param bus:
+        :param entity:
+        :param change_filter:
+        :param max_buffered:
+        :param last_sequence: sequence of the last change the subscriber has, or -1 if it can't tell.
+        :param lagging: whether the subscriber has to catch up from history before taking changes from its buffer.
+        """
+
+        self.bus = bus
+        self.entity = entity
+        self.change_filter = change_filter
+        self.max_buffered = max_buffered
+
+        # sequence of the last change handed to the subscriber, to catch up from
+        self.last_sequence = last_sequence
+
+        self.dropped = 0
+
+        self._buffer = deque()
+        self._lagging = lagging
+        self._condition = threading.Condition()
+
+        # set by the asyncio server's Watch, to be woken up without blocking the event loop
+        self._loop = None
+        self._ready = None
+        return
+
+    def offer(self, change: Change):
+        """
+        Called by the bus, with its lock held, for every change to the subscription's entity.
+
+        :param change:
+        :return:
+        """
+
+        if self.change_filter is not None and not self.change_filter(change):
+            return
+
+        with self._condition:
+            if self._lagging:
+                return
+
+            if len(self._buffer) >= self.max_buffered:
+                # slow consumer - catch up from history later, rather than buffer without limit
+                self.dropped += len(self._buffer)
+                self._buffer.clear()
+                self._lagging = True
+            else:
+                self._buffer.append(change)
+
+            self._condition.notify()
+            loop, ready = self._loop, self._ready
+
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # the Watch's event loop has closed without the stream ending - nobody will read from here again
+                self.bus.unsubscribe_locked(self)
+
+        return
+
+    def next(self, timeout: float):
+        """
+        Waits for the next change.
+
+        :param timeout: most seconds to wait.
+        :return: the next Change; RESYNC if changes have been missed for good; or None if there was none in time.
+        """
+
+        with self._condition:
+            if not self._buffer and not self._lagging:
+                self._condition.wait(timeout)
+
+        return self._take()
+
+    async def next_async(self, timeout: float):
+        """
+        Same as next, for the asyncio server.
+        """
+
+        if self._loop is None:
+            ready = asyncio.Event()
+
+            # offer reads both together
+            with self._condition:
+                self._loop, self._ready = asyncio.get_running_loop(), ready
+
+        change = self._take()
+
+        if change is not None:
+            return change
+
+        self._ready.clear()
+
+        # a change may have come in between the check and clearing the event
+        change = self._take()
+
+        if change is not None:
+            return change
+
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        return self._take()
+
+    def _take(self):
+        with self._condition:
+            if not self._lagging:
+                if not self._buffer:
+                    return None
+
+                change = self._buffer.popleft()
+                self.last_sequence = change.sequence
+                return change
+
+        # the bus's lock must be taken before the subscription's, so catch up without holding the latter
+        changes, complete, sequence = self.bus.history_since(self)
+
+        if not complete:
+            # the subscriber reloads everything it holds, so the changes up to now don't matter any more
+            self.last_sequence = sequence
+            return RESYNC
+
+        with self._condition:
+            # changes published since the catch-up are already in the buffer, and are newer
+            self._buffer.extendleft(reversed(changes))
+
+        return self._take()
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        return
+
+
+# returned by Subscription.next when changes have been missed, and the subscriber has to reload what it holds
+RESYNC = object()
+
+
+class ChangeBus:
+    """
+    In-process fan-out of the changes made by the handlers' write paths, for the Watch RPCs.
+
+    Every change gets the next sequence number, and the last history_size changes are kept so that subscribers can
+    resume after a reconnect, or catch up after falling behind. Sequence numbers are only meaningful on the bus that
+    gave them out, which bus_id identifies: server processes don't share a bus, so a Watch only sees writes made
+    through the process that serves it.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, history_size: int, max_buffered: int):
+        """
+        :param history_size: number of changes kept for subscribers to resume from.
+        :param max_buffered: changes buffered per subscriber before it is considered too slow.
+        """
+
+        self.bus_id = uuid.uuid4().hex
+        self.max_buffered = max_buffered
+        self.sequence = 0
+
+        self._history = deque(maxlen=history_size)
+
+        # entity -> set of subscriptions
+        self._subscriptions = {}
+
+        self._lock = threading.Lock()
+        return
+
+    def publish(self, entity: str, action: int, reply, **attributes):
+        """
+        :param entity:
+        :param action:
+        :param reply: the row after the change - see Change.
+        :param attributes: status, longitude, latitude, basestation_id of the row, as far as known.
+        :return:
+        """
+
+        with self._lock:
+            self.sequence += 1
+            change = Change(self.sequence, entity, action, reply, **attributes)
+            self._history.append(change)
+
+            # a copy, as offer unsubscribes Watch streams whose event loop has gone
+            for subscription in tuple(self._subscriptions.get(entity, ())):
+                subscription.offer(change)
+
+        return
+
+    def subscribe(self, entity: str, change_filter=None, after_sequence: int = 0, bus_id: str = "") -> Subscription:
+        """
+        :param entity:
+        :param change_filter: called with each Change, returns whether the subscriber wants it.
+        :param after_sequence: resume after this change, e.g. the last one received before reconnecting. 0 to only
+            get changes made from now on.
+        :param bus_id: the bus after_sequence came from. If it's another one, the subscriber starts with a resync.
+        :return:
+        """
+
+        if after_sequence and bus_id and bus_id != self.bus_id:
+            # can't tell which of this bus's changes the subscriber has
+            after_sequence = -1
+
+        with self._lock:
+            if after_sequence:
+                subscription = Subscription(self, entity, change_filter, self.max_buffered, after_sequence, True)
+            else:
+                subscription = Subscription(self, entity, change_filter, self.max_buffered, self.sequence, False)
+
+            self._subscriptions.setdefault(entity, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self.unsubscribe_locked(subscription)
+
+        return
+
+    def unsubscribe_locked(self, subscription: Subscription):
+        """
+        Same as unsubscribe, with the bus's lock already held - e.g. from Subscription.offer.
+        """
+
+        self._subscriptions.get(subscription.entity, set()).discard(subscription)
+        return
+
+    def history_since(self, subscription: Subscription) -> tuple:
+        """
+        Catches a lagging subscription up: from here on, the changes it wants go to its buffer again.
+
+        :param subscription:
+        :return: the changes after the subscription's last_sequence that it wants; whether the history went back far
+            enough to hold all of them; and the sequence of the last change published.
+        """
+
+        with self._lock:
+            after = subscription.last_sequence
+            oldest = self._history[0].sequence if self._history else self.sequence + 1
+            complete = after >= 0 and (after >= self.sequence or oldest <= after + 1)
+
+            changes = []
+
+            if complete:
+                changes = [change for change in self._history
+                           if change.sequence > after and change.entity == subscription.entity
+                           and (subscription.change_filter is None or subscription.change_filter(change))]
+
+            with subscription._condition:
+                subscription._lagging = False
+
+            return changes, complete, self.sequence
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sequence": self.sequence,
+                "history": len(self._history),
+                "subscribers": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+            }
+
+
+# Changes of all entities, published by the handlers' write paths once they have committed.
+change_bus = ChangeBus(history_size=int(os.getenv("WATCH_HISTORY_SIZE") or 100000),
+                       max_buffered=int(os.getenv("WATCH_BUFFER_SIZE") or 1000))
+
+# seconds a Watch stream waits for a change before checking that its client is still there
+WATCH_POLL_INTERVAL = 1
+
+# Each Watch stream served by the threaded server holds one of its worker threads for as long as it is open. Leave
+# some for the other RPCs, and always at least one - with a single worker, Watch is refused. The asyncio server
+# (server.py --async) has no such limit.
+WATCH_MAX_STREAMS = min(int(os.getenv("WATCH_MAX_STREAMS") or SERVER_MAX_WORKERS // 2), SERVER_MAX_WORKERS - 1)
+_watchers = threading.BoundedSemaphore(max(0, WATCH_MAX_STREAMS))
+
+
+def change_filter(request) -> ChangeFilter:
+    """
+    :param request: a lighting.change.WatchRequest.
+    :return:
+    """
+
+    box = bounding_box(request.rectangle) if request.HasField("rectangle") else None
+    return ChangeFilter(box, request.statuses, request.basestation_id)
+
+
+def watch(entity: str, request, context, change_message):
+    """
+    Streams the changes to an entity asked for by a WatchRequest, for as long as the client stays - for the Watch RPCs.
+
+    :param entity:
+    :param request: a lighting.change.WatchRequest.
+    :param context:
+    :param change_message: Change message class of the entity's service, with the changed row in a field named after
+        the entity.
+    :return: generator of change_message messages.
+    """
+
+    if not _watchers.acquire(blocking=False):
+        if WATCH_MAX_STREAMS < 1:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION,
+                          "Watch needs a server with more than one worker, or the --async one.")
+
+        context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                      "Too many Watch streams open on this server. Try again later.")
+
+    try:
+        subscription = change_bus.subscribe(entity, change_filter(request), request.after_sequence, request.bus_id)
+
+        try:
+            while context.is_active():
+                change = subscription.next(WATCH_POLL_INTERVAL)
+
+                if change is not None:
+                    yield change_reply(entity, change, subscription, change_message)
+
+        finally:
+            subscription.close()
+
+    finally:
+        _watchers.release()
+
+
+async def watch_async(entity: str, request, context, change_message):
+    """
+    Same as watch, for the asyncio server. The stream ends when grpc.aio cancels it, once the client has gone.
+    """
+
+    subscription = change_bus.subscribe(entity, change_filter(request), request.after_sequence, request.bus_id)
+
+    try:
+        while True:
+            change = await subscription.next_async(WATCH_POLL_INTERVAL)
+
+            if change is not None:
+                yield change_reply(entity, change, subscription, change_message)
+
+    finally:
+        subscription.close()
+
+
+def change_reply(entity: str, change, subscription: Subscription, change_message):
+    """
+    :param entity:
+    :param change: a Change, or RESYNC.
+    :param subscription: the subscription the change came from.
+    :param change_message:
+    :return:
+    """
+
+    if change is RESYNC:
+        return change_message(sequence=subscription.last_sequence, bus_id=change_bus.bus_id, resync=True)
+
+    return change_message(sequence=change.sequence, bus_id=change_bus.bus_id, action=change.action,
+                          **{entity: change.reply})
@@ -0,0 +1,312 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from dbHandler import Asset, Element, Telecell
+from log import setup_logger
+
+
+class FleetCounters:
+    """
+    Number of telecells and elements in each status, broken down by basestation and by map region, kept up to date in
+    memory so that fleet summaries don't have to count rows.
+
+    Regions are the cells of a grid of cell_size by cell_size degrees. Each row is counted under a key of (status,
+    basestation ID, cell) - elements under the basestation of their telecell: the handlers' write paths move rows from
+    their key before a change to their key after it (see key), and a Reconciler periodically replaces all counts with
+    ones freshly counted by the DB - which corrects any drift, e.g. from writes made by other server processes.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, cell_size: float):
+        """
+        :param cell_size: side of the map regions, in degrees.
+        """
+
+        self.cell_size = cell_size
+
+        # entity -> Counter of (status, basestation ID, cell) -> number of rows
+        self._counts = {"telecell": Counter(), "element": Counter()}
+
+        self.reconciled_at = None
+        self.drift = 0
+
+        self._lock = threading.Lock()
+        return
+
+    def key(self, status: int, basestation_id: int = None, longitude: float = None, latitude: float = None) -> tuple:
+        """
+        :param status:
+        :param basestation_id: of the telecell, or of the element's telecell. None if there isn't one.
+        :param longitude:
+        :param latitude:
+        :return: what a row is counted under.
+        """
+
+        return status, basestation_id, self.cell(longitude, latitude)
+
+    def cell(self, longitude: float, latitude: float):
+        """
+        :param longitude:
+        :param latitude:
+        :return: (column, row) of the grid cell the location is in, or None if there is no location.
+        """
+
+        if longitude is None or latitude is None:
+            return None
+
+        return math.floor(longitude / self.cell_size), math.floor(latitude / self.cell_size)
+
+    def move(self, entity: str, before: tuple = None, after: tuple = None):
+        """
+        Counts a change to a row.
+
+        :param entity: "telecell" or "element".
+        :param before: key of the row before the change, or None if it has just been created.
+        :param after: key of the row after the change, or None if it has just been pruned.
+        :return:
+        """
+
+        if before == after:
+            return
+
+        with self._lock:
+            counts = self._counts[entity]
+
+            if before is not None:
+                counts[before] -= 1
+
+                # a count can go below 0 when the row was counted elsewhere - the next recount puts it right
+                if counts[before] == 0:
+                    del counts[before]
+
+            if after is not None:
+                counts[after] += 1
+
+        return
+
+    def move_basestation(self, entity: str, keys, basestation_id: int = None):
+        """
+        Counts rows moving to another basestation, with nothing else about them changing - e.g. the elements of a
+        telecell connected to another one.
+
+        :param entity: "telecell" or "element".
+        :param keys: key of each row before the move.
+        :param basestation_id: basestation the rows move to, or None.
+        :return:
+        """
+
+        for status, old_basestation_id, cell in keys:
+            self.move(entity, (status, old_basestation_id, cell), (status, basestation_id, cell))
+
+        return
+
+    def replace(self, entity: str, counts: Counter):
+        """
+        Replaces all counts of an entity, e.g. with ones counted by the DB.
+
+        :param entity:
+        :param counts: number of rows by key.
+        :return: number of rows that the old counts had wrong.
+        """
+
+        with self._lock:
+            old = self._counts[entity]
+            drift = sum(abs(old[key] - counts[key]) for key in set(old) | set(counts))
+            self._counts[entity] = counts
+
+        return drift
+
+    def summarise(self, entity: str, box: tuple = None, basestation_id: int = None) -> dict:
+        """
+        :param entity: "telecell" or "element".
+        :param box: (left, bottom, right, top) to only count the regions it overlaps, e.g. from spatial.bounding_box.
+        :param basestation_id: only count rows under this basestation.
+        :return: number of rows by status, by (basestation ID, status) and by (cell, status).
+        """
+
+        cells = self._cells(box) if box is not None else None
+
+        with self._lock:
+            items = list(self._counts[entity].items())
+
+        by_status, by_basestation, by_cell = Counter(), Counter(), Counter()
+
+        for (status, bs_id, cell), count in items:
+            if count <= 0:
+                continue
+
+            if cells is not None and (cell is None or not cells(cell)):
+                continue
+
+            if basestation_id and bs_id != basestation_id:
+                continue
+
+            by_status[status] += count
+            by_basestation[bs_id, status] += count
+            by_cell[cell, status] += count
+
+        return {"status": by_status, "basestation": by_basestation, "cell": by_cell}
+
+    def cell_bounds(self, cell: tuple) -> tuple:
+        """
+        :param cell: (column, row) of a grid cell.
+        :return: (left, bottom, right, top) of the cell.
+        """
+
+        column, row = cell
+        return (column * self.cell_size, row * self.cell_size,
+                (column + 1) * self.cell_size, (row + 1) * self.cell_size)
+
+    def _cells(self, box: tuple):
+        left, bottom, right, top = box
+        first_column, first_row = self.cell(left, bottom)
+        last_column, last_row = self.cell(right, top)
+
+        return lambda cell: first_column <= cell[0] <= last_column and first_row <= cell[1] <= last_row
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": sum(len(counts) for counts in self._counts.values()),
+                "reconciled_at": self.reconciled_at,
+                "drift": self.drift,
+            }
+
+
+class Reconciler:
+    """
+    Recounts FleetCounters from the DB every interval seconds, in a background thread, with one GROUP BY query per
+    entity.
+    """
+
+    def __init__(self, engine, counters: FleetCounters, interval: float):
+        """
+        :param engine: DB engine to count with.
+        :param counters:
+        :param interval: seconds between recounts.
+        """
+
+        self.engine = engine
+        self.counters = counters
+        self.interval = interval
+        self.logger = setup_logger("reconciler", logging.DEBUG)
+
+        self._stop = threading.Event()
+        self._thread = None
+        return
+
+    def start(self):
+        """
+        Recounts straight away, then every interval seconds, in a background thread.
+
+        The first count runs on that thread too, so that starting doesn't wait for a DB connection - the server's
+        start-up may still hold the only one free.
+
+        :return:
+        """
+
+        self._thread = threading.Thread(target=self._run, name="fleet-reconciler", daemon=True)
+        self._thread.start()
+        return
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        return
+
+    def reconcile(self):
+        """
+        Replaces all counts with ones counted by the DB.
+
+        :return:
+        """
+
+        start = time.perf_counter()
+        size = self.counters.cell_size
+
+        telecells = select(Telecell.status, Telecell.bs_id, func.floor(Telecell.longitude / size),
+                           func.floor(Telecell.latitude / size), func.count()) \
+            .group_by(Telecell.status, Telecell.bs_id, func.floor(Telecell.longitude / size),
+                      func.floor(Telecell.latitude / size))
+
+        elements = select(Element.status, Telecell.bs_id, func.floor(Asset.longitude / size),
+                          func.floor(Asset.latitude / size), func.count()) \
+            .select_from(Element) \
+            .join(Asset, Element.asset_id == Asset.id) \
+            .outerjoin(Telecell, Element.telecell_id == Telecell.id) \
+            .group_by(Element.status, Telecell.bs_id, func.floor(Asset.longitude / size),
+                      func.floor(Asset.latitude / size))
+
+        with self.engine.connect() as connection:
+            telecell_counts = Counter({(status, bs_id, self._cell(column, row)): count
+                                       for status, bs_id, column, row, count in connection.execute(telecells)})
+            element_counts = Counter({(status, bs_id, self._cell(column, row)): count
+                                      for status, bs_id, column, row, count in connection.execute(elements)})
+
+        # the first count fills the counters rather than correcting them
+        first = self.counters.reconciled_at is None
+
+        drift = self.counters.replace("telecell", telecell_counts) + self.counters.replace("element", element_counts)
+        self.counters.drift = 0 if first else drift
+        self.counters.reconciled_at = datetime.utcnow()
+
+        if drift and not first:
+            self.logger.info("Fleet counters were off by {} rows".format(drift))
+
+        self.logger.debug("Recounted {} telecell and {} element keys in {:.3f}s"
+                          .format(len(telecell_counts), len(element_counts), time.perf_counter() - start))
+        return
+
+    @staticmethod
+    def _cell(column, row):
+        if column is None or row is None:
+            return None
+
+        return int(column), int(row)
+
+    def _run(self):
+        wait = 0
+
+        while not self._stop.wait(wait):
+            wait = self.interval
+
+            try:
+                self.reconcile()
+            except Exception:
+                # keep counting from the write paths, and try again next time
+                self.logger.exception("Failed to recount fleet counters")
+
+        return
+
+
+def element_keys(db, *criteria) -> dict:
+    """
+    Looks up what many elements are counted under in the fleet counters, with a single query.
+
+    :param db: session to query in.
+    :param criteria: filters on the elements, e.g. Element.id.in_(ids) or Telecell.bs_id == 1.
+    :return: key of each element, by element ID.
+    """
+
+    rows = db.query(Element.id, Element.status, Telecell.bs_id, Asset.longitude, Asset.latitude) \
+        .outerjoin(Telecell, Element.telecell_id == Telecell.id) \
+        .outerjoin(Asset, Element.asset_id == Asset.id) \
+        .filter(*criteria)
+
+    return {element_id: fleet_counters.key(status, bs_id, longitude, latitude)
+            for element_id, status, bs_id, longitude, latitude in rows}
+
+
+# Fleet-wide counts, updated by the handlers' write paths.
+fleet_counters = FleetCounters(cell_size=float(os.getenv("STATS_REGION_SIZE") or 0.1))
@@ -0,0 +1,156 @@
+import os
+from datetime import timedelta
+
+import grpc
+from sqlalchemy import DateTime, func, select
+
+from dbHandler import Tombstone
+
+# seconds synced_at is set back by, so that rows changed by transactions still in flight when a listing starts (whose
+# changed_at is earlier than their commit) are sent again by the next listing, rather than missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# how long the tombstones of pruned rows are kept. Clients that last synced before then have to list everything again.
+TOMBSTONE_RETENTION = timedelta(days=int(os.getenv("TOMBSTONE_RETENTION_DAYS") or 30))
+
+
+class Delta:
+    """
+    What a List request with updated_since gets on top of the rows changed since then: the IDs of the rows pruned since
+    then, and the time to pass as updated_since next time.
+
+    Both go in the first ListReply of a listing. Later pages (requested with a page token) only continue the rows.
+    """
+
+    def __init__(self, since, synced_at=None, pruned_ids: list = ()):
+        """
+        :param since: updated_since of the request, as a naive UTC datetime.
+        :param synced_at: None on later pages.
+        :param pruned_ids:
+        """
+
+        self.since = since
+        self.synced_at = synced_at
+        self.pruned_ids = pruned_ids
+        self.sent = synced_at is None
+        return
+
+    def fill(self, reply_list):
+        """
+        Adds the pruned IDs and synced_at to a ListReply, if it's the first one of the listing.
+
+        :param reply_list:
+        :return: the ListReply.
+        """
+
+        if not self.sent:
+            reply_list.pruned_ids.extend(self.pruned_ids)
+            reply_list.synced_at.FromDatetime(self.synced_at)
+            self.sent = True
+
+        return reply_list
+
+
+def delta(db, entity: str, request, context):
+    """
+    Starts a delta listing, for a List request with updated_since.
+
+    :param db: session to query tombstones in.
+    :param entity: table listed, e.g. "telecell".
+    :param request: any of the ListRequest messages.
+    :param context:
+    :return: a Delta, or None if the request has no updated_since.
+    """
+
+    if not request.HasField("updated_since"):
+        return None
+
+    since = request.updated_since.ToDatetime()
+
+    if request.page_token:
+        return Delta(since)
+
+    now = db.query(func.utc_timestamp(type_=DateTime)).scalar()
+
+    if since < now - TOMBSTONE_RETENTION:
+        context.abort(grpc.StatusCode.FAILED_PRECONDITION, _too_old_message(since))
+
+    pruned_ids = [row_id for row_id, in db.execute(_pruned_since(entity, since))]
+
+    return Delta(since, now - SYNC_OVERLAP, pruned_ids)
+
+
+async def delta_async(session, entity: str, request, context):
+    """
+    Same as delta, for the asyncio server.
+
+    :param session: AsyncSession to query tombstones in.
+    """
+
+    if not request.HasField("updated_since"):
+        return None
+
+    since = request.updated_since.ToDatetime()
+
+    if request.page_token:
+        return Delta(since)
+
+    now = (await session.execute(select(func.utc_timestamp(type_=DateTime)))).scalar()
+
+    if since < now - TOMBSTONE_RETENTION:
+        await context.abort(grpc.StatusCode.FAILED_PRECONDITION, _too_old_message(since))
+
+    pruned_ids = [row_id for row_id, in await session.execute(_pruned_since(entity, since))]
+
+    return Delta(since, now - SYNC_OVERLAP, pruned_ids)
+
+
+def bury(db, entity: str, ids):
+    """
+    Records that rows have been pruned, in the same transaction as the prune, and drops tombstones that have expired.
+
+    :param db: session the rows are pruned in.
+    :param entity: table the rows were in.
+    :param ids:
+    :return:
+    """
+
+    db.add_all([Tombstone(entity, row_id) for row_id in ids])
+
+    expired = db.query(func.utc_timestamp(type_=DateTime)).scalar() - TOMBSTONE_RETENTION
+    db.query(Tombstone).filter(Tombstone.pruned_at < expired).delete(synchronize_session=False)
+
+    return
+
+
+def touch(db, model, ids):
+    """
+    Marks rows as changed without changing any of their columns - e.g. an asset whose list of element IDs has changed,
+    because an element moved to another asset.
+
+    :param db:
+    :param model: e.g. Asset.
+    :param ids: IDs of the rows; None is skipped.
+    :return:
+    """
+
+    ids = sorted({row_id for row_id in ids if row_id is not None})
+
+    if ids:
+        db.query(model) \
+            .filter(model.id.in_(ids)) \
+            .update({model.changed_at: func.utc_timestamp()}, synchronize_session=False)
+
+    return
+
+
+def _pruned_since(entity: str, since):
+    return select(Tombstone.row_id) \
+        .where(Tombstone.entity == entity) \
+        .where(Tombstone.pruned_at >= since) \
+        .order_by(Tombstone.row_id)
+
+
+def _too_old_message(since) -> str:
+    return "updated_since {} is older than the {} days pruned rows are kept for. List without updated_since instead." \
+        .format(since.isoformat(), TOMBSTONE_RETENTION.days)
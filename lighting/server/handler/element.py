@@ -1,22 +1,47 @@
 import logging
 
 import grpc
-import sqlalchemy as db
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import joinedload
 
 import lighting.lib.element_pb2 as element_pb2
-from dbHandler import Element, Asset, engine
+from dbHandler import Element, Asset, Telecell, Session
 from lighting.lib.element_pb2_grpc import ElementServicer
 from lighting.server.handler.asset import AssetHandler
 from log import setup_logger
+from .batching import batch_by_size
+from .cache import reply_cache, asset_tags, element_tags
+from .changes import CREATED, UPDATED, DELETED, PRUNED, change_bus, watch
+from .counters import fleet_counters
+from .delta import delta, bury, touch
+from .masks import FULL, ReadMask, read_mask
+from .pagination import paginate
+from .spatial import SpatialIndex, bounding_box, chunks
 
 
 class ElementHandler(ElementServicer):
     MAX_LIST_SIZE = 50
 
-    def __init__(self):
-        self.db = sessionmaker(bind=engine)()
+    # size budget of each message streamed back by SearchByLocationBatched
+    MAX_BATCH_BYTES = 1 << 20
+
+    # fields of the elements published to Watch streams - none of which need relations to be loaded
+    CHANGE_MASK = ReadMask.from_paths(["id", "status", "description", "asset_id"])
+
+    def __init__(self, asset_index: SpatialIndex = None):
+        """
+        :param asset_index: locations of all assets, to find elements by location. Pass in AssetHandler.index to share
+            it, otherwise the handler indexes the assets itself.
+        """
+
+        # thread-local session, scoped to the RPC being served - see lighting/server/interceptors.py
+        self.db = Session
         self.logger = setup_logger("elementHandler", logging.DEBUG)
+
+        if asset_index is None:
+            asset_index = SpatialIndex()
+            asset_index.load(self.db.query(Asset.id, Asset.longitude, Asset.latitude))
+
+        self.asset_index = asset_index
         return
 
     def Get(self, request, context):
@@ -30,7 +55,19 @@ class ElementHandler(ElementServicer):
 
         self.logger.info("Request Element with ID of {}".format(request.id))
 
-        element = self.db.query(Element).get(request.id)
+        mask = read_mask(request, element_pb2.Reply.DESCRIPTOR, context)
+        key = ("element", "id", request.id)
+
+        # only complete replies are cached
+        if mask.is_full:
+            element_reply = reply_cache.get(key)
+
+            if element_reply is not None:
+                return element_reply
+
+        generation = reply_cache.generation
+
+        element = self.db.query(Element).options(*self.load_options(mask)).get(request.id)
 
         # if no element found
         if not element:
@@ -38,7 +75,11 @@ class ElementHandler(ElementServicer):
             return element_pb2.Reply()
 
         # get associated asset, and the elements that asset is connected to
-        element_reply = self.prepare_element_message(element)
+        element_reply = self.prepare_element_message(element, mask)
+
+        # the reply embeds the asset, so it goes stale whenever the asset does
+        if mask.is_full:
+            reply_cache.put([key], element_reply, tags=asset_tags([element.asset_id]), generation=generation)
 
         return element_reply
 
@@ -53,36 +94,41 @@ class ElementHandler(ElementServicer):
         :return:
         """
 
-        self.logger.info("Request list of {} Elements, offset by {}".format(request.limit, request.offset))
+        self.logger.info("Request list of {} Elements, offset by {}, page token {!r}"
+                         .format(request.limit, request.offset, request.page_token))
 
-        # get all elements if no limit or offset specified.
-        elements = self.db.query(Element)
+        mask = read_mask(request, element_pb2.Reply.DESCRIPTOR, context)
 
-        if request.limit:
-            elements = elements.limit(request.limit)
+        query = self.db.query(Element).options(*self.load_options(mask))
 
-        if request.offset:
-            elements = elements.offset(request.offset)
+        # with updated_since, only what changed since then
+        delta_sync = delta(self.db, "element", request, context)
 
-        elements = elements.all()
+        if delta_sync:
+            query = query.filter(Element.changed_at >= delta_sync.since)
 
-        replies = []
+        # get all elements if no limit, offset or page token specified.
+        lists = paginate(query, Element.id, request, context, self.MAX_LIST_SIZE)
 
-        for i, element in enumerate(elements):
-            element_reply = self.prepare_element_message(element)
+        # each chunk is streamed as soon as it has been fetched and serialised
+        for elements, next_page_token in lists:
+            # populate outgoing message
+            reply_list = element_pb2.ListReply(next_page_token=next_page_token)
+            reply_list.elements.extend([self.prepare_element_message(element, mask) for element in elements])
 
-            replies.append(element_reply)
+            if delta_sync:
+                delta_sync.fill(reply_list)
 
-            if len(replies) == self.MAX_LIST_SIZE or i == len(elements) - 1:
-                # populate outgoing message
-                reply_list = element_pb2.ListReply()
-                reply_list.elements.extend(replies)
+            # end the read transaction before the chunk is streamed, so that its connection goes back to the pool
+            # while the client takes it - the next chunk is fetched in a new one
+            self.db.commit()
 
-                # reset list for next batch of messages that'll go in the next stream
-                replies = []
+            # stream
+            yield reply_list
 
-                # stream
-                yield reply_list
+        # nothing changed, but the client still gets the pruned IDs and synced_at
+        if delta_sync and not delta_sync.sent:
+            yield delta_sync.fill(element_pb2.ListReply())
 
     def SearchByLocation(self, request, context):
         """
@@ -95,26 +141,61 @@ class ElementHandler(ElementServicer):
         :return:
         """
 
+        mask = read_mask(request, element_pb2.Reply.DESCRIPTOR, context)
+
+        for element_reply in self.search_by_location(request, mask):
+            # stream reply to client
+            yield element_reply
+
+    def SearchByLocationBatched(self, request, context):
+        """
+        Search for elements based on a map rectangle, like SearchByLocation.
+
+        Rather than streaming back one message per element, matches are packed into ListReply messages of up to
+        MAX_BATCH_BYTES each, which saves most of the per-message overhead on big map areas.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, element_pb2.Reply.DESCRIPTOR, context)
+
+        for replies in batch_by_size(self.search_by_location(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = element_pb2.ListReply()
+            reply_list.elements.extend(replies)
+
+            # stream
+            yield reply_list
+
+    def search_by_location(self, request, mask: ReadMask = FULL):
+        """
+        Finds everything inside the map rectangle of a FilterByLocationRequest.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of reply messages, one per match.
+        """
+
         # find the bounding box on the map
-        left = min(request.rectangle.lo.long, request.rectangle.hi.long)
-        right = max(request.rectangle.lo.long, request.rectangle.hi.long)
-        top = max(request.rectangle.lo.lat, request.rectangle.hi.lat)
-        bottom = min(request.rectangle.lo.lat, request.rectangle.hi.lat)
+        left, bottom, right, top = bounding_box(request.rectangle)
 
         self.logger.info("Request for Elements in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
 
-        # find elements in that fall in bounding box
-        assets_subquery = self.db.query(Asset).filter(
-            db.and_(Asset.longitude >= left, Asset.longitude <= right,
-                    Asset.latitude >= bottom, Asset.latitude <= top)
-        ).subquery()
-        elements = self.db.query(Element).join(assets_subquery, assets_subquery.c.id == Element.asset_id).all()
+        # find elements in that fall in bounding box, through the assets they are connected to
+        asset_ids = self.asset_index.search(left, bottom, right, top)
 
-        for element in elements:
-            element_reply = self.prepare_element_message(element)
+        for ids in chunks(asset_ids, self.MAX_LIST_SIZE):
+            elements = self.db.query(Element) \
+                .options(*self.load_options(mask)) \
+                .filter(Element.asset_id.in_(ids)) \
+                .order_by(Element.id) \
+                .all()
 
-            # stream reply to client
-            yield element_reply
+            for element in elements:
+                element_reply = self.prepare_element_message(element, mask)
+
+                yield element_reply
 
     def Create(self, request, context):
         """
@@ -149,6 +230,12 @@ class ElementHandler(ElementServicer):
         for entry in new_db_entries:
             self.db.refresh(entry)
 
+        AssetHandler.publish_change(CREATED, new_asset)
+
+        for element in new_elements:
+            self.publish_change(CREATED, element)
+            fleet_counters.move("element", after=self.counter_key(element))
+
         element_ids = ", ".join(map(str, [element.id for element in new_elements]))
         message = "Created Asset {} and Elements {}".format(new_asset.id, element_ids)
         self.logger.info(message)
@@ -189,6 +276,10 @@ class ElementHandler(ElementServicer):
             self.logger.warn(message)
             return element_pb2.Reply(id=request.id)
 
+        # both the old and the new asset list this element's ID, if it moves
+        old_asset_id = element.asset_id
+        counted = self.counter_key(element)
+
         # expecting either new asset ID (int) or an entire asset message.
         if request.asset_id != 0:
 
@@ -224,6 +315,10 @@ class ElementHandler(ElementServicer):
 
             element.asset = request.asset
 
+        # the assets list their elements' IDs
+        if request.asset_id != 0 or (request.asset and request.asset.id != 0):
+            touch(self.db, Asset, [old_asset_id, asset.id])
+
         # update the other details where required.
         if request.status:
             element.status = request.status
@@ -232,6 +327,9 @@ class ElementHandler(ElementServicer):
             element.description = request.description
 
         self.db.commit()
+        reply_cache.invalidate(*element_tags([element.id]), *asset_tags([old_asset_id, element.asset_id]))
+        self.publish_change(UPDATED, element)
+        fleet_counters.move("element", counted, self.counter_key(element))
 
         # prepare element reply
         element_reply = self.prepare_element_message(element)
@@ -253,9 +351,13 @@ class ElementHandler(ElementServicer):
             context.set_details("Element {} does not exist!".format(request.id))
             return element_pb2.Reply(id=request.id)
 
+        counted = self.counter_key(element)
         element.status = element_pb2.ActivityStatus.Value("DELETED")
 
         self.db.commit()
+        reply_cache.invalidate(*element_tags([element.id]))
+        self.publish_change(DELETED, element)
+        fleet_counters.move("element", counted, self.counter_key(element))
 
         # prepare asset message
         element_reply = self.prepare_element_message(element)
@@ -282,9 +384,20 @@ class ElementHandler(ElementServicer):
             return element_pb2.Reply(id=request.id)
 
         message = "Deleted Element {} (permanently).".format(element.id)
+        asset_id = element.asset_id
+        telecell_id = element.telecell_id
+        counted = self.counter_key(element)
 
         self.db.delete(element)
+        bury(self.db, "element", [request.id])
+
+        # the asset's element IDs, and the telecell's elements, have changed
+        touch(self.db, Asset, [asset_id])
+        touch(self.db, Telecell, [telecell_id])
         self.db.commit()
+        reply_cache.invalidate(*element_tags([request.id]), *asset_tags([asset_id]))
+        change_bus.publish("element", PRUNED, element_pb2.Reply(id=request.id))
+        fleet_counters.move("element", before=counted)
 
         self.logger.info(message)
         context.set_details(message)
@@ -321,8 +434,13 @@ class ElementHandler(ElementServicer):
 
         # associate element to asset and commit changes to DB
         old_element_asset_id = element.asset.id  # for logging
+        counted = self.counter_key(element)
         element.asset = asset
+        touch(self.db, Asset, [old_element_asset_id, asset.id])
         self.db.commit()
+        reply_cache.invalidate(*element_tags([element.id]), *asset_tags([old_element_asset_id, asset.id]))
+        self.publish_change(UPDATED, element)
+        fleet_counters.move("element", counted, self.counter_key(element))
 
         message = "Added Element {} to Asset {}, dissociated from Asset {}" \
             .format(element.id, element.asset.id, old_element_asset_id)
@@ -334,12 +452,83 @@ class ElementHandler(ElementServicer):
 
         return element_reply
 
+    def Watch(self, request, context):
+        """
+        Streams changes made to elements, as they are committed. Elements are located by their asset.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        self.logger.info("Watch Elements from sequence {}".format(request.after_sequence))
+
+        for change in watch("element", request, context, element_pb2.Change):
+            yield change
+
+    @staticmethod
+    def publish_change(action: int, element: Element):
+        """
+        Publishes a change made to an element to Watch streams, once it has been committed.
+
+        :param action: CREATED, UPDATED or DELETED.
+        :param element:
+        :return:
+        """
+
+        element_reply = ElementHandler.prepare_element_message(element, ElementHandler.CHANGE_MASK)
+        asset = element.asset
+
+        change_bus.publish("element", action, element_reply, status=element.status,
+                           longitude=asset.longitude if asset else None, latitude=asset.latitude if asset else None)
+        return
+
     @staticmethod
-    def prepare_element_message(element: Element) -> element_pb2.Reply:
-        asset_reply = AssetHandler.prepare_asset_message(element.asset)
+    def counter_key(element: Element) -> tuple:
+        """
+        :param element:
+        :return: what the element is counted under in the fleet counters - under the basestation of its telecell, and
+            located by its asset.
+        """
+
+        asset, telecell = element.asset, element.telecell
+
+        return fleet_counters.key(element.status, telecell.bs_id if telecell else None,
+                                  asset.longitude if asset else None, asset.latitude if asset else None)
+
+    @staticmethod
+    def load_options(mask: ReadMask = FULL) -> list:
+        """
+        Loader options for every relation that prepare_element_message walks.
+
+        Each element's asset is joined into the main query, and the elements of those assets (for the asset's
+        element_uids) are fetched with one extra SELECT ... IN query - as far as the mask includes them.
+
+        :param mask: fields of the replies that will be prepared.
+        :return:
+        """
+
+        if not mask.includes("asset"):
+            return []
+
+        asset_loader = joinedload(Element.asset)
+
+        if mask.child("asset").includes("element_uids"):
+            asset_loader = asset_loader.selectinload(Asset.elements)
+
+        return [asset_loader]
+
+    @staticmethod
+    def prepare_element_message(element: Element, mask: ReadMask = FULL) -> element_pb2.Reply:
         element_reply = element_pb2.Reply(id=element.id,
                                           status=element.status,
-                                          description=element.description,
-                                          asset=asset_reply)
+                                          description=element.description)
 
-        return element_reply
+        # a mask can ask for just the asset's ID, which doesn't need the asset to be loaded
+        if mask.includes("asset"):
+            element_reply.asset.CopyFrom(AssetHandler.prepare_asset_message(element.asset, mask.child("asset")))
+
+        elif mask.includes("asset_id"):
+            element_reply.asset_id = element.asset_id
+
+        return mask.trim(element_reply)
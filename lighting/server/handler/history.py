@@ -0,0 +1,117 @@
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+
+import grpc
+from sqlalchemy import select
+
+import lighting.lib.history_pb2 as history_pb2
+from dbHandler import Telecell, engine
+from lighting.lib.history_pb2_grpc import HistoryServicer
+from log import setup_logger
+from .statuslog import status_log, day_of, day_start
+
+
+class HistoryHandler(HistoryServicer):
+    # most transitions or buckets a reply holds, if the request doesn't say
+    MAX_POINTS = 1000
+
+    def __init__(self):
+        self.logger = setup_logger("historyHandler", logging.DEBUG)
+        self.log = status_log
+
+        # the write paths record transitions; this writes them out, and compacts past days
+        self.log.start()
+        return
+
+    def close(self):
+        """
+        Writes the transitions still buffered. To be called once the server has stopped.
+
+        :return:
+        """
+
+        self.log.stop()
+        return
+
+    def Query(self, request, context):
+        """
+        Gets the status transitions of a telecell, or of a basestation's telecells, over a time range - or the time
+        spent in each status per bucket of days, when there are too many or they are no longer kept.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        subject = request.WhichOneof("subject")
+
+        if subject is None or not getattr(request, subject):
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Need to provide a Telecell or Basestation ID")
+
+        now = time.time()
+        end = min(request.end.ToSeconds(), now) if request.HasField("end") else now
+        start = request.start.ToSeconds() if request.HasField("start") else end - timedelta(days=1).total_seconds()
+
+        if start >= end:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "start must be before end, and before now")
+
+        max_points = request.max_points or self.MAX_POINTS
+        telecell_id, basestation_id = request.telecell_id or None, request.basestation_id or None
+
+        self.logger.info("Request for status history of {} {} from {} to {}"
+                         .format(subject, getattr(request, subject), datetime.utcfromtimestamp(start).isoformat(),
+                                 datetime.utcfromtimestamp(end).isoformat()))
+
+        # include what is still buffered in memory
+        self.log.flush()
+
+        history_reply = history_pb2.HistoryReply()
+        first_day, last_day = day_of(start), day_of(end)
+
+        if self.log.has_transitions(first_day):
+            transitions = self.log.transitions(start, end, telecell_id, basestation_id)
+
+            if len(transitions) <= max_points:
+                for transition in transitions:
+                    transition_reply = history_reply.transitions.add(telecell_id=transition.telecell_id,
+                                                                     basestation_id=transition.basestation_id,
+                                                                     status=transition.status,
+                                                                     previous_status=transition.previous_status)
+                    transition_reply.at.FromNanoseconds(int(transition.at * 1e9))
+
+                return history_reply
+
+        # downsample to buckets of whole days
+        bucket_days = math.ceil(((last_day - first_day).days + 1) / max_points)
+        statuses = self.current_statuses(telecell_id, basestation_id)
+
+        for first, last, durations in self.log.durations(first_day, last_day, bucket_days, statuses, telecell_id,
+                                                         basestation_id):
+            bucket = history_reply.buckets.add()
+            bucket.start.FromSeconds(int(day_start(first)))
+            bucket.end.FromSeconds(int(min(day_start(last + timedelta(days=1)), now)))
+
+            for status, (seconds, entered) in sorted(durations.items()):
+                bucket.statuses.add(status=status, seconds=seconds, entered=entered)
+
+        return history_reply
+
+    @staticmethod
+    def current_statuses(telecell_id: int = None, basestation_id: int = None) -> dict:
+        """
+        :param telecell_id: the telecell...
+        :param basestation_id: ... or the telecells connected to this basestation now.
+        :return: status of each telecell, by ID.
+        """
+
+        query = select(Telecell.id, Telecell.status)
+
+        if telecell_id is not None:
+            query = query.where(Telecell.id == telecell_id)
+        else:
+            query = query.where(Telecell.bs_id == basestation_id)
+
+        with engine.connect() as connection:
+            return {tc_id: status for tc_id, status in connection.execute(query)}
@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import case, or_, select
+
+from dbHandler import Telecell
+from log import setup_logger
+from .cache import reply_cache
+from .spatial import chunks
+
+# most telecells written by a single UPDATE statement
+MAX_ROWS_PER_UPDATE = 1000
+
+
+class StatusWriter:
+    """
+    Buffers telecell status reports in memory, and writes them to the DB in bulk.
+
+    Reports are coalesced per telecell UUID, keeping only the most recent one, so a telecell that reports many times
+    between two flushes costs a single row update. The buffer is flushed by a background thread every flush_interval
+    seconds, or by the reporting thread as soon as it holds max_pending telecells - which also slows down reporters
+    when the DB can't keep up, instead of letting the buffer grow without limit.
+
+    Each flush is one transaction of UPDATE ... SET status = CASE uuid WHEN ... END statements, MAX_ROWS_PER_UPDATE
+    telecells at a time. A report older than the status already in the DB - e.g. one that took longer through another
+    gateway, or another server process - is not written. The rows written can then be read back for on_written, e.g. to
+    publish them to Watch streams. If a flush fails, its reports go back in the buffer for the next one.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, engine, max_pending: int, flush_interval: float, on_written=None):
+        """
+        :param engine: DB engine to write with.
+        :param max_pending: number of telecells buffered that triggers a flush.
+        :param flush_interval: most seconds a report is buffered for.
+        :param on_written: called after each flush has committed, MAX_ROWS_PER_UPDATE telecells at a time, with the
+            rows written (as they are in the DB then) and their statuses before the flush, by UUID.
+        """
+
+        self.engine = engine
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+        self.logger = setup_logger("statusWriter", logging.DEBUG)
+
+        # uuid -> (status, updated_at) of the latest report of each telecell
+        self._pending = {}
+
+        self.reports = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.unknown = 0
+        self.stale = 0
+
+        self._lock = threading.Lock()
+
+        # flushes write one at a time, so that a later report of a telecell is never overwritten by an earlier one
+        self._flush_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread = None
+        return
+
+    def start(self):
+        """
+        Starts flushing the buffer every flush_interval seconds in a background thread.
+
+        :return:
+        """
+
+        self._thread = threading.Thread(target=self._run, name="status-writer", daemon=True)
+        self._thread.start()
+        return
+
+    def stop(self):
+        """
+        Stops the background thread, and writes whatever is still buffered.
+
+        :return:
+        """
+
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        self.flush()
+        return
+
+    def report(self, uuid: int, status: int, updated_at):
+        """
+        Buffers a telecell's status.
+
+        :param uuid:
+        :param status:
+        :param updated_at: when the status was reported, as a naive UTC datetime.
+        :return:
+        """
+
+        with self._lock:
+            self.reports += 1
+            previous = self._pending.get(uuid)
+
+            if previous is not None:
+                self.coalesced += 1
+
+                # reports can arrive out of order from different gateways - keep the most recent
+                if previous[1] > updated_at:
+                    return
+
+            self._pending[uuid] = (status, updated_at)
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                # the reports are back in the buffer, for the next flush - don't fail the reporter for them
+                self.logger.exception("Failed to write Telecell status reports")
+
+        return
+
+    def flush(self):
+        """
+        Writes all buffered reports to the DB.
+
+        :return: number of telecells written.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            if not pending:
+                return 0
+
+            start = time.perf_counter()
+            table = Telecell.__table__
+            matched = unknown = 0
+            written = []
+            previous_statuses = {}
+
+            try:
+                with self.engine.begin() as connection:
+                    for uuids in chunks(list(pending), MAX_ROWS_PER_UPDATE):
+                        current = {uuid: (status, updated_at) for uuid, status, updated_at in
+                                   connection.execute(select(table.c.uuid, table.c.status, table.c.updated_at)
+                                                      .where(table.c.uuid.in_(uuids)))}
+
+                        unknown += len(uuids) - len(current)
+                        uuids = [uuid for uuid in uuids if uuid in current and
+                                 (current[uuid][1] is None or current[uuid][1] <= pending[uuid][1])]
+
+                        if not uuids:
+                            continue
+
+                        previous_statuses.update({uuid: current[uuid][0] for uuid in uuids})
+                        statuses = {uuid: pending[uuid][0] for uuid in uuids}
+                        timestamps = {uuid: pending[uuid][1] for uuid in uuids}
+
+                        # checked again by the UPDATE, in case another process wrote a newer status since the SELECT
+                        result = connection.execute(table.update()
+                                                    .where(table.c.uuid.in_(uuids))
+                                                    .where(or_(table.c.updated_at.is_(None),
+                                                               table.c.updated_at <= case(timestamps,
+                                                                                          value=table.c.uuid)))
+                                                    .values(status=case(statuses, value=table.c.uuid),
+                                                            updated_at=case(timestamps, value=table.c.uuid)))
+                        matched += result.rowcount
+                        written += uuids
+
+            except Exception:
+                self._requeue(pending)
+                raise
+
+            # cached replies are keyed by UUID as well as ID, and a key is also a tag
+            reply_cache.invalidate(*[("telecell", "uuid", uuid) for uuid in written])
+
+            if self.on_written is not None:
+                with self.engine.connect() as connection:
+                    for uuids in chunks(written, MAX_ROWS_PER_UPDATE):
+                        self.on_written(connection.execute(table.select().where(table.c.uuid.in_(uuids))),
+                                        previous_statuses)
+
+            with self._lock:
+                self.flushes += 1
+                self.rows_written += matched
+                self.unknown += unknown
+                self.stale += len(pending) - unknown - matched
+
+            if unknown:
+                self.logger.warn("{} status reports were for unknown Telecell UUIDs".format(unknown))
+
+            self.logger.debug("Wrote status of {} Telecells in {:.3f}s".format(matched, time.perf_counter() - start))
+            return matched
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "reports": self.reports,
+                "coalesced": self.coalesced,
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "unknown": self.unknown,
+                "stale": self.stale,
+            }
+
+    def _requeue(self, pending: dict):
+        """
+        Puts the reports of a failed flush back in the buffer, unless it has a more recent one of the same telecell.
+
+        :param pending: uuid -> (status, updated_at).
+        :return:
+        """
+
+        with self._lock:
+            for uuid, report in pending.items():
+                buffered = self._pending.get(uuid)
+
+                if buffered is None or buffered[1] < report[1]:
+                    self._pending[uuid] = report
+
+        return
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # the reports are back in the buffer, to be tried again with the next flush
+                self.logger.exception("Failed to write Telecell status reports")
+
+        return
+
@@ -0,0 +1,147 @@
+import grpc
+
+
+class ReadMask:
+    """
+    The fields of a reply that a request's read_mask asks for, as a tree of field names.
+
+    Each prepare_*_message function takes the mask of the message it builds, and only fills in (and only touches the
+    relations needed for) the fields it includes. The handlers' load_options take it too, so that relations left out
+    are not loaded from the DB either.
+
+    Unlike google.protobuf.FieldMask.IsValidForDescriptor, paths may go into repeated message fields, e.g.
+    "elements.asset.id" keeps each of a telecell's elements, but only the ID of their assets. Naming a field of a
+    oneof keeps the whole oneof, so "location" also sends back no_location.
+    """
+
+    def __init__(self, tree: dict = None):
+        """
+        :param tree: field name -> tree of the sub-fields to include, or None to include all of them. None to include
+            every field.
+        """
+
+        self.tree = tree
+        return
+
+    @classmethod
+    def from_paths(cls, paths) -> "ReadMask":
+        """
+        :param paths: e.g. ["id", "basestation.uuid"]. Empty to include every field.
+        :return:
+        """
+
+        if not paths:
+            return FULL
+
+        tree = {}
+
+        for path in paths:
+            node = tree
+            *parents, name = path.split(".")
+
+            for parent in parents:
+                # the whole of the parent is already included
+                if parent in node and node[parent] is None:
+                    break
+
+                node = node.setdefault(parent, {})
+
+            else:
+                node[name] = None
+
+        return cls(tree)
+
+    @property
+    def is_full(self) -> bool:
+        return self.tree is None
+
+    def includes(self, name: str) -> bool:
+        return self.tree is None or name in self.tree
+
+    def child(self, name: str) -> "ReadMask":
+        """
+        :param name: name of a message field.
+        :return: mask of the fields of that message to include.
+        """
+
+        if self.tree is None or self.tree.get(name) is None:
+            return FULL
+
+        return ReadMask(self.tree[name])
+
+    def validate(self, descriptor):
+        """
+        :param descriptor: descriptor of the message the mask applies to.
+        :raises ValueError: if the mask names a field the message doesn't have.
+        :return:
+        """
+
+        for name, subtree in (self.tree or {}).items():
+            field = descriptor.fields_by_name.get(name)
+
+            if field is None:
+                raise ValueError("{} has no field {}".format(descriptor.full_name, name))
+
+            if subtree is not None:
+                if field.message_type is None:
+                    raise ValueError("{}.{} has no sub-fields".format(descriptor.full_name, name))
+
+                ReadMask(subtree).validate(field.message_type)
+
+        return
+
+    def trim(self, message):
+        """
+        Clears the fields of a message that the mask doesn't include.
+
+        :param message:
+        :return: the message.
+        """
+
+        if self.tree is None:
+            return message
+
+        for field in message.DESCRIPTOR.fields:
+            oneof = field.containing_oneof
+            names = [oneof_field.name for oneof_field in oneof.fields] if oneof else [field.name]
+
+            if not any(name in self.tree for name in names):
+                message.ClearField(field.name)
+
+        return message
+
+
+FULL = ReadMask()
+
+
+def read_mask(request, descriptor, context) -> ReadMask:
+    """
+    Parses the read_mask of a request, aborting the RPC with INVALID_ARGUMENT if it names fields the reply doesn't have.
+
+    :param request: a message with a read_mask field.
+    :param descriptor: descriptor of the reply message the mask applies to.
+    :param context:
+    :return:
+    """
+
+    try:
+        return _parse(request, descriptor)
+    except ValueError as e:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid read_mask: {}".format(e))
+
+
+async def read_mask_async(request, descriptor, context) -> ReadMask:
+    """
+    Same as read_mask, for the asyncio server.
+    """
+
+    try:
+        return _parse(request, descriptor)
+    except ValueError as e:
+        await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Invalid read_mask: {}".format(e))
+
+
+def _parse(request, descriptor) -> ReadMask:
+    mask = ReadMask.from_paths(request.read_mask.paths)
+    mask.validate(descriptor)
+    return mask
@@ -0,0 +1,172 @@
+import base64
+import binascii
+
+import grpc
+
+
+def encode_page_token(last_id: int) -> str:
+    """
+    Wraps the ID of the last row a client has seen into an opaque page token.
+
+    :param last_id:
+    :return:
+    """
+
+    return base64.urlsafe_b64encode("id:{}".format(last_id).encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(page_token: str) -> int:
+    """
+    Unwraps a page token made by encode_page_token.
+
+    :param page_token:
+    :return: ID of the last row the client has seen.
+    :raises ValueError: if the token was not made by encode_page_token.
+    """
+
+    try:
+        decoded = base64.urlsafe_b64decode(page_token.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError):
+        raise ValueError("Malformed page token: {}".format(page_token))
+
+    prefix, _, last_id = decoded.partition(":")
+
+    if prefix != "id" or not last_id.lstrip("-").isdigit():
+        raise ValueError("Malformed page token: {}".format(page_token))
+
+    return int(last_id)
+
+
+def paginate(query, id_column, request, context, chunk_size: int):
+    """
+    Applies a List request's page token, offset and limit to a query using keyset pagination, and fetches the result
+    from the DB in chunks.
+
+    Rows are ordered by ID and a page token seeks straight past the last ID the client has seen
+    (WHERE id > last_id ORDER BY id), so every page costs the same as the first one. offset is still honoured for
+    requests without a page token.
+
+    The result is never materialised in one go: each chunk is its own seek from the last ID of the previous chunk, and
+    is handed out before the next one is fetched, so the caller can serialise and stream it straight away and memory
+    use is bounded by the chunk size rather than by the size of the table. One extra row is fetched with each chunk to
+    find out whether anything follows it. The caller should end the session's transaction once it has serialised a
+    chunk (the List handlers commit), or the connection stays checked out while the chunk is streamed.
+
+    :param query: query over the listed entity, with any loader options already applied.
+    :param id_column: primary key column of the listed entity, e.g. Asset.id.
+    :param request: any of the ListRequest messages.
+    :param context:
+    :param chunk_size: maximum number of rows per chunk.
+    :return: generator of (rows, next_page_token) tuples - next_page_token resumes straight after the rows it came
+        with, and is "" once nothing follows.
+    """
+
+    try:
+        cursor = _Cursor(request, chunk_size)
+    except ValueError as e:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return
+
+    query = query.order_by(id_column)
+
+    while not cursor.done:
+        rows, next_page_token = cursor.advance(cursor.next_chunk(query, id_column).all(), id_column)
+
+        if not rows:
+            return
+
+        yield rows, next_page_token
+
+
+async def paginate_async(session, statement, id_column, request, context, chunk_size: int):
+    """
+    Same as paginate, for the asyncio server.
+
+    :param session: AsyncSession to run the queries in.
+    :param statement: select() of the listed entity, with any loader options already applied.
+    :param id_column: primary key column of the listed entity, e.g. Asset.id.
+    :param request: any of the ListRequest messages.
+    :param context:
+    :param chunk_size: maximum number of rows per chunk.
+    :return: async generator of (rows, next_page_token) tuples.
+    """
+
+    try:
+        cursor = _Cursor(request, chunk_size)
+    except ValueError as e:
+        await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return
+
+    statement = statement.order_by(id_column)
+
+    while not cursor.done:
+        result = await session.execute(cursor.next_chunk(statement, id_column))
+        rows, next_page_token = cursor.advance(result.scalars().all(), id_column)
+
+        if not rows:
+            return
+
+        yield rows, next_page_token
+
+
+class _Cursor:
+    """
+    Where paginate has got to in the listing: the last ID handed out, and how many rows the request still wants.
+    """
+
+    def __init__(self, request, chunk_size: int):
+        """
+        :param request: any of the ListRequest messages.
+        :param chunk_size:
+        :raises ValueError: if the request's page token is malformed.
+        """
+
+        self.chunk_size = chunk_size
+        self.last_id = decode_page_token(request.page_token) if request.page_token else None
+        self.offset = request.offset if not request.page_token else 0
+
+        # None means no limit
+        self.remaining = request.limit or None
+        self.done = False
+        return
+
+    def _size(self) -> int:
+        return self.chunk_size if self.remaining is None else min(self.chunk_size, self.remaining)
+
+    def next_chunk(self, query, id_column):
+        """
+        :param query: ordered Query or select() statement.
+        :param id_column:
+        :return: the query for the next chunk, with one extra row to find out whether anything follows it.
+        """
+
+        if self.last_id is not None:
+            query = query.filter(id_column > self.last_id)
+
+        elif self.offset:
+            query = query.offset(self.offset)
+
+        return query.limit(self._size() + 1)
+
+    def advance(self, rows: list, id_column) -> tuple:
+        """
+        Moves past a chunk fetched with the query from next_chunk.
+
+        :param rows:
+        :param id_column:
+        :return: the rows of the chunk without the extra row, and the token to resume after them.
+        """
+
+        size = self._size()
+        more = len(rows) > size
+        rows = rows[:size]
+
+        if rows:
+            self.last_id = getattr(rows[-1], id_column.key)
+
+            if self.remaining is not None:
+                self.remaining -= len(rows)
+
+        self.done = not more or self.remaining == 0
+
+        return rows, encode_page_token(self.last_id) if more else ""
@@ -0,0 +1,452 @@
+import heapq
+import math
+import threading
+from collections import Counter
+
+# size (in degrees) of each square cell of the grid
+DEFAULT_CELL_SIZE = 0.1
+
+# mean radius of the Earth, in metres
+EARTH_RADIUS = 6371008.8
+
+# number of neighbours SearchNearest finds if the request doesn't say, and at most
+DEFAULT_NEAREST = 10
+MAX_NEAREST = 1000
+
+
+class Cluster:
+    """
+    A group of points: how many there are, their centroid, and how many of them are in each status.
+    """
+
+    __slots__ = ("count", "longitude_sum", "latitude_sum", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.longitude_sum = 0.0
+        self.latitude_sum = 0.0
+
+        # status -> number of points. Points without a status aren't counted in here.
+        self.statuses = Counter()
+        return
+
+    @property
+    def centroid(self) -> tuple:
+        """
+        :return: (longitude, latitude) - the mean of the points' coordinates.
+        """
+
+        return self.longitude_sum / self.count, self.latitude_sum / self.count
+
+    def add(self, longitude: float, latitude: float, status: int = None):
+        self.count += 1
+        self.longitude_sum += longitude
+        self.latitude_sum += latitude
+
+        if status is not None:
+            self.statuses[status] += 1
+
+        return
+
+    def discard(self, longitude: float, latitude: float, status: int = None):
+        self.count -= 1
+        self.longitude_sum -= longitude
+        self.latitude_sum -= latitude
+
+        if status is not None:
+            self.statuses[status] -= 1
+
+            if not self.statuses[status]:
+                del self.statuses[status]
+
+        return
+
+    def merge(self, other):
+        """
+        Adds all points of another cluster to this one.
+
+        :param other: Cluster
+        :return:
+        """
+
+        self.count += other.count
+        self.longitude_sum += other.longitude_sum
+        self.latitude_sum += other.latitude_sum
+        self.statuses.update(other.statuses)
+        return
+
+
+class SpatialIndex:
+    """
+    In-memory grid index over the (longitude, latitude) of rows in a table, keyed by the rows' IDs.
+
+    Space is divided into square cells, and every cell remembers the IDs of the points that fall in it. A bounding box
+    query then only has to look at the cells that overlap the box, and only has to check coordinates for points in the
+    cells on the edges of the box.
+
+    The handlers own the index and keep it in sync with the DB whenever a row's location changes, so that
+    SearchByLocation can find matching IDs without scanning the table and only hydrate those rows.
+
+    Points can also carry the status of their row (if the handler keeps it up to date), and every cell keeps a Cluster
+    of its points, so that cluster can summarise a box by only looking at individual points in the cells on its edges.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+
+        # (x, y) of cell -> set of IDs of points in that cell
+        self._cells = {}
+
+        # ID -> (longitude, latitude)
+        self._points = {}
+
+        # ID -> status, for points that have one
+        self._statuses = {}
+
+        # (x, y) of cell -> Cluster of the points in that cell
+        self._clusters = {}
+
+        self._lock = threading.RLock()
+        return
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, longitude: float, latitude: float) -> tuple:
+        return int(math.floor(longitude / self.cell_size)), int(math.floor(latitude / self.cell_size))
+
+    def load(self, rows):
+        """
+        Replaces the contents of the index.
+
+        :param rows: iterable of (id, longitude, latitude), or of (id, longitude, latitude, status), e.g. a query over
+            those columns. Rows without a location are skipped.
+        :return:
+        """
+
+        cells, points, statuses, clusters = {}, {}, {}, {}
+
+        for row_id, longitude, latitude, *status in rows:
+            if longitude is None or latitude is None:
+                continue
+
+            cell = self._cell(longitude, latitude)
+            status = status[0] if status else None
+
+            points[row_id] = (longitude, latitude)
+            cells.setdefault(cell, set()).add(row_id)
+            clusters.setdefault(cell, Cluster()).add(longitude, latitude, status)
+
+            if status is not None:
+                statuses[row_id] = status
+
+        with self._lock:
+            self._cells, self._points, self._statuses, self._clusters = cells, points, statuses, clusters
+
+        return
+
+    def insert(self, row_id: int, longitude: float = None, latitude: float = None, status: int = None):
+        """
+        Adds a point to the index, or moves it (or changes its status) if it is there already.
+
+        A point without a location is taken out of the index, as it can never match a bounding box.
+
+        :param row_id:
+        :param longitude:
+        :param latitude:
+        :param status: status of the row, for cluster.
+        :return:
+        """
+
+        with self._lock:
+            self._discard(row_id)
+
+            if longitude is None or latitude is None:
+                return
+
+            cell = self._cell(longitude, latitude)
+
+            self._points[row_id] = (longitude, latitude)
+            self._cells.setdefault(cell, set()).add(row_id)
+            self._clusters.setdefault(cell, Cluster()).add(longitude, latitude, status)
+
+            if status is not None:
+                self._statuses[row_id] = status
+
+        return
+
+    def remove(self, row_id: int):
+        """
+        Takes a point out of the index. Does nothing if it is not there.
+
+        :param row_id:
+        :return:
+        """
+
+        with self._lock:
+            self._discard(row_id)
+
+        return
+
+    def _discard(self, row_id: int):
+        point = self._points.pop(row_id, None)
+
+        if point is None:
+            return
+
+        cell = self._cell(*point)
+        ids = self._cells[cell]
+        ids.discard(row_id)
+
+        if not ids:
+            del self._cells[cell]
+            del self._clusters[cell]
+
+        else:
+            self._clusters[cell].discard(*point, self._statuses.get(row_id))
+
+        self._statuses.pop(row_id, None)
+        return
+
+    def search(self, left: float, bottom: float, right: float, top: float) -> list:
+        """
+        Finds all points inside a bounding box (edges included).
+
+        :param left: smallest longitude.
+        :param bottom: smallest latitude.
+        :param right: largest longitude.
+        :param top: largest latitude.
+        :return: sorted list of IDs.
+        """
+
+        x_lo, y_lo = self._cell(left, bottom)
+        x_hi, y_hi = self._cell(right, top)
+
+        matches = []
+
+        with self._lock:
+            for (x, y), ids in self._occupied(x_lo, y_lo, x_hi, y_hi):
+                # cells strictly inside the box can't have any points outside of it
+                if x_lo < x < x_hi and y_lo < y < y_hi:
+                    matches.extend(ids)
+                    continue
+
+                for row_id in ids:
+                    longitude, latitude = self._points[row_id]
+
+                    if left <= longitude <= right and bottom <= latitude <= top:
+                        matches.append(row_id)
+
+        matches.sort()
+        return matches
+
+    def cluster(self, left: float, bottom: float, right: float, top: float, cell_size: float) -> tuple:
+        """
+        Groups the points inside a bounding box (edges included) by the square cells of a grid.
+
+        Cells at least as big as the index's own are rounded up to a whole number of them, so that cells of the index
+        strictly inside the box are summarised without looking at their points at all.
+
+        :param left: smallest longitude.
+        :param bottom: smallest latitude.
+        :param right: largest longitude.
+        :param top: largest latitude.
+        :param cell_size: side of the grid's cells, in degrees.
+        :return: the side of the cells used, and a dict of (x, y) of cell -> Cluster, with the cells of that size
+            numbered like the index's - i.e. cell (x, y) spans longitudes from x * size to (x + 1) * size.
+        """
+
+        # number of the index's cells per side of a cluster cell, or 0 if clusters are smaller than those
+        ratio = math.ceil(cell_size / self.cell_size - 1e-9) if cell_size >= self.cell_size else 0
+
+        if ratio >= 1:
+            cell_size = ratio * self.cell_size
+
+        x_lo, y_lo = self._cell(left, bottom)
+        x_hi, y_hi = self._cell(right, top)
+
+        clusters = {}
+
+        with self._lock:
+            for (x, y), ids in self._occupied(x_lo, y_lo, x_hi, y_hi):
+                if ratio >= 1 and x_lo < x < x_hi and y_lo < y < y_hi:
+                    clusters.setdefault((x // ratio, y // ratio), Cluster()).merge(self._clusters[(x, y)])
+                    continue
+
+                for row_id in ids:
+                    longitude, latitude = self._points[row_id]
+
+                    if not (left <= longitude <= right and bottom <= latitude <= top):
+                        continue
+
+                    if ratio >= 1:
+                        cell = x // ratio, y // ratio
+                    else:
+                        cell = int(math.floor(longitude / cell_size)), int(math.floor(latitude / cell_size))
+
+                    clusters.setdefault(cell, Cluster()).add(longitude, latitude, self._statuses.get(row_id))
+
+        return cell_size, clusters
+
+    def nearest(self, longitude: float, latitude: float, k: int, max_distance: float = None) -> list:
+        """
+        Finds the points closest to a location, along the surface of the Earth.
+
+        Best-first search over rings of cells around the location's cell: a ring's points are only looked at once
+        every point found so far that is closer than the nearest the ring could possibly be has been taken, so only
+        the cells around the location are visited (unless the points are sparse, when all remaining cells are visited
+        at once). Longitudes are not wrapped around the antimeridian.
+
+        :param longitude:
+        :param latitude:
+        :param k: most points to find.
+        :param max_distance: only find points within this many metres, if set.
+        :return: list of (distance in metres, ID), nearest first.
+        """
+
+        x, y = self._cell(longitude, latitude)
+
+        # (lower bound on distance, 0, ring) of rings of cells not yet looked at, and (distance, 1, ID) of points
+        heap = [(0.0, 0, 0)]
+        found = []
+
+        while heap and len(found) < k:
+            distance, is_point, item = heapq.heappop(heap)
+
+            if max_distance is not None and distance > max_distance:
+                break
+
+            if is_point:
+                found.append((distance, item))
+                continue
+
+            ring = item
+
+            with self._lock:
+                # once a ring would have more cells than there are occupied cells, look at what's left all at once
+                rest = 8 * ring > len(self._cells)
+
+                if rest:
+                    cells = [(cell, ids) for cell, ids in self._cells.items()
+                             if max(abs(cell[0] - x), abs(cell[1] - y)) >= ring]
+                else:
+                    cells = [(cell, self._cells[cell]) for cell in self._ring(x, y, ring) if cell in self._cells]
+
+                points = [(row_id, self._points[row_id]) for _, ids in cells for row_id in ids]
+
+            for row_id, (point_longitude, point_latitude) in points:
+                heapq.heappush(heap, (haversine(longitude, latitude, point_longitude, point_latitude), 1, row_id))
+
+            if not rest:
+                heapq.heappush(heap, (self._ring_distance(longitude, latitude, x, y, ring + 1), 0, ring + 1))
+
+        return found
+
+    @staticmethod
+    def _ring(x: int, y: int, ring: int) -> list:
+        """
+        :return: the cells ring cells away from (x, y) either way, i.e. on the edges of a square around it.
+        """
+
+        if ring == 0:
+            return [(x, y)]
+
+        cells = [(x + dx, y + dy) for dx in (-ring, ring) for dy in range(-ring, ring + 1)]
+        cells.extend((x + dx, y + dy) for dx in range(-ring + 1, ring) for dy in (-ring, ring))
+
+        return cells
+
+    def _ring_distance(self, longitude: float, latitude: float, x: int, y: int, ring: int) -> float:
+        """
+        :return: lower bound, in metres, on the distance from a location in cell (x, y) to any point ring or more cells
+            away from it.
+        """
+
+        # the square of cells closer than the ring, which the location is inside of
+        left, right = (x - ring + 1) * self.cell_size, (x + ring) * self.cell_size
+        bottom, top = (y - ring + 1) * self.cell_size, (y + ring) * self.cell_size
+
+        # a point above or below the square is at least as far as along the meridian...
+        latitude_gap = math.radians(min(latitude - bottom, top - latitude))
+
+        # ... and one to the left or right of it at least as far as the meridian on that edge
+        longitude_gap = math.radians(min(longitude - left, right - longitude, 90))
+        across = math.asin(min(1.0, math.cos(math.radians(latitude)) * math.sin(longitude_gap)))
+
+        return EARTH_RADIUS * max(0.0, min(latitude_gap, across))
+
+    def _occupied(self, x_lo: int, y_lo: int, x_hi: int, y_hi: int) -> list:
+        """
+        To be called holding the lock.
+
+        :return: list of ((x, y), IDs) of the cells with points in them between two cells (included).
+        """
+
+        # for huge boxes, walking the occupied cells is cheaper than walking every cell in the box
+        if (x_hi - x_lo + 1) * (y_hi - y_lo + 1) > len(self._cells):
+            return [(cell, ids) for cell, ids in self._cells.items()
+                    if x_lo <= cell[0] <= x_hi and y_lo <= cell[1] <= y_hi]
+
+        return [((x, y), self._cells[(x, y)]) for x in range(x_lo, x_hi + 1) for y in range(y_lo, y_hi + 1)
+                if (x, y) in self._cells]
+
+
+def bounding_box(rectangle) -> tuple:
+    """
+    Normalises a lighting.location.MapRect, whose corners may come in any order.
+
+    :param rectangle:
+    :return: (left, bottom, right, top), i.e. smallest longitude, smallest latitude, largest longitude and largest
+        latitude.
+    """
+
+    left = min(rectangle.lo.long, rectangle.hi.long)
+    right = max(rectangle.lo.long, rectangle.hi.long)
+    top = max(rectangle.lo.lat, rectangle.hi.lat)
+    bottom = min(rectangle.lo.lat, rectangle.hi.lat)
+
+    return left, bottom, right, top
+
+
+def haversine(longitude: float, latitude: float, other_longitude: float, other_latitude: float) -> float:
+    """
+    :return: great-circle distance between two locations, in metres.
+    """
+
+    longitude, latitude, other_longitude, other_latitude = map(math.radians,
+                                                               (longitude, latitude, other_longitude, other_latitude))
+
+    a = math.sin((other_latitude - latitude) / 2) ** 2 \
+        + math.cos(latitude) * math.cos(other_latitude) * math.sin((other_longitude - longitude) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def neighbours(index: SpatialIndex, request) -> list:
+    """
+    Finds what a lighting.location.NearestRequest asks for.
+
+    :param index: the location index of the service searched.
+    :param request:
+    :return: list of (distance in metres, ID), nearest first.
+    """
+
+    k = min(request.k or DEFAULT_NEAREST, MAX_NEAREST)
+    max_distance = request.max_distance if request.max_distance > 0 else None
+
+    return index.nearest(request.location.long, request.location.lat, k, max_distance)
+
+
+def chunks(ids: list, size: int):
+    """
+    Splits a list of IDs into consecutive chunks, so that rows can be hydrated with bounded IN (...) queries.
+
+    :param ids:
+    :param size:
+    :return: generator of lists of at most size IDs.
+    """
+
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
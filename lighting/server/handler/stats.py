@@ -0,0 +1,100 @@
+import logging
+import os
+from collections import defaultdict
+
+import lighting.lib.stats_pb2 as stats_pb2
+from dbHandler import engine
+from lighting.lib.stats_pb2_grpc import StatsServicer
+from log import setup_logger
+from .counters import Reconciler, fleet_counters
+from .spatial import bounding_box
+
+
+class StatsHandler(StatsServicer):
+    # seconds between recounts of the fleet counters from the DB
+    RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL") or 60)
+
+    def __init__(self):
+        self.logger = setup_logger("statsHandler", logging.DEBUG)
+        self.counters = fleet_counters
+
+        # the write paths keep the counters up to date in between
+        self.reconciler = Reconciler(engine, self.counters, self.RECONCILE_INTERVAL)
+        self.reconciler.start()
+        return
+
+    def close(self):
+        """
+        Stops recounting. To be called once the server has stopped.
+
+        :return:
+        """
+
+        self.reconciler.stop()
+        return
+
+    def Aggregate(self, request, context):
+        """
+        Counts telecells and elements by status, from the fleet counters rather than the DB.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        box = bounding_box(request.rectangle) if request.HasField("rectangle") else None
+        telecells = self.counters.summarise("telecell", box, request.basestation_id)
+        elements = self.counters.summarise("element", box, request.basestation_id)
+
+        aggregate_reply = stats_pb2.AggregateReply()
+        aggregate_reply.total.telecells.extend(self.status_counts(telecells["status"]))
+        aggregate_reply.total.elements.extend(self.status_counts(elements["status"]))
+
+        if request.by_basestation:
+            telecell_basestations = self.split(telecells["basestation"])
+            element_basestations = self.split(elements["basestation"])
+
+            for bs_id in sorted(set(telecell_basestations).union(element_basestations), key=lambda bs_id: bs_id or 0):
+                aggregate_reply.basestations.add(basestation_id=bs_id or 0,
+                                                 telecells=self.status_counts(telecell_basestations.get(bs_id, {})),
+                                                 elements=self.status_counts(element_basestations.get(bs_id, {})))
+
+        if request.by_region:
+            telecell_cells, element_cells = self.split(telecells["cell"]), self.split(elements["cell"])
+
+            for cell in sorted(set(telecell_cells).union(element_cells).difference([None])):
+                left, bottom, right, top = self.counters.cell_bounds(cell)
+                region = aggregate_reply.regions.add()
+
+                region.rectangle.lo.long, region.rectangle.lo.lat = left, bottom
+                region.rectangle.hi.long, region.rectangle.hi.lat = right, top
+                region.counts.telecells.extend(self.status_counts(telecell_cells.get(cell, {})))
+                region.counts.elements.extend(self.status_counts(element_cells.get(cell, {})))
+
+        if self.counters.reconciled_at is not None:
+            aggregate_reply.reconciled_at.FromDatetime(self.counters.reconciled_at)
+
+        return aggregate_reply
+
+    @staticmethod
+    def split(counts: dict) -> dict:
+        """
+        :param counts: number of rows by (group, status).
+        :return: number of rows by status, by group.
+        """
+
+        groups = defaultdict(dict)
+
+        for (group, status), count in counts.items():
+            groups[group][status] = count
+
+        return groups
+
+    @staticmethod
+    def status_counts(counts: dict) -> list:
+        """
+        :param counts: number of rows by status.
+        :return: StatusCount messages, ordered by status.
+        """
+
+        return [stats_pb2.StatusCount(status=status, count=count) for status, count in sorted(counts.items())]
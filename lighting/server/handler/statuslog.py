@@ -0,0 +1,573 @@
+import calendar
+import fcntl
+import logging
+import os
+import shutil
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import attrgetter
+
+from log import setup_logger
+
+# seconds in a day
+DAY = 86400
+
+# (name, array typecode) of the columns of each table. Columns are stored widest first, so that each starts aligned.
+TRANSITIONS = (("at", "d"), ("telecell_id", "i"), ("basestation_id", "i"), ("status", "h"), ("previous_status", "h"))
+ROLLUPS = (("seconds", "d"), ("telecell_id", "i"), ("basestation_id", "i"), ("entered", "i"), ("status", "h"),
+           ("flags", "B"))
+
+# a telecell changing status: when (seconds since the epoch), the telecell, its basestation (0 if none), the status
+# it changed to and the one it changed from
+Transition = namedtuple("Transition", [name for name, _ in TRANSITIONS])
+
+# a day of a telecell that changed status that day: the seconds it spent in a status, and how many times it changed
+# to it
+Rollup = namedtuple("Rollup", [name for name, _ in ROLLUPS])
+
+# Rollup.flags: the status the telecell was in at the start and at the end of the day
+OPENING, CLOSING = 1, 2
+
+# transitions as they are appended to the day's file of each server process, one packed row at a time
+RAW_ROW = struct.Struct("<" + "".join(typecode for _, typecode in TRANSITIONS))
+
+# number of rows at the start of a table file
+ROW_COUNT = struct.Struct("<Q")
+
+# how long after the end of a day its transitions are compacted - giving writes buffered at midnight time to land
+COMPACT_DELAY = 600
+
+
+class StatusLog:
+    """
+    Append-only history of telecell status transitions, stored in local files partitioned by day.
+
+    Transitions are buffered in memory and appended to a file per day and server process (raw/<day>/<pid>.bin), one
+    packed row per transition. Once a day is over, the transitions of all processes are compacted into a table sorted by
+    telecell (days/<day>.transitions), and rolled up into the seconds each telecell that changed status that day spent
+    in each status (days/<day>.rollup). Tables are stored column by column, so a lookup only reads the telecell ID
+    column to find its rows by binary search, then those rows of the other columns.
+
+    Transitions are kept for raw_days, and rollups for rollup_days, which bounds the storage used. Queries over ranges
+    older than raw_days (or with too many transitions) are answered from rollups.
+
+    Safe to use from multiple threads; several server processes can share a directory.
+    """
+
+    def __init__(self, directory: str, raw_days: int, rollup_days: int, flush_interval: float,
+                 max_pending: int = 10000):
+        """
+        :param directory: where to store the files.
+        :param raw_days: days transitions are kept for.
+        :param rollup_days: days rollups are kept for.
+        :param flush_interval: most seconds a transition is buffered in memory for.
+        :param max_pending: number of transitions buffered that triggers a write.
+        """
+
+        self.directory = directory
+        self.raw_days = raw_days
+        self.rollup_days = rollup_days
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.logger = setup_logger("statusLog", logging.DEBUG)
+
+        # rows of RAW_ROW not written yet
+        self._pending = []
+
+        self.recorded = 0
+        self.flushes = 0
+        self.compactions = 0
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread = None
+        return
+
+    def start(self):
+        """
+        Starts writing buffered transitions every flush_interval seconds, and compacting days once they are over, in a
+        background thread.
+
+        :return:
+        """
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-log", daemon=True)
+        self._thread.start()
+        return
+
+    def stop(self):
+        """
+        Stops the background thread, and writes whatever is still buffered.
+
+        :return:
+        """
+
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        self.flush()
+        return
+
+    def record(self, telecell_id: int, basestation_id: int, status: int, previous_status: int, at: float = None):
+        """
+        Buffers a status transition. Does nothing if the status hasn't changed.
+
+        :param telecell_id:
+        :param basestation_id: None if the telecell has no basestation.
+        :param status:
+        :param previous_status:
+        :param at: seconds since the epoch - now if not set.
+        :return:
+        """
+
+        if status == previous_status:
+            return
+
+        row = (time.time() if at is None else at, telecell_id, basestation_id or 0, status or 0, previous_status or 0)
+
+        with self._lock:
+            self._pending.append(row)
+            self.recorded += 1
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            self.flush()
+
+        return
+
+    def flush(self):
+        """
+        Appends all buffered transitions to this process's file of the day they happened on.
+
+        :return: number of transitions written.
+        """
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+
+            if not pending:
+                return 0
+
+            rows_by_day = defaultdict(bytearray)
+
+            for row in pending:
+                rows_by_day[day_of(row[0])].extend(RAW_ROW.pack(*row))
+
+            for day, rows in rows_by_day.items():
+                raw_directory = self._path("raw", day.isoformat())
+                os.makedirs(raw_directory, exist_ok=True)
+
+                with open(os.path.join(raw_directory, "{}.bin".format(os.getpid())), "ab") as raw_file:
+                    raw_file.write(rows)
+
+            with self._lock:
+                self.flushes += 1
+
+        return len(pending)
+
+    def has_transitions(self, day: date) -> bool:
+        """
+        :param day:
+        :return: whether the transitions of the day are still kept, rather than only its rollup.
+        """
+
+        return day >= today() - timedelta(days=self.raw_days)
+
+    def transitions(self, start: float, end: float, telecell_id: int = None, basestation_id: int = None) -> list:
+        """
+        :param start: seconds since the epoch.
+        :param end: seconds since the epoch.
+        :param telecell_id: only the transitions of this telecell...
+        :param basestation_id: ... or only those of telecells while they were connected to this basestation.
+        :return: transitions between start (included) and end (excluded), ordered by time.
+        """
+
+        found = []
+        day = day_of(start)
+
+        while day <= day_of(end):
+            found.extend(transition for transition in self._day_transitions(day, telecell_id, basestation_id)
+                         if start <= transition.at < end)
+            day += timedelta(days=1)
+
+        found.sort(key=attrgetter("at"))
+        return found
+
+    def durations(self, first_day: date, last_day: date, bucket_days: int, statuses: dict, telecell_id: int = None,
+                  basestation_id: int = None) -> list:
+        """
+        Adds up the seconds telecells spent in each status over buckets of whole days, from the daily rollups.
+
+        Telecells are taken to have stayed in the status they ended a day in until their next transition. Those with no
+        transition in the range are taken to have been in the status they left by their first transition after it, or
+        if they have none since either, in the status given in statuses.
+
+        :param first_day:
+        :param last_day: included.
+        :param bucket_days: days per bucket.
+        :param statuses: current status of the telecells to include even without transitions in the range, by ID.
+        :param telecell_id: only count this telecell...
+        :param basestation_id: ... or only telecells connected to this basestation.
+        :return: list of (first day, last day, {status: [seconds, times entered]}) of each bucket. Days after today are
+            left out, and today only counts up to now.
+        """
+
+        now, last_day = time.time(), min(last_day, today())
+        days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+        # day -> telecell ID -> rollup rows
+        rollups = {day: _by_telecell(self._day_rollups(day, telecell_id, basestation_id)) for day in days}
+
+        # status each telecell is in at the start of the range
+        opening = {}
+
+        for day in days:
+            for tc_id, rows in rollups[day].items():
+                opening.setdefault(tc_id, next(row.status for row in rows if row.flags & OPENING))
+
+        missing = set(statuses).difference(opening)
+        opening.update(self._opening_after(last_day + timedelta(days=1), missing, basestation_id))
+        opening.update((tc_id, status) for tc_id, status in statuses.items() if tc_id not in opening)
+
+        buckets = []
+        current = dict(opening)
+
+        for offset in range(0, len(days), bucket_days):
+            bucket = defaultdict(lambda: [0.0, 0])
+
+            for day in days[offset:offset + bucket_days]:
+                day_length = min(DAY, now - day_start(day))
+
+                for tc_id, status in current.items():
+                    rows = rollups[day].get(tc_id)
+
+                    if rows is None:
+                        bucket[status][0] += day_length
+                        continue
+
+                    for row in rows:
+                        bucket[row.status][0] += row.seconds
+                        bucket[row.status][1] += row.entered
+
+                        if row.flags & CLOSING:
+                            current[tc_id] = row.status
+
+            bucket_range = days[offset:offset + bucket_days]
+            buckets.append((bucket_range[0], bucket_range[-1], dict(bucket)))
+
+        return buckets
+
+    def compact(self):
+        """
+        Compacts the transitions of days that are over, and drops the files of days no longer kept.
+
+        Only one process sharing the directory compacts at a time; the others skip it.
+
+        :return:
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(self._path("compact.lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+
+            raw_directory = self._path("raw")
+
+            for name in sorted(os.listdir(raw_directory)) if os.path.isdir(raw_directory) else []:
+                day = date.fromisoformat(name)
+
+                if time.time() >= day_start(day) + DAY + COMPACT_DELAY:
+                    self._compact_day(day)
+
+            days_directory = self._path("days")
+
+            for name in sorted(os.listdir(days_directory)) if os.path.isdir(days_directory) else []:
+                day, _, table = name.partition(".")
+                kept_for = self.raw_days if table == "transitions" else self.rollup_days
+
+                if date.fromisoformat(day) < today() - timedelta(days=kept_for):
+                    os.remove(os.path.join(days_directory, name))
+
+        return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "recorded": self.recorded,
+                "pending": len(self._pending),
+                "flushes": self.flushes,
+                "compactions": self.compactions,
+            }
+
+    def _compact_day(self, day: date):
+        """
+        Merges the day's raw files (and its table, if a late write made it compact the day again) into its tables.
+        """
+
+        transitions = self._raw_transitions(day)
+        table_path = self._path("days", "{}.transitions".format(day.isoformat()))
+
+        if os.path.exists(table_path):
+            transitions.extend(read_table(table_path, TRANSITIONS, Transition))
+
+        transitions.sort(key=attrgetter("telecell_id", "at"))
+
+        os.makedirs(self._path("days"), exist_ok=True)
+        write_table(table_path, TRANSITIONS, transitions)
+        write_table(self._path("days", "{}.rollup".format(day.isoformat())), ROLLUPS,
+                    roll_up(transitions, day_start(day), day_start(day) + DAY))
+
+        shutil.rmtree(self._path("raw", day.isoformat()), ignore_errors=True)
+
+        with self._lock:
+            self.compactions += 1
+
+        self.logger.debug("Compacted {} status transitions of {}".format(len(transitions), day.isoformat()))
+        return
+
+    def _day_transitions(self, day: date, telecell_id: int = None, basestation_id: int = None) -> list:
+        """
+        :return: transitions of a day, from its table and from raw files not compacted yet.
+        """
+
+        found = [transition for transition in self._raw_transitions(day)
+                 if _matches(transition, telecell_id, basestation_id)]
+
+        table_path = self._path("days", "{}.transitions".format(day.isoformat()))
+
+        if os.path.exists(table_path):
+            found.extend(read_table(table_path, TRANSITIONS, Transition, telecell_id, basestation_id))
+
+        return found
+
+    def _day_rollups(self, day: date, telecell_id: int = None, basestation_id: int = None) -> list:
+        """
+        :return: rollups of a day, rolled up on the fly if the day hasn't been compacted yet.
+        """
+
+        rollup_path = self._path("days", "{}.rollup".format(day.isoformat()))
+
+        if os.path.exists(rollup_path) and not os.path.isdir(self._path("raw", day.isoformat())):
+            return read_table(rollup_path, ROLLUPS, Rollup, telecell_id, basestation_id)
+
+        transitions = sorted(self._day_transitions(day, telecell_id, basestation_id),
+                             key=attrgetter("telecell_id", "at"))
+
+        return roll_up(transitions, day_start(day), min(day_start(day) + DAY, time.time()))
+
+    def _raw_transitions(self, day: date) -> list:
+        raw_directory = self._path("raw", day.isoformat())
+        transitions = []
+
+        for name in sorted(os.listdir(raw_directory)) if os.path.isdir(raw_directory) else []:
+            with open(os.path.join(raw_directory, name), "rb") as raw_file:
+                rows = raw_file.read()
+
+            # a write cut short, e.g. by a crash, leaves part of a row at the end
+            rows = rows[:len(rows) - len(rows) % RAW_ROW.size]
+            transitions.extend(Transition(*row) for row in RAW_ROW.iter_unpack(rows))
+
+        return transitions
+
+    def _opening_after(self, day: date, telecell_ids: set, basestation_id: int = None) -> dict:
+        """
+        :return: status the telecells left by their first transition from day on, by ID, for those that have one.
+        """
+
+        found = {}
+
+        while telecell_ids and day <= today():
+            if len(telecell_ids) == 1:
+                rollups = self._day_rollups(day, telecell_id=next(iter(telecell_ids)))
+            else:
+                rollups = self._day_rollups(day, basestation_id=basestation_id)
+
+            for row in rollups:
+                if row.telecell_id in telecell_ids and row.flags & OPENING:
+                    found[row.telecell_id] = row.status
+                    telecell_ids = telecell_ids - {row.telecell_id}
+
+            day += timedelta(days=1)
+
+        return found
+
+    def _path(self, *names) -> str:
+        return os.path.join(self.directory, *names)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.compact()
+            except Exception:
+                # keep buffering, and try again next time
+                self.logger.exception("Failed to write status history")
+
+        return
+
+
+def roll_up(transitions: list, start: float, end: float) -> list:
+    """
+    :param transitions: transitions of a day, ordered by telecell then time.
+    :param start: start of the day, in seconds since the epoch.
+    :param end: end of the day, or now if it's today.
+    :return: Rollup rows of each telecell with transitions, ordered by telecell then status.
+    """
+
+    rollups = []
+
+    for telecell_id, changes in groupby(transitions, key=attrgetter("telecell_id")):
+        changes = list(changes)
+        seconds, entered = defaultdict(float), Counter()
+        since, status = start, changes[0].previous_status
+
+        for change in changes:
+            seconds[status] += change.at - since
+            since, status = change.at, change.status
+            entered[status] += 1
+
+        seconds[status] += end - since
+        opening, closing = changes[0].previous_status, status
+
+        for status in sorted(seconds):
+            flags = (OPENING if status == opening else 0) | (CLOSING if status == closing else 0)
+            rollups.append(Rollup(seconds[status], telecell_id, changes[-1].basestation_id, entered[status], status,
+                                  flags))
+
+    return rollups
+
+
+def write_table(path: str, columns: tuple, rows: list):
+    """
+    Writes rows as a table file: the number of rows, then each column as a packed array. The file is replaced at once.
+
+    :param path:
+    :param columns: (name, array typecode) of each column.
+    :param rows: tuples of the columns' values.
+    :return:
+    """
+
+    arrays = [array(typecode) for _, typecode in columns]
+
+    for row in rows:
+        for values, value in zip(arrays, row):
+            values.append(value)
+
+    temporary_path = "{}.{}.tmp".format(path, os.getpid())
+
+    with open(temporary_path, "wb") as table_file:
+        table_file.write(ROW_COUNT.pack(len(rows)))
+
+        for values in arrays:
+            values.tofile(table_file)
+
+    os.replace(temporary_path, path)
+    return
+
+
+def read_table(path: str, columns: tuple, row_type, telecell_id: int = None, basestation_id: int = None) -> list:
+    """
+    Reads the rows of a table file, sorted by telecell ID.
+
+    :param path:
+    :param columns: (name, array typecode) of each column, as written.
+    :param row_type: namedtuple to read rows as.
+    :param telecell_id: only read the rows of this telecell - found by binary search...
+    :param basestation_id: ... or only those of this basestation.
+    :return: list of row_type.
+    """
+
+    with open(path, "rb") as table_file:
+        count, = ROW_COUNT.unpack(table_file.read(ROW_COUNT.size))
+        offsets, offset = {}, ROW_COUNT.size
+
+        for name, typecode in columns:
+            offsets[name] = offset
+            offset += count * array(typecode).itemsize
+
+        def read_column(name, typecode, first, last):
+            values = array(typecode)
+            table_file.seek(offsets[name] + first * values.itemsize)
+            values.frombytes(table_file.read((last - first) * values.itemsize))
+            return values
+
+        first, last, selected = 0, count, None
+
+        if telecell_id is not None:
+            telecell_ids = read_column("telecell_id", "i", 0, count)
+            first, last = bisect_left(telecell_ids, telecell_id), bisect_right(telecell_ids, telecell_id)
+
+        elif basestation_id is not None:
+            selected = [index for index, bs_id in enumerate(read_column("basestation_id", "i", 0, count))
+                        if bs_id == basestation_id]
+
+        values = [read_column(name, typecode, first, last) for name, typecode in columns]
+
+    rows = [row_type(*row) for row in zip(*values)]
+
+    if selected is not None:
+        rows = [rows[index] for index in selected]
+
+    return rows
+
+
+def day_of(at: float) -> date:
+    """
+    :param at: seconds since the epoch.
+    :return: the UTC day.
+    """
+
+    return datetime.utcfromtimestamp(at).date()
+
+
+def day_start(day: date) -> float:
+    """
+    :return: start of a UTC day, in seconds since the epoch.
+    """
+
+    return float(calendar.timegm(day.timetuple()))
+
+
+def today() -> date:
+    return day_of(time.time())
+
+
+def _matches(transition: Transition, telecell_id: int = None, basestation_id: int = None) -> bool:
+    if telecell_id is not None:
+        return transition.telecell_id == telecell_id
+
+    if basestation_id is not None:
+        return transition.basestation_id == basestation_id
+
+    return True
+
+
+def _by_telecell(rollups: list) -> dict:
+    by_telecell = defaultdict(list)
+
+    for row in rollups:
+        by_telecell[row.telecell_id].append(row)
+
+    return by_telecell
+
+
+# Status transitions of all telecells, recorded by the handlers' write paths.
+status_log = StatusLog(os.getenv("STATUS_HISTORY_DIR") or "status-history",
+                       raw_days=int(os.getenv("STATUS_HISTORY_RAW_DAYS") or 31),
+                       rollup_days=int(os.getenv("STATUS_HISTORY_ROLLUP_DAYS") or 730),
+                       flush_interval=float(os.getenv("STATUS_HISTORY_FLUSH_INTERVAL") or 5))
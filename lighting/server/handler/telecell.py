@@ -1,25 +1,86 @@
 import logging
+import os
+import time
 from datetime import datetime
 from datetime import timezone
+from itertools import islice
 
 import grpc
-import sqlalchemy as db
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 import lighting.lib.telecell_pb2 as tc_pb2
-from dbHandler import Element, Telecell, engine
+from dbHandler import Asset, Element, Telecell, Session, engine
 from lighting.lib.telecell_pb2_grpc import TelecellServicer
 from log import setup_logger
 from .basestation import BasestationHandler
+from .batching import batch_by_size
+from .cache import reply_cache, asset_tags, basestation_tags, element_tags, telecell_tags
+from .changes import CREATED, UPDATED, DELETED, PRUNED, change_bus, watch
+from .counters import element_keys, fleet_counters
+from .delta import delta, bury, touch
 from .element import ElementHandler
+from .ingest import StatusWriter
+from .masks import FULL, ReadMask, read_mask
+from .pagination import paginate
+from .spatial import SpatialIndex, bounding_box, chunks, neighbours
+from .statuslog import status_log
 
 
 class TelecellHandler(TelecellServicer):
     MAX_LIST_SIZE = 50
 
+    # size budget of each message streamed back by SearchByLocationBatched
+    MAX_BATCH_BYTES = 1 << 20
+
+    # telecells inserted and committed together by BulkCreate
+    BULK_CREATE_BATCH_SIZE = int(os.getenv("TELECELL_BULK_CREATE_BATCH_SIZE") or 1000)
+
+    # ReportStatus writes buffered reports once this many telecells have one, or after this many seconds
+    STATUS_FLUSH_SIZE = int(os.getenv("STATUS_FLUSH_SIZE") or 5000)
+    STATUS_FLUSH_INTERVAL = float(os.getenv("STATUS_FLUSH_INTERVAL") or 1)
+
+    # fields of the telecells published to Watch streams - none of which need relations to be loaded
+    CHANGE_MASK = ReadMask.from_paths(["id", "uuid", "relay", "status", "updated_at", "location"])
+
+    # columns that publish_change reads, for when whole rows aren't loaded
+    CHANGE_COLUMNS = (Telecell.id, Telecell.uuid, Telecell.relay, Telecell.status, Telecell.updated_at,
+                      Telecell.latitude, Telecell.longitude, Telecell.bs_id)
+
     def __init__(self):
-        self.db = sessionmaker(bind=engine)()
+        # thread-local session, scoped to the RPC being served - see lighting/server/interceptors.py
+        self.db = Session
         self.logger = setup_logger("telecellHandler", logging.DEBUG)
+
+        # locations of all telecells, for SearchByLocation
+        self.index = SpatialIndex()
+        self.load_index()
+
+        # status reports from ReportStatus, written in bulk
+        self.status_writer = StatusWriter(engine, self.STATUS_FLUSH_SIZE, self.STATUS_FLUSH_INTERVAL,
+                                          on_written=self.publish_status_changes)
+        self.status_writer.start()
+        return
+
+    def close(self):
+        """
+        Writes any buffered status reports. To be called once the server has stopped.
+
+        :return:
+        """
+
+        self.status_writer.stop()
+        return
+
+    def load_index(self):
+        """
+        (Re)builds the location index from the DB.
+
+        :return:
+        """
+
+        self.index.load(self.db.query(Telecell.id, Telecell.longitude, Telecell.latitude))
+        self.logger.debug("Indexed locations of {} Telecells".format(len(self.index)))
         return
 
     def Get(self, request, context):
@@ -30,13 +91,24 @@ class TelecellHandler(TelecellServicer):
         :return:
         """
 
+        mask = read_mask(request, tc_pb2.Reply.DESCRIPTOR, context)
         message = ""
 
+        # only complete replies are cached
+        if mask.is_full and (request.id or request.uuid):
+            key = ("telecell", "id", request.id) if request.id else ("telecell", "uuid", request.uuid)
+            tc_message = reply_cache.get(key)
+
+            if tc_message is not None:
+                return tc_message
+
+        generation = reply_cache.generation
+
         if request.id:
-            tc = self.db.query(Telecell).get(request.id)
+            tc = self.db.query(Telecell).options(*self.load_options(mask)).get(request.id)
 
         elif request.uuid:
-            tc = self.db.query(Telecell).filter(Telecell.uuid == request.uuid).first()
+            tc = self.db.query(Telecell).options(*self.load_options(mask)).filter(Telecell.uuid == request.uuid).first()
 
         else:
             tc = None
@@ -53,7 +125,11 @@ class TelecellHandler(TelecellServicer):
             tc_message = tc_pb2.Reply(no_location=True)
             return tc_message
 
-        tc_message = self.prepare_telecell_message(tc)
+        tc_message = self.prepare_telecell_message(tc, mask)
+
+        if mask.is_full:
+            reply_cache.put([("telecell", "id", tc.id), ("telecell", "uuid", tc.uuid)], tc_message,
+                            tags=self.embedded_tags(tc), generation=generation)
 
         return tc_message
 
@@ -65,56 +141,147 @@ class TelecellHandler(TelecellServicer):
         :return:
         """
 
-        telecells = self.db.query(Telecell)
+        mask = read_mask(request, tc_pb2.Reply.DESCRIPTOR, context)
+        query = self.db.query(Telecell).options(*self.load_options(mask))
+
+        # with updated_since, only what changed since then
+        delta_sync = delta(self.db, "telecell", request, context)
 
-        if request.limit:
-            telecells = telecells.limit(request.limit)
+        if delta_sync:
+            query = query.filter(Telecell.changed_at >= delta_sync.since)
 
-        if request.offset:
-            telecells = telecells.offset(request.offset)
+        lists = paginate(query, Telecell.id, request, context, self.MAX_LIST_SIZE)
 
-        telecells = telecells.all()
+        # each chunk is streamed as soon as it has been fetched and serialised
+        for telecells, next_page_token in lists:
+            # populate outgoing message
+            tc_reply_list = tc_pb2.ListReply(next_page_token=next_page_token)
+            tc_reply_list.telecells.extend([self.prepare_telecell_message(tc, mask) for tc in telecells])
 
-        replies = []
+            if delta_sync:
+                delta_sync.fill(tc_reply_list)
 
-        for i, tc in enumerate(telecells):
-            tc_reply = self.prepare_telecell_message(tc)
-            replies.append(tc_reply)
+            # end the read transaction before the chunk is streamed, so that its connection goes back to the pool
+            # while the client takes it - the next chunk is fetched in a new one
+            self.db.commit()
 
-            if len(replies) == self.MAX_LIST_SIZE or i == len(telecells) - 1:
-                # populate outgoing message
-                tc_reply_list = tc_pb2.ListReply()
-                tc_reply_list.telecells.extend(replies)
+            # stream
+            yield tc_reply_list
 
-                # reset list for next batch of messages that'll go in the next stream
-                replies = []
+        # nothing changed, but the client still gets the pruned IDs and synced_at
+        if delta_sync and not delta_sync.sent:
+            yield delta_sync.fill(tc_pb2.ListReply())
 
-                # stream
-                yield tc_reply_list
         return
 
     def SearchByLocation(self, request, context):
-        # find the bounding box on the map
-        left = min(request.rectangle.lo.long, request.rectangle.hi.long)
-        right = max(request.rectangle.lo.long, request.rectangle.hi.long)
-        top = max(request.rectangle.lo.lat, request.rectangle.hi.lat)
-        bottom = min(request.rectangle.lo.lat, request.rectangle.hi.lat)
+        """
+        Search for telecells based on a map rectangle.
 
-        self.logger.info(
-            "Request for Basestations in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
+        Need to define 2 sets of latitude and longitude to define the bounding box.
 
-        # find elements in that fall in bounding box
-        telecells = self.db.query(Telecell) \
-            .filter(db.and_(Telecell.longitude >= left, Telecell.longitude <= right,
-                            Telecell.latitude >= bottom, Telecell.latitude <= top)) \
-            .all()
+        :param request:
+        :param context:
+        :return:
+        """
 
-        for tc in telecells:
-            tc_reply = self.prepare_telecell_message(tc)
+        mask = read_mask(request, tc_pb2.Reply.DESCRIPTOR, context)
 
+        for tc_reply in self.search_by_location(request, mask):
             # stream reply to client
             yield tc_reply
 
+    def SearchByLocationBatched(self, request, context):
+        """
+        Search for telecells based on a map rectangle, like SearchByLocation.
+
+        Rather than streaming back one message per telecell, matches are packed into ListReply messages of up to
+        MAX_BATCH_BYTES each, which saves most of the per-message overhead on big map areas.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, tc_pb2.Reply.DESCRIPTOR, context)
+
+        for replies in batch_by_size(self.search_by_location(request, mask), self.MAX_BATCH_BYTES):
+            reply_list = tc_pb2.ListReply()
+            reply_list.telecells.extend(replies)
+
+            # stream
+            yield reply_list
+
+    def search_by_location(self, request, mask: ReadMask = FULL):
+        """
+        Finds everything inside the map rectangle of a FilterByLocationRequest.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of reply messages, one per match.
+        """
+
+        # find the bounding box on the map
+        left, bottom, right, top = bounding_box(request.rectangle)
+
+        self.logger.info(
+            "Request for Telecells in box between ({}, {}) and ({}, {})".format(bottom, left, top, right))
+
+        # find telecells that fall in bounding box, then load only those
+        tc_ids = self.index.search(left, bottom, right, top)
+
+        for ids in chunks(tc_ids, self.MAX_LIST_SIZE):
+            telecells = self.db.query(Telecell) \
+                .options(*self.load_options(mask)) \
+                .filter(Telecell.id.in_(ids)) \
+                .order_by(Telecell.id) \
+                .all()
+
+            for tc in telecells:
+                tc_reply = self.prepare_telecell_message(tc, mask)
+
+                yield tc_reply
+
+    def SearchNearest(self, request, context):
+        """
+        Streams the telecells closest to a location, nearest first, each with its distance in metres.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        mask = read_mask(request, tc_pb2.Reply.DESCRIPTOR, context)
+
+        for distance, tc_reply in self.search_nearest(request, mask):
+            yield tc_pb2.Neighbour(distance=distance, telecell=tc_reply)
+
+    def search_nearest(self, request, mask: ReadMask = FULL):
+        """
+        Finds the telecells closest to the location of a NearestRequest in the location index, then loads only those.
+
+        :param request:
+        :param mask: fields of the replies to fill in, from the request's read_mask.
+        :return: generator of (distance in metres, reply message), nearest first.
+        """
+
+        found = neighbours(self.index, request)
+
+        self.logger.info("Request for Telecells nearest to ({}, {}): found {}"
+                         .format(request.location.lat, request.location.long, len(found)))
+
+        for nearest in chunks(found, self.MAX_LIST_SIZE):
+            telecells = self.db.query(Telecell) \
+                .options(*self.load_options(mask)) \
+                .filter(Telecell.id.in_([row_id for _, row_id in nearest])) \
+                .all()
+            loaded = {tc.id: tc for tc in telecells}
+
+            for distance, row_id in nearest:
+                # skip rows pruned since they were found
+                if row_id in loaded:
+                    yield distance, self.prepare_telecell_message(loaded[row_id], mask)
+
     def Create(self, request, context):
         """
         Creates new Telecell.
@@ -143,10 +310,151 @@ class TelecellHandler(TelecellServicer):
         self.db.commit()
         self.db.refresh(new_telecell)
 
+        self.index.insert(new_telecell.id, new_telecell.longitude, new_telecell.latitude)
+        self.publish_change(CREATED, new_telecell)
+        fleet_counters.move("telecell", after=self.counter_key(new_telecell))
+
         tc_reply = self.prepare_telecell_message(new_telecell)
 
         return tc_reply
 
+    def BulkCreate(self, request_iterator, context):
+        """
+        Creates new Telecells from a stream, BULK_CREATE_BATCH_SIZE at a time.
+
+        Each batch is written with one multi-row INSERT in its own transaction, instead of a round trip per telecell.
+        Telecells without a UUID, or with a UUID that is already taken (in the DB, or earlier in the stream), are not
+        created and are reported back as failures. As with Create, any Basestation or Element details are ignored.
+
+        :param request_iterator:
+        :param context:
+        :return:
+        """
+
+        bulk_reply = tc_pb2.BulkCreateReply()
+        seen_uuids = set()
+        start = time.perf_counter()
+
+        requests = enumerate(request_iterator)
+        batch = list(islice(requests, self.BULK_CREATE_BATCH_SIZE))
+
+        while batch:
+            self.create_batch(batch, seen_uuids, bulk_reply)
+            batch = list(islice(requests, self.BULK_CREATE_BATCH_SIZE))
+
+        elapsed = time.perf_counter() - start
+        message = "Bulk created {} Telecells ({} failed) in {:.2f}s: {:.0f} rows/s" \
+            .format(len(bulk_reply.telecells), len(bulk_reply.failures), elapsed,
+                    len(bulk_reply.telecells) / elapsed if elapsed else 0)
+
+        self.logger.info(message)
+        context.set_details(message)
+
+        return bulk_reply
+
+    def create_batch(self, batch: list, seen_uuids: set, bulk_reply: tc_pb2.BulkCreateReply):
+        """
+        Inserts and commits one batch of BulkCreate.
+
+        :param batch: (position in the request stream, Reply) of each telecell to create.
+        :param seen_uuids: UUIDs sent earlier in the stream; updated with the ones in this batch.
+        :param bulk_reply: reply that the created telecells and the failures are added to.
+        :return:
+        """
+
+        rows = []
+
+        for index, request in batch:
+            if not request.uuid:
+                bulk_reply.failures.add(index=index, reason="expected Telecell UUID")
+
+            elif request.uuid in seen_uuids:
+                bulk_reply.failures.add(index=index, uuid=request.uuid,
+                                        reason="UUID {} sent more than once".format(request.uuid))
+
+            else:
+                seen_uuids.add(request.uuid)
+                rows.append((index, self.telecell_row(request)))
+
+        if not rows:
+            return
+
+        taken_uuids = {uuid for uuid, in self.db.query(Telecell.uuid)
+                       .filter(Telecell.uuid.in_([row["uuid"] for _, row in rows]))}
+
+        for index, row in rows:
+            if row["uuid"] in taken_uuids:
+                bulk_reply.failures.add(index=index, uuid=row["uuid"],
+                                        reason="UUID {} already exists".format(row["uuid"]))
+
+        rows = [(index, row) for index, row in rows if row["uuid"] not in taken_uuids]
+
+        if not rows:
+            self.db.rollback()
+            return
+
+        try:
+            self.db.execute(Telecell.__table__.insert(), [row for _, row in rows])
+            self.db.commit()
+
+        except IntegrityError:
+            # a UUID has been taken since it was checked - insert one at a time to find out which
+            self.db.rollback()
+            rows = self.create_one_by_one(rows, bulk_reply)
+
+        # a multi-row INSERT doesn't hand back the IDs it generated, or the defaults the DB filled in
+        created = {telecell.uuid: telecell for telecell in self.db.query(*self.CHANGE_COLUMNS)
+                   .filter(Telecell.uuid.in_([row["uuid"] for _, row in rows]))}
+        self.db.rollback()
+
+        for _, row in rows:
+            telecell = created[row["uuid"]]
+            self.index.insert(telecell.id, row["longitude"], row["latitude"])
+            self.publish_change(CREATED, telecell)
+            fleet_counters.move("telecell", after=self.counter_key(telecell))
+            bulk_reply.telecells.add(id=telecell.id, uuid=row["uuid"], no_location=row["latitude"] is None)
+
+        return
+
+    def create_one_by_one(self, rows: list, bulk_reply: tc_pb2.BulkCreateReply) -> list:
+        """
+        Inserts and commits rows of a BulkCreate batch one at a time, adding a failure for each that can't be.
+
+        :param rows: (position in the request stream, row) of each telecell to create.
+        :param bulk_reply:
+        :return: the rows that were created.
+        """
+
+        created = []
+
+        for index, row in rows:
+            try:
+                self.db.execute(Telecell.__table__.insert(), row)
+                self.db.commit()
+                created.append((index, row))
+
+            except IntegrityError as e:
+                self.db.rollback()
+                bulk_reply.failures.add(index=index, uuid=row["uuid"], reason=str(e.orig))
+
+        return created
+
+    @staticmethod
+    def telecell_row(request: tc_pb2.Reply) -> dict:
+        """
+        Column values of a new telecell row, following the same rules as Create.
+
+        :param request:
+        :return:
+        """
+
+        longitude, latitude = None, None
+        if not request.no_location:
+            longitude, latitude = request.location.long, request.location.lat
+
+        return {"uuid": request.uuid, "relay": request.relay, "status": request.status,
+                "latitude": latitude, "longitude": longitude}
+
     def Update(self, request, context):
         """
         Update details of Telecell.
@@ -181,6 +489,8 @@ class TelecellHandler(TelecellServicer):
             tc_message = tc_pb2.Reply(no_location=True)
             return tc_message
 
+        counted = self.counter_key(tc)
+
         if request.relay:
             tc.relay = request.relay
 
@@ -199,6 +509,12 @@ class TelecellHandler(TelecellServicer):
         self.db.commit()
         self.db.refresh(tc)
 
+        self.index.insert(tc.id, tc.longitude, tc.latitude)
+        reply_cache.invalidate(*telecell_tags([tc.id]))
+        self.publish_change(UPDATED, tc)
+        fleet_counters.move("telecell", counted, self.counter_key(tc))
+        status_log.record(tc.id, tc.bs_id, tc.status, counted[0])
+
         tc_reply = self.prepare_telecell_message(tc)
 
         return tc_reply
@@ -235,10 +551,15 @@ class TelecellHandler(TelecellServicer):
             tc_message = tc_pb2.Reply(no_location=True)
             return tc_message
 
+        counted = self.counter_key(tc)
         tc.status = tc_pb2.ActivityStatus.Value("DELETED")
 
         self.db.commit()
+        reply_cache.invalidate(*telecell_tags([tc.id]))
         self.db.refresh(tc)
+        self.publish_change(DELETED, tc)
+        fleet_counters.move("telecell", counted, self.counter_key(tc))
+        status_log.record(tc.id, tc.bs_id, tc.status, counted[0])
 
         tc_reply = self.prepare_telecell_message(tc)
 
@@ -277,9 +598,20 @@ class TelecellHandler(TelecellServicer):
             return tc_message
 
         tc_reply = tc_pb2.Reply(id=request.id, uuid=request.uuid, no_location=True)
+        tc_id, tc_uuid = tc.id, tc.uuid
+        counted = self.counter_key(tc)
+
+        # the telecell's elements are left without one, so without a basestation too
+        counted_elements = element_keys(self.db, Element.telecell_id == tc_id).values()
 
         self.db.delete(tc)
+        bury(self.db, "telecell", [tc_id])
         self.db.commit()
+        self.index.remove(tc_id)
+        reply_cache.invalidate(*telecell_tags([tc_id]))
+        change_bus.publish("telecell", PRUNED, tc_pb2.Reply(id=tc_id, uuid=tc_uuid))
+        fleet_counters.move("telecell", before=counted)
+        fleet_counters.move_basestation("element", counted_elements)
 
         return tc_reply
 
@@ -314,28 +646,35 @@ class TelecellHandler(TelecellServicer):
             tc_message = tc_pb2.Reply(no_location=True)
             return tc_message
 
-        elements_not_found = []
-        elements = []
-        for element_request in request.elements:
-            element = self.db.query(Element).get(element_request.id)
-
-            if not element:
-                elements_not_found.append(element.id)
+        # telecell each requested Element is associated to, by Element ID - all looked up with one query
+        element_ids = sorted({element_request.id for element_request in request.elements})
+        element_telecells = self.get_element_telecells(element_ids)
 
-            # Elements appended to array, but skip if there are any Elements not found.
-            if len(elements_not_found) == 0:
-                elements.append(element)
+        elements_not_found = [element_id for element_id in element_ids if element_id not in element_telecells]
 
         if len(elements_not_found) > 0:
-            message = "Could not find Element(s) with IDs {}".format(", ".join(elements_not_found))
+            message = "Could not find Element(s) with IDs {}".format(", ".join(map(str, elements_not_found)))
             context.abort(grpc.StatusCode.NOT_FOUND, message)
 
+        # the elements move to the telecell's basestation in the fleet counters
+        counted = element_keys(self.db, Element.id.in_(element_ids)).values()
+
         # associate Elements to Telecell
-        for element in elements:
-            element.telecell = tc
+        self.db.query(Element) \
+            .filter(Element.id.in_(element_ids)) \
+            .update({Element.telecell_id: tc.id}, synchronize_session=False)
+
+        # telecells list their elements, so the ones the elements were taken from have changed too
+        touch(self.db, Telecell, [tc.id, *element_telecells.values()])
 
         self.db.commit()
-        self.db.refresh(tc)
+
+        # the telecells the elements were taken from are built from the elements too, so they go as well
+        reply_cache.invalidate(*telecell_tags([tc.id]), *element_tags(element_ids))
+
+        tc = self.reload_telecell(tc.id)
+        self.publish_change(UPDATED, tc)
+        fleet_counters.move_basestation("element", counted, tc.bs_id)
 
         tc_reply = self.prepare_telecell_message(tc)
 
@@ -372,62 +711,237 @@ class TelecellHandler(TelecellServicer):
             tc_message = tc_pb2.Reply(no_location=True)
             return tc_message
 
-        elements_not_found = []
-        elements_unassociated_to_tc = []
-        elements = []
-        for element_request in request.elements:
-            element = self.db.query(Element).get(element_request.id)
+        # telecell each requested Element is associated to, by Element ID - all looked up with one query
+        element_ids = sorted({element_request.id for element_request in request.elements})
+        element_telecells = self.get_element_telecells(element_ids)
 
-            if not element:
-                elements_not_found.append(element.id)
+        elements_not_found = [element_id for element_id in element_ids if element_id not in element_telecells]
 
-            elif element.telecell_id != tc.id:
-                elements_unassociated_to_tc.append(element.id)
-
-            # Elements appended to array, but skip if there are any Elements not found,
-            # or if request asks to dissociate TC from an Element not associated with itself.
-            # (i.e. a malformed request).
-            if len(elements_not_found) == 0 and len(elements_unassociated_to_tc) == 0:
-                elements.append(element)
+        # request asks to dissociate TC from an Element not associated with itself (i.e. a malformed request).
+        elements_unassociated_to_tc = [element_id for element_id, telecell_id in element_telecells.items()
+                                       if telecell_id != tc.id]
 
         # check for any errors, and abort if any found.
         abort = False
         message = ""
         if len(elements_not_found) > 0:
-            message += "Could not find Element(s) with IDs {}\n".format(", ".join(elements_not_found))
+            message += "Could not find Element(s) with IDs {}\n".format(", ".join(map(str, elements_not_found)))
             abort = True
 
         elif len(elements_unassociated_to_tc) > 0:
             message += "These Element(s) (by ID) are not associated to this Telecell: {}\n" \
-                .format(", ".join(elements_unassociated_to_tc))
+                .format(", ".join(map(str, elements_unassociated_to_tc)))
             abort = True
 
         if abort:
             context.abort(grpc.StatusCode.NOT_FOUND, message)
 
+        # the elements are left without a basestation in the fleet counters
+        counted = element_keys(self.db, Element.id.in_(element_ids)).values()
+
         # dissociate Elements from Telecell
-        for element in elements:
-            element.telecell = None
+        self.db.query(Element) \
+            .filter(Element.id.in_(element_ids)) \
+            .update({Element.telecell_id: None}, synchronize_session=False)
+
+        touch(self.db, Telecell, [tc.id])
 
         self.db.commit()
-        self.db.refresh(tc)
+        reply_cache.invalidate(*telecell_tags([tc.id]), *element_tags(element_ids))
+
+        tc = self.reload_telecell(tc.id)
+        self.publish_change(UPDATED, tc)
+        fleet_counters.move_basestation("element", counted)
 
         tc_reply = self.prepare_telecell_message(tc)
 
         return tc_reply
 
+    def get_element_telecells(self, element_ids: list) -> dict:
+        """
+        Looks up which telecell each of many elements is associated to, with a single query.
+
+        :param element_ids:
+        :return: telecell ID (or None) by element ID, for the elements that exist.
+        """
+
+        if not element_ids:
+            return {}
+
+        return dict(self.db.query(Element.id, Element.telecell_id).filter(Element.id.in_(element_ids)))
+
+    def reload_telecell(self, tc_id: int) -> Telecell:
+        """
+        Fetches a telecell again, with everything prepare_telecell_message needs loaded up front - e.g. after its
+        elements have been changed by a bulk UPDATE, which the session doesn't know about.
+
+        :param tc_id:
+        :return:
+        """
+
+        return self.db.query(Telecell) \
+            .options(*self.load_options()) \
+            .populate_existing() \
+            .filter(Telecell.id == tc_id) \
+            .one()
+
+    def ReportStatus(self, request_iterator, context):
+        """
+        Takes in a stream of status reports, e.g. from a basestation gateway, for as long as it is kept open.
+
+        Unlike Update, there is no DB round trip per report: reports are coalesced per telecell, and written in bulk by
+        the handler's StatusWriter (see lighting/server/handler/ingest.py). Once the stream ends, the buffer is flushed
+        before replying, so everything the client sent is in the DB by the time it gets the reply.
+
+        :param request_iterator:
+        :param context:
+        :return:
+        """
+
+        received = 0
+
+        for report in request_iterator:
+            if not report.uuid:
+                continue
+
+            # if no time provided by client, then save current server time as updated_at, as Update does
+            if report.updated_at.seconds:
+                updated_at = datetime.utcfromtimestamp(report.updated_at.seconds)
+            else:
+                updated_at = datetime.utcnow()
+
+            self.status_writer.report(report.uuid, report.status, updated_at)
+            received += 1
+
+        self.status_writer.flush()
+        self.logger.debug("Received {} status reports; status writer: {}".format(received, self.status_writer.stats()))
+
+        return tc_pb2.ReportStatusReply(received=received)
+
+    def Watch(self, request, context):
+        """
+        Streams changes made to telecells, as they are committed - including the status reports written for
+        ReportStatus.
+
+        :param request:
+        :param context:
+        :return:
+        """
+
+        self.logger.info("Watch Telecells from sequence {}".format(request.after_sequence))
+
+        for change in watch("telecell", request, context, tc_pb2.Change):
+            yield change
+
+    def publish_status_changes(self, telecells, previous_statuses: dict):
+        """
+        Publishes the telecells written by a flush of the status writer to Watch streams, the fleet counters and the
+        status log.
+
+        :param telecells: rows with (at least) the CHANGE_COLUMNS of each telecell.
+        :param previous_statuses: status of each telecell before the flush, by UUID.
+        :return:
+        """
+
+        for telecell in telecells:
+            self.publish_change(UPDATED, telecell)
+
+            previous_status = previous_statuses.get(telecell.uuid, telecell.status)
+            counted = fleet_counters.key(previous_status, telecell.bs_id, telecell.longitude, telecell.latitude)
+            fleet_counters.move("telecell", counted, self.counter_key(telecell))
+            status_log.record(telecell.id, telecell.bs_id, telecell.status, previous_status)
+
+        return
+
+    @staticmethod
+    def counter_key(telecell) -> tuple:
+        """
+        :param telecell: a Telecell, or a row with its CHANGE_COLUMNS.
+        :return: what the telecell is counted under in the fleet counters.
+        """
+
+        return fleet_counters.key(telecell.status, telecell.bs_id, telecell.longitude, telecell.latitude)
+
     @staticmethod
-    def prepare_telecell_message(telecell: Telecell) -> tc_pb2.Reply:
+    def publish_change(action: int, telecell):
+        """
+        Publishes a change made to a telecell to Watch streams, once it has been committed.
+
+        :param action: CREATED, UPDATED or DELETED.
+        :param telecell: a Telecell, or a row with its CHANGE_COLUMNS.
+        :return:
+        """
+
+        tc_reply = TelecellHandler.prepare_telecell_message(telecell, TelecellHandler.CHANGE_MASK)
+
+        change_bus.publish("telecell", action, tc_reply, status=telecell.status, longitude=telecell.longitude,
+                           latitude=telecell.latitude, basestation_id=telecell.bs_id)
+        return
+
+    @staticmethod
+    def load_options(mask: ReadMask = FULL) -> list:
+        """
+        Loader options for every relation that prepare_telecell_message walks.
+
+        The basestation is joined into the main query; the elements, their assets and the assets' elements are each
+        fetched with one extra query for the whole result, so the number of statements does not grow with the number
+        of telecells. Relations the mask leaves out are not loaded at all.
+
+        :param mask: fields of the replies that will be prepared.
+        :return:
+        """
+
+        options = []
+
+        if mask.includes("basestation"):
+            options.append(joinedload(Telecell.basestation))
+
+        if mask.includes("elements"):
+            elements_loader = selectinload(Telecell.elements)
+            element_mask = mask.child("elements")
+
+            if element_mask.includes("asset"):
+                elements_loader = elements_loader.joinedload(Element.asset)
+
+                if element_mask.child("asset").includes("element_uids"):
+                    elements_loader = elements_loader.selectinload(Asset.elements)
+
+            options.append(elements_loader)
+
+        return options
+
+    @staticmethod
+    def embedded_tags(telecell: Telecell) -> list:
+        """
+        Cache tags of the rows that prepare_telecell_message embeds in a telecell's reply: its basestation, its elements
+        and their assets.
+
+        :param telecell:
+        :return:
+        """
+
+        # noinspection PyUnresolvedReferences
+        elements = telecell.elements
+        basestation_ids = [telecell.bs_id] if telecell.bs_id else []
+
+        return basestation_tags(basestation_ids) \
+            + element_tags([element.id for element in elements]) \
+            + asset_tags({element.asset_id for element in elements})
+
+    @staticmethod
+    def prepare_telecell_message(telecell: Telecell, mask: ReadMask = FULL) -> tc_pb2.Reply:
         """
         Given a retrieved row from the telecell table in the DB, populate a lighting.telecell.Reply message accordingly.
 
         :param telecell:
+        :param mask: fields to fill in. Relations left out are not touched, so they are never lazy loaded.
         :return:
         """
 
         # set up BS field
-        if telecell.basestation:
-            bs_reply = BasestationHandler.prepare_basestation_message(telecell.basestation)
+        if mask.includes("basestation") and telecell.basestation:
+            bs_reply = BasestationHandler.prepare_embedded_basestation_message(telecell.basestation,
+                                                                               mask.child("basestation"))
 
             # create reply message and set up the fields with simple types
             tc_reply = tc_pb2.Reply(id=telecell.id, uuid=telecell.uuid, relay=telecell.relay, status=telecell.status,
@@ -438,7 +952,8 @@ class TelecellHandler(TelecellServicer):
             tc_reply = tc_pb2.Reply(id=telecell.id, uuid=telecell.uuid, relay=telecell.relay, status=telecell.status)
 
         # set timestamp field
-        tc_reply.updated_at.seconds = int(telecell.updated_at.replace(tzinfo=timezone.utc).timestamp())
+        if mask.includes("updated_at"):
+            tc_reply.updated_at.seconds = int(telecell.updated_at.replace(tzinfo=timezone.utc).timestamp())
 
         # set location or set no_location flag to True
         if telecell.latitude is not None and telecell.longitude is not None:
@@ -447,11 +962,13 @@ class TelecellHandler(TelecellServicer):
             tc_reply.no_location = True
 
         # set up Elements field
-        element_replies = []
+        if mask.includes("elements"):
+            element_mask = mask.child("elements")
+            element_replies = []
 
-        # noinspection PyUnresolvedReferences
-        for element in telecell.elements:
-            element_replies.append(ElementHandler.prepare_element_message(element))
-        tc_reply.elements.extend(element_replies)
+            # noinspection PyUnresolvedReferences
+            for element in telecell.elements:
+                element_replies.append(ElementHandler.prepare_element_message(element, element_mask))
+            tc_reply.elements.extend(element_replies)
 
-        return tc_reply
+        return mask.trim(tc_reply)
@@ -1,10 +1,8 @@
 import logging
 from datetime import timezone
 
-from sqlalchemy.orm import sessionmaker
-
 import lighting.lib.user_pb2 as user_pb2
-from dbHandler import User, engine
+from dbHandler import User, Session
 from lighting.lib.user_pb2_grpc import UserServicer
 from log import setup_logger
 
@@ -13,7 +11,8 @@ class UserHandler(UserServicer):
     MAX_LIST_SIZE = 1000
 
     def __init__(self):
-        self.db = sessionmaker(bind=engine)()
+        # thread-local session, scoped to the RPC being served - see lighting/server/interceptors.py
+        self.db = Session
         self.logger = setup_logger("userHandler", logging.DEBUG)
         return
 
@@ -55,11 +54,7 @@ class UserHandler(UserServicer):
                     user.id if request.id else request.username)
         self.logger.info(message)
 
-        user_message = user_pb2.Reply(id=user.id,
-                                      username=user.username,
-                                      hashed_pass=user.hashed_pass,
-                                      role=user.role)
-        user_message.created.seconds = int(user.created.replace(tzinfo=timezone.utc).timestamp())
+        user_message = self.prepare_user_message(user)
 
         return user_message
 
@@ -83,11 +78,7 @@ class UserHandler(UserServicer):
         self.db.add(user)
         self.db.commit()
 
-        user_message = user_pb2.Reply(id=user.id,
-                                      username=user.username,
-                                      hashed_pass=user.hashed_pass,
-                                      role=user.role)
-        user_message.created.seconds = int(user.created.replace(tzinfo=timezone.utc).timestamp())
+        user_message = self.prepare_user_message(user)
 
         return user_message
 
@@ -135,12 +126,7 @@ class UserHandler(UserServicer):
             .format(user.username, user.hashed_pass, user_pb2.Role.Name(user.role))
         self.logger.info(message)
 
-        user_message = user_pb2.Reply(
-            id=user.id,
-            username=user.username,
-            hashed_pass=user.hashed_pass,
-            role=user.role)
-        user_message.created.seconds = int(user.created.replace(tzinfo=timezone.utc).timestamp())
+        user_message = self.prepare_user_message(user)
 
         return user_message
 
@@ -187,3 +173,20 @@ class UserHandler(UserServicer):
         self.logger.info(message)
 
         return user_message
+
+    @staticmethod
+    def prepare_user_message(user: User) -> user_pb2.Reply:
+        """
+        Given a row from the user table, populate the user.Reply message.
+
+        :param user:
+        :return:
+        """
+
+        user_message = user_pb2.Reply(id=user.id,
+                                      username=user.username,
+                                      hashed_pass=user.hashed_pass,
+                                      role=user.role)
+        user_message.created.seconds = int(user.created.replace(tzinfo=timezone.utc).timestamp())
+
+        return user_message
@@ -0,0 +1,269 @@
+import inspect
+import threading
+import time
+
+import grpc
+from grpc import aio
+
+
+def wrap_rpc_method_handler(handler: grpc.RpcMethodHandler, wrap_unary_response, wrap_stream_response,
+                            request_deserializer=None, response_serializer=None):
+    """
+    Rebuilds an RPC method handler around a wrapped version of its behaviour.
+
+    :param handler: handler returned by the interceptor's continuation.
+    :param wrap_unary_response: called with the behaviour of an RPC with a single response, returns the replacement.
+    :param wrap_stream_response: called with the behaviour of an RPC with a streamed response, returns the
+        replacement.
+    :param request_deserializer: replacement of the handler's request deserializer, if any.
+    :param response_serializer: replacement of the handler's response serializer, if any.
+    :return:
+    """
+
+    request_deserializer = request_deserializer or handler.request_deserializer
+    response_serializer = response_serializer or handler.response_serializer
+
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(wrap_unary_response(handler.unary_unary),
+                                                   request_deserializer=request_deserializer,
+                                                   response_serializer=response_serializer)
+
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(wrap_stream_response(handler.unary_stream),
+                                                    request_deserializer=request_deserializer,
+                                                    response_serializer=response_serializer)
+
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(wrap_unary_response(handler.stream_unary),
+                                                    request_deserializer=request_deserializer,
+                                                    response_serializer=response_serializer)
+
+    return grpc.stream_stream_rpc_method_handler(wrap_stream_response(handler.stream_stream),
+                                                 request_deserializer=request_deserializer,
+                                                 response_serializer=response_serializer)
+
+
+class SessionScopeInterceptor(grpc.ServerInterceptor):
+    """
+    Scopes the handlers' DB session to a single RPC.
+
+    The handlers use a thread-local scoped_session, and the server runs each RPC (including all of a streamed
+    response) on one worker thread. Once the RPC is over, its session is removed: the connection goes back to the pool
+    and the identity map is thrown away, so nothing is shared between concurrent RPCs and memory doesn't grow with
+    uptime.
+    """
+
+    def __init__(self, session_registry):
+        """
+        :param session_registry: the scoped_session used by the handlers, i.e. dbHandler.Session.
+        """
+
+        self.session_registry = session_registry
+        return
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+
+        if handler is None:
+            return None
+
+        return wrap_rpc_method_handler(handler, self.scope_unary_response, self.scope_stream_response)
+
+    def scope_unary_response(self, behaviour):
+        def scoped(request, context):
+            try:
+                return behaviour(request, context)
+            finally:
+                self.session_registry.remove()
+
+        return scoped
+
+    def scope_stream_response(self, behaviour):
+        def scoped(request, context):
+            try:
+                for response in behaviour(request, context):
+                    yield response
+            finally:
+                self.session_registry.remove()
+
+        return scoped
+
+
+class AsyncSessionScopeInterceptor(aio.ServerInterceptor):
+    """
+    SessionScopeInterceptor for the asyncio server.
+
+    Only RPCs that are still implemented as plain functions need it: grpc.aio runs those on its migration thread pool,
+    where they use the thread-local session. Coroutine RPCs open their own AsyncSessions and are left alone.
+    """
+
+    def __init__(self, session_registry):
+        """
+        :param session_registry: the scoped_session used by the handlers, i.e. dbHandler.Session.
+        """
+
+        self._threaded = SessionScopeInterceptor(session_registry)
+        return
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+
+        if handler is None:
+            return None
+
+        behaviour = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+
+        if inspect.iscoroutinefunction(behaviour) or inspect.isasyncgenfunction(behaviour):
+            return handler
+
+        return wrap_rpc_method_handler(handler, self._threaded.scope_unary_response,
+                                       self._threaded.scope_stream_response)
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """
+    Records the calls, latency, status codes, messages and bytes of every RPC of the threaded server (see
+    lighting/server/metrics.py), and how many RPCs are waiting for a worker thread and being run by one.
+
+    The server intercepts an RPC as it arrives, on its own thread, and then queues it for its thread pool: RPCs
+    intercepted that haven't started running yet are the pool's queue.
+
+    Bytes are counted by wrapping the method's (de)serializers, so no message is serialised twice. The wrapped method
+    handler is built once per method and reused, so a call only costs a couple of clock reads and counter updates. To
+    be given the handlers as registered, it has to come after interceptors that rebuild them on every call (e.g.
+    SessionScopeInterceptor).
+    """
+
+    def __init__(self, metrics):
+        """
+        :param metrics: the registry to record in, i.e. lighting.server.metrics.rpc_metrics.
+        """
+
+        self.metrics = metrics
+
+        # method -> (the handler found, the wrapped one)
+        self._handlers = {}
+
+        # RPCs waiting for a worker thread, and RPCs being run by one
+        self.queued = 0
+        self.active = 0
+        self._lock = threading.Lock()
+        return
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+
+        if handler is None:
+            return None
+
+        with self._lock:
+            self.queued += 1
+
+        cached = self._handlers.get(handler_call_details.method)
+
+        if cached is not None and cached[0] is handler:
+            return cached[1]
+
+        method_metrics = self.metrics.method(handler_call_details.method)
+        wrapped = wrap_rpc_method_handler(handler, self.measure_unary_response(method_metrics),
+                                          self.measure_stream_response(method_metrics),
+                                          request_deserializer=self.count_received(handler, method_metrics),
+                                          response_serializer=self.count_sent(handler, method_metrics))
+
+        self._handlers[handler_call_details.method] = handler, wrapped
+        return wrapped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queue_depth": self.queued, "active_workers": self.active}
+
+    def _start(self):
+        with self._lock:
+            self.queued = max(0, self.queued - 1)
+            self.active += 1
+
+        return
+
+    def _finish(self):
+        with self._lock:
+            self.active -= 1
+
+            # an RPC whose client gives up while it waits is dropped by the server without ever starting. Idle workers
+            # take RPCs straight off the queue, so once none is busy, any such RPC still counted as queued is let go.
+            if not self.active:
+                self.queued = 0
+
+        return
+
+    @staticmethod
+    def count_received(handler: grpc.RpcMethodHandler, method_metrics):
+        def deserialize(data: bytes):
+            method_metrics.received(len(data))
+            return handler.request_deserializer(data) if handler.request_deserializer else data
+
+        return deserialize
+
+    @staticmethod
+    def count_sent(handler: grpc.RpcMethodHandler, method_metrics):
+        def serialize(message) -> bytes:
+            data = handler.response_serializer(message) if handler.response_serializer else message
+            method_metrics.sent(len(data))
+            return data
+
+        return serialize
+
+    def measure_unary_response(self, method_metrics):
+        def wrap(behaviour):
+            def measured(request, context):
+                self._start()
+                method_metrics.started()
+                start = time.perf_counter()
+                code = grpc.StatusCode.OK
+
+                try:
+                    return behaviour(request, context)
+                except Exception:
+                    code = grpc.StatusCode.UNKNOWN
+                    raise
+                finally:
+                    method_metrics.finished(self.status_code(context, code), time.perf_counter() - start)
+                    self._finish()
+
+            return measured
+
+        return wrap
+
+    def measure_stream_response(self, method_metrics):
+        def wrap(behaviour):
+            def measured(request, context):
+                self._start()
+                method_metrics.started()
+                start = time.perf_counter()
+                code = grpc.StatusCode.OK
+
+                try:
+                    for response in behaviour(request, context):
+                        yield response
+                except GeneratorExit:
+                    # the client went away before the end of the stream
+                    code = grpc.StatusCode.CANCELLED
+                    raise
+                except Exception:
+                    code = grpc.StatusCode.UNKNOWN
+                    raise
+                finally:
+                    method_metrics.finished(self.status_code(context, code), time.perf_counter() - start)
+                    self._finish()
+
+            return measured
+
+        return wrap
+
+    @staticmethod
+    def status_code(context, default: grpc.StatusCode) -> grpc.StatusCode:
+        """
+        :return: the code the handler set (e.g. by aborting), or else default.
+        """
+
+        code = context.code() if hasattr(context, "code") else None
+        return code if isinstance(code, grpc.StatusCode) else default
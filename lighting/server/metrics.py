@@ -0,0 +1,268 @@
+"""
+Per-RPC metrics of the server, served in the Prometheus text format.
+
+MetricsInterceptor (in interceptors.py) counts calls by status code, their latency, and the messages and bytes
+received and sent, per service and method, plus the calls in flight. Gauges of the rest of the process (thread pool
+queue, DB pool, caches) are read when the metrics are scraped, so they cost nothing in between. MetricsServer serves
+everything on http://METRICS_HOST:METRICS_PORT/metrics.
+"""
+import logging
+import os
+import socket
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import grpc
+
+from log import setup_logger
+
+logger = setup_logger("metrics", logging.DEBUG)
+
+# upper bounds, in seconds, of the latency histogram buckets - the last one is +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class MethodMetrics:
+    """
+    Counters of one RPC method.
+    """
+
+    def __init__(self, service: str, method: str):
+        self.labels = 'service="{}",method="{}"'.format(service, method)
+        self.in_flight = 0
+        self.codes = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        return
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+        return
+
+    def finished(self, code: grpc.StatusCode, seconds: float):
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+
+        with self._lock:
+            self.in_flight -= 1
+            self.codes[code] = self.codes.get(code, 0) + 1
+            self.buckets[bucket] += 1
+            self.latency_sum += seconds
+
+        return
+
+    def received(self, size: int):
+        with self._lock:
+            self.messages_received += 1
+            self.bytes_received += size
+
+        return
+
+    def sent(self, size: int):
+        with self._lock:
+            self.messages_sent += 1
+            self.bytes_sent += size
+
+        return
+
+    def snapshot(self) -> tuple:
+        """
+        :return: labels, in flight, count by status code, latency bucket counts, latency sum, messages received,
+        messages sent, bytes received and bytes sent.
+        """
+
+        with self._lock:
+            return (self.labels, self.in_flight, dict(self.codes), list(self.buckets), self.latency_sum,
+                    self.messages_received, self.messages_sent, self.bytes_received, self.bytes_sent)
+
+
+class Metrics:
+    """
+    Registry of the RPC method counters, and of the gauges read at scrape time.
+    """
+
+    def __init__(self):
+        self._methods = {}
+
+        # prefix -> (help text, function reading them)
+        self._gauges = {}
+        self._lock = threading.Lock()
+        return
+
+    def method(self, full_method: str) -> MethodMetrics:
+        """
+        :param full_method: e.g. "/lighting.element.Element/Get".
+        :return: the counters of the method, created the first time it is called.
+        """
+
+        method_metrics = self._methods.get(full_method)
+
+        if method_metrics is None:
+            with self._lock:
+                service, _, method = full_method.lstrip("/").rpartition("/")
+                method_metrics = self._methods.setdefault(full_method, MethodMetrics(service, method))
+
+        return method_metrics
+
+    def add_gauges(self, prefix: str, help_text: str, read):
+        """
+        Publishes the numbers read returns, as gauges named prefix_<key>, in place of any added before with the prefix.
+
+        :param prefix: e.g. "lighting_db_pool".
+        :param help_text:
+        :param read: called at scrape time; returns a dict of numbers. Other values are left out.
+        :return:
+        """
+
+        self._gauges[prefix] = help_text, read
+        return
+
+    def render(self) -> str:
+        """
+        :return: all the metrics, in the Prometheus text format.
+        """
+
+        lines = []
+
+        with self._lock:
+            methods = sorted(self._methods.items())
+
+        snapshots = [method_metrics.snapshot() for _, method_metrics in methods]
+
+        lines += ["# HELP lighting_rpc_handled_total RPCs finished, by status code.",
+                  "# TYPE lighting_rpc_handled_total counter"]
+
+        for labels, _, codes, *_ in snapshots:
+            lines += ['lighting_rpc_handled_total{{{},code="{}"}} {}'.format(labels, code.name, n)
+                      for code, n in sorted(codes.items(), key=lambda item: item[0].name)]
+
+        lines += ["# HELP lighting_rpc_in_flight RPCs being served.", "# TYPE lighting_rpc_in_flight gauge"]
+        lines += ["lighting_rpc_in_flight{{{}}} {}".format(labels, in_flight) for labels, in_flight, *_ in snapshots]
+
+        lines += ["# HELP lighting_rpc_latency_seconds Time from receiving an RPC to sending its last message.",
+                  "# TYPE lighting_rpc_latency_seconds histogram"]
+
+        for labels, _, _, buckets, latency_sum, *_ in snapshots:
+            cumulative = 0
+
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += n
+                lines.append('lighting_rpc_latency_seconds_bucket{{{},le="{}"}} {}'.format(labels, bound, cumulative))
+
+            lines.append("lighting_rpc_latency_seconds_sum{{{}}} {}".format(labels, latency_sum))
+            lines.append("lighting_rpc_latency_seconds_count{{{}}} {}".format(labels, cumulative))
+
+        for position, (name, help_text) in enumerate([
+                ("lighting_rpc_messages_received_total", "Request messages received."),
+                ("lighting_rpc_messages_sent_total", "Reply messages sent, one per item of a streamed reply."),
+                ("lighting_rpc_received_bytes_total", "Serialised size of the request messages received."),
+                ("lighting_rpc_sent_bytes_total", "Serialised size of the reply messages sent.")]):
+            lines += ["# HELP {} {}".format(name, help_text), "# TYPE {} counter".format(name)]
+            lines += ["{}{{{}}} {}".format(name, snapshot[0], snapshot[5 + position]) for snapshot in snapshots]
+
+        for prefix, (help_text, read) in sorted(self._gauges.items()):
+            try:
+                values = read()
+            except Exception as e:
+                logger.warn("Could not read {} metrics: {}".format(prefix, e))
+                continue
+
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+
+                name = "{}_{}".format(prefix, key)
+                lines += ["# HELP {} {} ({})".format(name, help_text, key), "# TYPE {} gauge".format(name),
+                          "{} {}".format(name, value)]
+
+        return "\n".join(lines) + "\n"
+
+
+class _ReusePortHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # a restarted --workers worker binds its port before the one it replaces has stopped
+        if hasattr(socket, "SO_REUSEPORT"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        super().server_bind()
+        return
+
+
+class MetricsServer:
+    """
+    Serves the metrics over HTTP, from a background thread.
+    """
+
+    def __init__(self, metrics: Metrics, host: str, port: int):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._http_server = None
+        self._thread = None
+        return
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            def log_message(self, format, *args):
+                return
+
+        self._http_server = _ReusePortHTTPServer((self.host, self.port), Handler)
+        self._thread = threading.Thread(target=self._http_server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        logger.debug("Serving metrics on http://{}:{}/metrics".format(self.host, self.port))
+        return
+
+    def stop(self):
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._thread.join()
+            self._http_server = None
+
+        return
+
+
+def start_metrics_server(offset: int = 0):
+    """
+    Starts serving the metrics on METRICS_PORT (plus offset), if set.
+
+    :param offset: added to METRICS_PORT, e.g. the slot of a --workers worker, so that each is scraped separately.
+    :return: the MetricsServer, or None if METRICS_PORT isn't set.
+    """
+
+    port = int(os.getenv("METRICS_PORT") or 0)
+
+    if not port:
+        return None
+
+    metrics_server = MetricsServer(rpc_metrics, os.getenv("METRICS_HOST") or "127.0.0.1", port + offset)
+    metrics_server.start()
+    return metrics_server
+
+
+# RPC metrics of this server process
+rpc_metrics = Metrics()
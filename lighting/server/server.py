@@ -1,47 +1,258 @@
+import argparse
+import asyncio
 import logging
 import os
+import threading
 from concurrent import futures
-from multiprocessing import cpu_count
 
 import grpc
+from grpc import aio
 
 import settings as lighting_settings
+from dbHandler import Session, pool_metrics
+from dbHandler.base import SERVER_MAX_WORKERS, create_async_session_factory
 from lighting.lib.asset_pb2_grpc import add_AssetServicer_to_server
 from lighting.lib.basestation_pb2_grpc import add_BasestationServicer_to_server
 from lighting.lib.element_pb2_grpc import add_ElementServicer_to_server
+from lighting.lib.history_pb2_grpc import add_HistoryServicer_to_server
+from lighting.lib.stats_pb2_grpc import add_StatsServicer_to_server
 from lighting.lib.telecell_pb2_grpc import add_TelecellServicer_to_server
 from lighting.lib.user_pb2_grpc import add_UserServicer_to_server
-from lighting.server.handler import ElementHandler, AssetHandler, BasestationHandler, TelecellHandler, UserHandler
+from lighting.server.handler import ElementHandler, AssetHandler, BasestationHandler, TelecellHandler, UserHandler, \
+    StatsHandler, HistoryHandler
+from lighting.server.handler.aio import AsyncAssetHandler, AsyncBasestationHandler, AsyncElementHandler, \
+    AsyncTelecellHandler, AsyncUserHandler
+from lighting.server.handler.cache import reply_cache
+from lighting.server.handler.changes import change_bus
+from lighting.server.handler.counters import fleet_counters
+from lighting.server.handler.statuslog import status_log
+from lighting.server.interceptors import SessionScopeInterceptor, AsyncSessionScopeInterceptor, MetricsInterceptor
+from lighting.server.metrics import rpc_metrics, start_metrics_server
+from lighting.server.supervisor import Supervisor
 from log import setup_logger
 
 logger = setup_logger("server", logging.DEBUG)
 
 
+def log_pool_metrics(interval: float, stop: threading.Event):
+    """
+    Periodically logs how busy the DB connection pool is, how well the reply cache is doing, and how many Watch streams
+    the change bus feeds, until stop is set.
+
+    :param interval: seconds between log lines.
+    :param stop:
+    :return:
+    """
+
+    while not stop.wait(interval):
+        logger.debug("DB pool: {}".format(pool_metrics.snapshot()))
+        logger.debug("Reply cache: {}".format(reply_cache.stats()))
+        logger.debug("Change bus: {}".format(change_bus.stats()))
+        logger.debug("Fleet counters: {}".format(fleet_counters.stats()))
+        logger.debug("Status log: {}".format(status_log.stats()))
+
+    return
+
+
+def start_pool_logging() -> threading.Event:
+    """
+    Starts logging DB pool metrics every DB_POOL_LOG_INTERVAL seconds, if set.
+
+    :return: event to set to stop logging.
+    """
+
+    stop = threading.Event()
+    interval = float(os.getenv("DB_POOL_LOG_INTERVAL") or 0)
+
+    if interval > 0:
+        threading.Thread(target=log_pool_metrics, args=(interval, stop), daemon=True).start()
+
+    return stop
+
+
+def add_process_gauges(metrics_interceptor: MetricsInterceptor, max_workers: int):
+    """
+    Publishes how busy the server's thread pool, the DB connection pool and the in-memory stores are, next to the RPC
+    metrics.
+
+    :param metrics_interceptor: the interceptor of the threaded server, which counts the RPCs waiting for a worker
+        thread and those being run by one.
+    :param max_workers: size of the server's thread pool.
+    :return:
+    """
+
+    rpc_metrics.add_gauges("lighting_thread_pool", "Server worker threads",
+                           lambda: dict(metrics_interceptor.stats(), max_workers=max_workers))
+    rpc_metrics.add_gauges("lighting_db_pool", "DB connection pool", pool_metrics.snapshot)
+    rpc_metrics.add_gauges("lighting_reply_cache", "Get reply cache", reply_cache.stats)
+    rpc_metrics.add_gauges("lighting_change_bus", "Watch change bus", change_bus.stats)
+    rpc_metrics.add_gauges("lighting_fleet_counters", "Stats.Aggregate fleet counters", fleet_counters.stats)
+    rpc_metrics.add_gauges("lighting_status_log", "Telecell status history", status_log.stats)
+    return
+
+
+def build_server(port: int, options: list = None) -> tuple:
+    """
+    Creates the threaded server with all servicers added, ready to be started.
+
+    :param port: Port on which to serve up this service
+    :param options: extra gRPC channel options for the server, e.g. [("grpc.so_reuseport", 1)]
+    :return: the server, and the handlers that were added to it.
+    """
+
+    executor = futures.ThreadPoolExecutor(max_workers=SERVER_MAX_WORKERS)
+    metrics_interceptor = MetricsInterceptor(rpc_metrics)
+
+    # the metrics interceptor goes last, to be handed the method handlers as registered
+    server = grpc.server(executor, interceptors=[SessionScopeInterceptor(Session), metrics_interceptor],
+                         options=options)
+    add_process_gauges(metrics_interceptor, SERVER_MAX_WORKERS)
+
+    # assets' location index is shared with the element handler, which searches elements by their assets' location
+    asset_handler = AssetHandler()
+    handlers = [asset_handler, ElementHandler(asset_index=asset_handler.index), TelecellHandler(),
+                BasestationHandler(), UserHandler(), StatsHandler(), HistoryHandler()]
+
+    add_AssetServicer_to_server(handlers[0], server)
+    add_ElementServicer_to_server(handlers[1], server)
+    add_TelecellServicer_to_server(handlers[2], server)
+    add_BasestationServicer_to_server(handlers[3], server)
+    add_UserServicer_to_server(handlers[4], server)
+    add_StatsServicer_to_server(handlers[5], server)
+    add_HistoryServicer_to_server(handlers[6], server)
+
+    # give back the connection used to build the handlers' location indexes
+    Session.remove()
+
+    server.add_insecure_port('[::]:{}'.format(port))
+    logger.debug("Listening on port {} with {} workers".format(port, SERVER_MAX_WORKERS))
+
+    return server, handlers
+
+
+def close_handlers(handlers: list):
+    """
+    Lets the handlers that buffer writes (e.g. TelecellHandler.ReportStatus) save them, and stops the handlers'
+    background threads, once the server has stopped.
+
+    :param handlers:
+    :return:
+    """
+
+    for handler in handlers:
+        if hasattr(handler, "close"):
+            handler.close()
+
+    return
+
+
 def serve(port: int):
     """
-    Start up server, multithreaded to the number of CPUs that the hosting machine has.
+    Start up server, multithreaded to SERVER_MAX_WORKERS threads (the number of CPUs that the hosting machine has, by
+    default).
+
+    The DB connection pool has a connection for each worker, plus a few for the background threads that write status
+    reports and recount the fleet counters (see dbHandler/base.py), and every RPC gets its own DB session for as long as
+    it runs. Per-RPC metrics are served on METRICS_PORT, if set (see metrics.py).
 
     :param port: Port on which to serve up this service
     :return:
     """
 
-    num_cpus = cpu_count()
+    server, handlers = build_server(port)
+
+    stop_pool_logging = start_pool_logging()
+    metrics_server = start_metrics_server()
+
+    server.start()
+
+    try:
+        server.wait_for_termination()
+    finally:
+        close_handlers(handlers)
+        stop_pool_logging.set()
+
+        if metrics_server is not None:
+            metrics_server.stop()
+
+    return
+
+
+def build_async_server(port: int) -> tuple:
+    """
+    Creates the asyncio server with all servicers added, ready to be started - from within the event loop it will run
+    on.
+
+    :param port: Port on which to serve up this service
+    :return: the server, and the handlers to close once it has stopped.
+    """
+
+    async_db = create_async_session_factory()
+
+    server = aio.server(migration_thread_pool=futures.ThreadPoolExecutor(max_workers=SERVER_MAX_WORKERS),
+                        interceptors=[AsyncSessionScopeInterceptor(Session)])
+
+    # assets' location index is shared with the element handler, which searches elements by their assets' location
+    asset_handler = AsyncAssetHandler(async_db)
+    telecell_handler = AsyncTelecellHandler(async_db)
+    stats_handler = StatsHandler()
+    history_handler = HistoryHandler()
+    add_ElementServicer_to_server(AsyncElementHandler(async_db, asset_index=asset_handler.index), server)
+    add_AssetServicer_to_server(asset_handler, server)
+    add_TelecellServicer_to_server(telecell_handler, server)
+    add_BasestationServicer_to_server(AsyncBasestationHandler(async_db), server)
+    add_UserServicer_to_server(AsyncUserHandler(async_db), server)
 
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=num_cpus))
-    add_ElementServicer_to_server(ElementHandler(), server)
-    add_AssetServicer_to_server(AssetHandler(), server)
-    add_TelecellServicer_to_server(TelecellHandler(), server)
-    add_BasestationServicer_to_server(BasestationHandler(), server)
-    add_UserServicer_to_server(UserHandler(), server)
+    # these answer from memory and local files (bar one small query), so they run on the migration thread pool
+    add_StatsServicer_to_server(stats_handler, server)
+    add_HistoryServicer_to_server(history_handler, server)
+
+    # give back the connection used to build the handlers' location indexes
+    Session.remove()
 
     server.add_insecure_port('[::]:{}'.format(port))
-    logger.debug("Listening on port {}".format(port))
+    logger.debug("Listening on port {} (asyncio)".format(port))
+
+    return server, [telecell_handler, stats_handler, history_handler]
+
+
+async def serve_async(port: int):
+    """
+    Start up server on an asyncio event loop.
+
+    The reads - Get, List, SearchByLocation(Batched), SearchNearest and Watch - run as coroutines on an async DB engine,
+    so their number in flight is not capped by a thread pool, only by the async engine's pool (DB_ASYNC_POOL_SIZE).
+    Writes, and all other RPCs, still run the threaded handlers on a pool of SERVER_MAX_WORKERS threads, so no more
+    than that many of them run at once.
+
+    :param port: Port on which to serve up this service
+    :return:
+    """
+
+    server, handlers = build_async_server(port)
+    await server.start()
+
+    try:
+        await server.wait_for_termination()
+    finally:
+        close_handlers(handlers)
 
-    server.start()
-    server.wait_for_termination()
     return
 
 
 if __name__ == '__main__':
     lighting_settings.load_env_vars()
-    serve(os.getenv("LIGHTING_COMPONENTS_PORT"))
+
+    parser = argparse.ArgumentParser(description="Lighting components gRPC server.")
+    parser.add_argument("--async", dest="use_asyncio", action="store_true",
+                        help="serve on an asyncio event loop (serve_async) instead of a thread pool")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of server processes sharing the port (see lighting/server/supervisor.py)")
+    args = parser.parse_args()
+
+    if args.use_asyncio:
+        asyncio.run(serve_async(os.getenv("LIGHTING_COMPONENTS_PORT")))
+    elif args.workers > 1:
+        Supervisor(os.getenv("LIGHTING_COMPONENTS_PORT"), args.workers).run()
+    else:
+        serve(os.getenv("LIGHTING_COMPONENTS_PORT"))
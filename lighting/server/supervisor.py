@@ -0,0 +1,218 @@
+"""
+Multi-process mode of the server.
+
+A supervisor forks a number of worker processes, each of which runs the full set of servicers in its own threaded
+server. All the workers listen on the same port (SO_REUSEPORT), and the kernel spreads incoming connections over them,
+so protobuf serialisation is no longer limited to the one core that the GIL allows a single process.
+
+Signals understood by the supervisor:
+    SIGTERM / SIGINT: gracefully stop all workers, then exit.
+    SIGHUP: gracefully restart all workers, one at a time.
+
+A single worker can be restarted by sending it SIGTERM: it stops accepting new RPCs, finishes the ones in flight, and
+exits, and the supervisor starts a replacement.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from dbHandler import Session, engine
+from log import setup_logger
+
+logger = setup_logger("supervisor", logging.DEBUG)
+
+# seconds a worker has to finish its in-flight RPCs once told to stop
+GRACE_PERIOD = 10
+
+# seconds to wait for a new worker to start listening
+START_TIMEOUT = 60
+
+# seconds between rebuilds of each worker's location indexes, as writes made through other workers don't reach them
+INDEX_REFRESH_INTERVAL = float(os.getenv("SPATIAL_INDEX_REFRESH_INTERVAL") or 30)
+
+
+def run_worker(port: int, ready, slot: int = 0):
+    """
+    Entry point of a worker process.
+
+    :param port: Port on which to serve up this service
+    :param ready: event to set once the worker is listening.
+    :param slot: the worker's slot - it serves its metrics on METRICS_PORT + slot.
+    :return:
+    """
+
+    # the supervisor deals with Ctrl+C, and tells the workers to stop with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+    # pooled connections must not be shared with the supervisor or other workers - start with a fresh pool
+    engine.dispose()
+
+    from lighting.server.metrics import start_metrics_server
+    from lighting.server.server import build_server, close_handlers, start_pool_logging
+
+    server, handlers = build_server(port, options=[("grpc.so_reuseport", 1)])
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        logger.info("Worker {} stopping, {}s to finish in-flight RPCs".format(os.getpid(), GRACE_PERIOD))
+        stopping.set()
+        server.stop(GRACE_PERIOD)
+
+    signal.signal(signal.SIGTERM, stop)
+
+    stop_pool_logging = start_pool_logging()
+    metrics_server = start_metrics_server(slot)
+    server.start()
+    ready.set()
+    logger.info("Worker {} listening on port {}".format(os.getpid(), port))
+
+    while not stopping.wait(INDEX_REFRESH_INTERVAL):
+        for handler in handlers:
+            if hasattr(handler, "load_index"):
+                handler.load_index()
+
+        Session.remove()
+
+    server.wait_for_termination()
+    close_handlers(handlers)
+    stop_pool_logging.set()
+
+    if metrics_server is not None:
+        metrics_server.stop()
+
+    return
+
+
+class Supervisor:
+    """
+    Starts and looks after the worker processes.
+    """
+
+    def __init__(self, port: int, num_workers: int):
+        """
+        :param port: Port on which to serve up this service
+        :param num_workers: number of worker processes.
+        """
+
+        self.port = port
+        self.num_workers = num_workers
+
+        # workers must be forked before gRPC or the DB are used in this process
+        self.context = multiprocessing.get_context("fork")
+
+        # slot number -> worker process
+        self.workers = {}
+
+        self.stopping = False
+        self.restart_requested = False
+        return
+
+    def run(self):
+        """
+        Starts the workers, and keeps them running until told to stop.
+
+        :return:
+        """
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_restart)
+
+        for slot in range(self.num_workers):
+            self.spawn(slot)
+
+        logger.info("Supervisor {} running {} workers on port {}".format(os.getpid(), self.num_workers, self.port))
+
+        while not self.stopping:
+            time.sleep(1)
+
+            if self.restart_requested:
+                self.restart_requested = False
+                self.restart_all()
+
+            # replace any worker that has died, or that was stopped on its own
+            for slot, worker in list(self.workers.items()):
+                if not worker.is_alive() and not self.stopping:
+                    logger.warn("Worker {} exited with code {}, replacing it".format(worker.pid, worker.exitcode))
+                    self.spawn(slot)
+
+        self.stop_all()
+        return
+
+    def spawn(self, slot: int):
+        """
+        Starts a worker in a slot, and waits until it is listening.
+
+        :param slot:
+        :return:
+        """
+
+        ready = self.context.Event()
+        worker = self.context.Process(target=run_worker, args=(self.port, ready, slot),
+                                      name="lighting-worker-{}".format(slot))
+        worker.start()
+
+        if not ready.wait(START_TIMEOUT):
+            logger.warn("Worker {} did not start listening within {}s".format(worker.pid, START_TIMEOUT))
+
+        self.workers[slot] = worker
+        return worker
+
+    def restart(self, slot: int):
+        """
+        Gracefully replaces the worker in a slot.
+
+        The replacement is listening before the old worker is told to stop, so no connections are refused.
+
+        :param slot:
+        :return:
+        """
+
+        old_worker = self.workers[slot]
+        self.spawn(slot)
+        self._stop_worker(old_worker)
+        return
+
+    def restart_all(self):
+        logger.info("Restarting all workers")
+
+        for slot in list(self.workers):
+            self.restart(slot)
+
+        return
+
+    def stop_all(self):
+        logger.info("Stopping all workers")
+
+        for worker in self.workers.values():
+            worker.terminate()
+
+        for worker in self.workers.values():
+            self._stop_worker(worker)
+
+        return
+
+    @staticmethod
+    def _stop_worker(worker):
+        # SIGTERM lets the worker finish its in-flight RPCs; kill it if it takes longer than it should
+        worker.terminate()
+        worker.join(GRACE_PERIOD + 5)
+
+        if worker.is_alive():
+            logger.warn("Worker {} did not stop in time, killing it".format(worker.pid))
+            worker.kill()
+            worker.join()
+
+        return
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+        return
+
+    def _request_restart(self, signum, frame):
+        self.restart_requested = True
+        return
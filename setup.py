@@ -13,5 +13,12 @@ setup(
         "grpcio",
         "grpcio-tools", "python-dotenv",
         "sqlalchemy", "pymysql", "cryptography"
-    ]
+    ],
+    extras_require={
+        # for serve_async() in lighting/server/server.py
+        "async": ["sqlalchemy[asyncio]>=1.4", "aiomysql", "aiosqlite"],
+
+        # for the tests in tests/, which run against SQLite
+        "test": ["pytest", "sqlalchemy[asyncio]>=1.4", "aiosqlite"]
+    }
 )
@@ -0,0 +1,73 @@
+"""
+Fixtures shared by the tests: a SQLite DB standing in for MySQL, seeded with a small fleet, and the threaded server
+serving it in this process.
+
+The env vars have to be set before dbHandler is imported, as it connects to the DB as it is imported. Needs the gRPC
+generated code (see the README).
+"""
+import os
+import socket
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="lighting-tests-")
+os.environ["DB_URL"] = "sqlite:///{}".format(os.path.join(_tmp, "lighting.db"))
+os.environ["STATUS_HISTORY_DIR"] = os.path.join(_tmp, "status-history")
+os.environ.setdefault("SERVER_MAX_WORKERS", "4")
+
+import grpc  # noqa: E402
+
+from dbHandler import engine  # noqa: E402
+from dbHandler.seeder import regenerate_tables, seed_lighting_components  # noqa: E402
+
+# elements in the fleet seeded for the tests
+FLEET_SIZE = 300
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def fleet():
+    """
+    :return: number of rows seeded, by table.
+    """
+
+    regenerate_tables()
+    return seed_lighting_components(FLEET_SIZE, seed=1, chunk_size=100)
+
+
+@pytest.fixture(scope="session")
+def server(fleet):
+    """
+    :return: the port the server is listening on, and its handlers.
+    """
+
+    from lighting.server.server import build_server, close_handlers
+
+    port = free_port()
+    grpc_server, handlers = build_server(port)
+    grpc_server.start()
+
+    yield port, handlers
+
+    grpc_server.stop(grace=None)
+    close_handlers(handlers)
+
+
+@pytest.fixture
+def channel(server):
+    port, _ = server
+
+    with grpc.insecure_channel("localhost:{}".format(port)) as grpc_channel:
+        yield grpc_channel
+
+
+@pytest.fixture
+def db():
+    with engine.connect() as connection:
+        yield connection
@@ -0,0 +1,76 @@
+"""
+The asyncio server (serve_async), against the same SQLite DB as the threaded one - through aiosqlite.
+"""
+import asyncio
+import threading
+
+import grpc
+import pytest
+from sqlalchemy import func, select
+
+import lighting.lib.asset_pb2 as asset_pb2
+import lighting.lib.change_pb2 as change_pb2
+import lighting.lib.element_pb2 as element_pb2
+from dbHandler import Element
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.lib.element_pb2_grpc import ElementStub
+from lighting.server.handler.changes import change_bus
+from .conftest import free_port
+
+
+@pytest.fixture(scope="module")
+def async_channel(fleet):
+    from lighting.server.server import build_async_server, close_handlers
+
+    port = free_port()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        grpc_server, handlers = build_async_server(port)
+        await grpc_server.start()
+        return grpc_server, handlers
+
+    grpc_server, handlers = asyncio.run_coroutine_threadsafe(start(), loop).result()
+
+    with grpc.insecure_channel("localhost:{}".format(port)) as grpc_channel:
+        yield grpc_channel
+
+    asyncio.run_coroutine_threadsafe(grpc_server.stop(None), loop).result()
+    close_handlers(handlers)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_get(async_channel):
+    element = ElementStub(async_channel).Get(element_pb2.Request(id=7))
+
+    assert element.id == 7
+    assert element.asset.id
+
+
+def test_list(async_channel, db):
+    replies = list(ElementStub(async_channel).List(element_pb2.ListRequest()))
+
+    assert sum(len(reply.elements) for reply in replies) == db.execute(select(func.count(Element.id))).scalar()
+    assert [reply.next_page_token for reply in replies][-1] == ""
+
+
+def test_watch_resumes_with_a_write(async_channel):
+    assets = AssetStub(async_channel)
+    active = asset_pb2.Reply(status=asset_pb2.ActivityStatus.Value("ACTIVE"))
+
+    # writes run the threaded handler on the migration thread pool
+    assets.Create(active)
+    after_sequence = change_bus.sequence
+    created = assets.Create(active)
+
+    changes = assets.Watch(change_pb2.WatchRequest(after_sequence=after_sequence, bus_id=change_bus.bus_id),
+                           timeout=10)
+    change = next(changes)
+    changes.cancel()
+
+    assert change.sequence == after_sequence + 1
+    assert change.action == change_pb2.Action.Value("CREATED")
+    assert change.asset.id == created.id
@@ -0,0 +1,91 @@
+import asyncio
+
+from lighting.server.handler.changes import CREATED, RESYNC, ChangeBus, ChangeFilter
+
+ACTIVE, INACTIVE = 1, 2
+
+
+def publish(bus: ChangeBus, count: int, status: int = ACTIVE):
+    for _ in range(count):
+        bus.publish("asset", CREATED, None, status=status)
+
+    return
+
+
+def drain(subscription) -> list:
+    changes = []
+
+    while True:
+        change = subscription.next(0)
+
+        if change is None:
+            return changes
+
+        changes.append(change if change is RESYNC else change.sequence)
+
+
+def test_resume_after_sequence():
+    bus = ChangeBus(history_size=100, max_buffered=100)
+    publish(bus, 3)
+
+    subscription = bus.subscribe("asset", after_sequence=1, bus_id=bus.bus_id)
+    publish(bus, 1)
+
+    assert drain(subscription) == [2, 3, 4]
+
+
+def test_resume_from_another_bus_resyncs():
+    bus = ChangeBus(history_size=100, max_buffered=100)
+    publish(bus, 3)
+
+    subscription = bus.subscribe("asset", after_sequence=2, bus_id="restarted")
+    assert drain(subscription) == [RESYNC]
+
+    # carries on from the resync
+    publish(bus, 1)
+    assert drain(subscription) == [4]
+
+
+def test_resume_only_gets_changes_passing_the_filter():
+    bus = ChangeBus(history_size=100, max_buffered=100)
+    publish(bus, 2)
+    publish(bus, 2, status=INACTIVE)
+
+    subscription = bus.subscribe("asset", ChangeFilter(statuses=[INACTIVE]), after_sequence=1, bus_id=bus.bus_id)
+
+    assert drain(subscription) == [3, 4]
+
+
+def test_slow_subscriber_catches_up_from_history():
+    bus = ChangeBus(history_size=100, max_buffered=2)
+    subscription = bus.subscribe("asset")
+
+    publish(bus, 5)
+
+    assert subscription.dropped == 2
+    assert drain(subscription) == [1, 2, 3, 4, 5]
+
+
+def test_slow_subscriber_resyncs_past_history():
+    bus = ChangeBus(history_size=3, max_buffered=2)
+    subscription = bus.subscribe("asset")
+
+    publish(bus, 6)
+    assert drain(subscription) == [RESYNC]
+
+    # carries on from the resync
+    publish(bus, 2)
+    assert drain(subscription) == [7, 8]
+
+
+def test_closed_event_loop_unsubscribes():
+    bus = ChangeBus(history_size=100, max_buffered=100)
+    subscription = bus.subscribe("asset")
+
+    loop = asyncio.new_event_loop()
+    assert loop.run_until_complete(subscription.next_async(0)) is None
+    loop.close()
+
+    publish(bus, 1)
+
+    assert bus.stats()["subscribers"] == 0
@@ -0,0 +1,74 @@
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+
+import lighting.lib.location_pb2 as location_pb2
+from dbHandler import Asset
+from lighting.client.helpers import make_rectangle
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.server.handler.spatial import DEFAULT_CELL_SIZE
+
+# padding around the fleet, wide enough for cells of the index to lie strictly inside the rectangle
+PADDING = 3 * DEFAULT_CELL_SIZE
+
+
+def fleet_box(db) -> tuple:
+    return db.execute(select(func.min(Asset.longitude), func.min(Asset.latitude),
+                             func.max(Asset.longitude), func.max(Asset.latitude))).one()
+
+
+def assets_in(db, left: float, bottom: float, right: float, top: float) -> Counter:
+    """
+    :return: number of assets in a box (edges included) by status, scanning the table.
+    """
+
+    return Counter(dict(db.execute(select(Asset.status, func.count())
+                                   .where(Asset.longitude.between(left, right))
+                                   .where(Asset.latitude.between(bottom, top))
+                                   .group_by(Asset.status)).all()))
+
+
+def boxes(db) -> dict:
+    left, bottom, right, top = fleet_box(db)
+    middle = (left + right) / 2
+
+    return {
+        "fleet": (left - PADDING, bottom - PADDING, right + PADDING, top + PADDING),
+        # cuts through the fleet, so the points of the cells on its edges have to be looked at one by one
+        "half": (left, bottom, middle, top),
+    }
+
+
+@pytest.mark.parametrize("box", ["fleet", "half"])
+@pytest.mark.parametrize("cell_size", [DEFAULT_CELL_SIZE / 20, DEFAULT_CELL_SIZE, 2.5 * DEFAULT_CELL_SIZE])
+def test_cluster_counts_sum_to_assets_in_rectangle(channel, db, box, cell_size):
+    left, bottom, right, top = boxes(db)[box]
+    request = location_pb2.ClusterRequest(rectangle=make_rectangle(left, bottom, right, top), cell_size=cell_size)
+
+    reply = AssetStub(channel).SearchClusters(request)
+    expected = assets_in(db, left, bottom, right, top)
+
+    assert reply.cell_size >= cell_size
+    assert sum(cluster.count for cluster in reply.clusters) == sum(expected.values()) > 0
+
+    statuses = Counter()
+    for cluster in reply.clusters:
+        statuses.update(dict(cluster.statuses))
+
+    assert statuses == expected
+
+
+@pytest.mark.parametrize("box", ["fleet", "half"])
+def test_cluster_centroids_lie_in_their_cells(channel, db, box):
+    left, bottom, right, top = boxes(db)[box]
+    request = location_pb2.ClusterRequest(rectangle=make_rectangle(left, bottom, right, top), zoom=12)
+
+    reply = AssetStub(channel).SearchClusters(request)
+
+    assert reply.clusters
+    for cluster in reply.clusters:
+        assert cluster.count > 0
+        assert cluster.cell.lo.long - 1e-9 <= cluster.centroid.long <= cluster.cell.hi.long + 1e-9
+        assert cluster.cell.lo.lat - 1e-9 <= cluster.centroid.lat <= cluster.cell.hi.lat + 1e-9
+        assert left <= cluster.centroid.long <= right and bottom <= cluster.centroid.lat <= top
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import grpc
+import pytest
+from sqlalchemy import select, update
+
+import lighting.lib.telecell_pb2 as tc_pb2
+from dbHandler import Telecell
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from lighting.server.handler.delta import TOMBSTONE_RETENTION
+
+# more than one chunk of TelecellHandler.MAX_LIST_SIZE
+CHANGED = 70
+
+
+def change_telecells(db, count: int = CHANGED) -> tuple:
+    """
+    Makes every telecell look unchanged for a day, then changes the first few.
+
+    :return: when the rest last changed, and the IDs of the ones changed now.
+    """
+
+    long_ago = datetime.utcnow() - timedelta(days=1)
+    db.execute(update(Telecell).values(changed_at=long_ago))
+
+    ids = db.execute(select(Telecell.id).order_by(Telecell.id).limit(count)).scalars().all()
+    db.execute(update(Telecell).where(Telecell.id.in_(ids)).values(changed_at=datetime.utcnow()))
+    db.commit()
+
+    return long_ago, ids
+
+
+def list_request(since: datetime, **kwargs):
+    request = tc_pb2.ListRequest(**kwargs)
+    request.updated_since.FromDatetime(since)
+    return request
+
+
+def listed_ids(replies) -> list:
+    return [telecell.id for reply in replies for telecell in reply.telecells]
+
+
+def test_updated_since_lists_changed_and_pruned(channel, db):
+    telecells = TelecellStub(channel)
+    long_ago, changed_ids = change_telecells(db)
+
+    pruned = telecells.Create(tc_pb2.Reply(uuid=10 ** 9, no_location=True))
+    telecells.Prune(tc_pb2.Request(id=pruned.id))
+
+    replies = list(telecells.List(list_request(long_ago + timedelta(hours=1))))
+
+    assert len(replies) > 1
+    assert listed_ids(replies) == changed_ids
+
+    # only the first reply of the listing has the pruned IDs and synced_at
+    assert pruned.id in replies[0].pruned_ids
+    assert replies[0].HasField("synced_at")
+    assert not any(reply.pruned_ids or reply.HasField("synced_at") for reply in replies[1:])
+
+
+def test_updated_since_pages(channel, db):
+    telecells = TelecellStub(channel)
+    long_ago, changed_ids = change_telecells(db)
+    since = long_ago + timedelta(hours=1)
+
+    first = list(telecells.List(list_request(since, limit=CHANGED // 2)))
+    page_token = first[-1].next_page_token
+    rest = list(telecells.List(list_request(since, page_token=page_token)))
+
+    assert page_token
+    assert listed_ids(first) + listed_ids(rest) == changed_ids
+    assert first[0].HasField("synced_at")
+    assert not any(reply.HasField("synced_at") for reply in rest)
+
+
+def test_synced_at_lists_later_changes(channel, db):
+    telecells = TelecellStub(channel)
+    long_ago, changed_ids = change_telecells(db)
+
+    synced_at = next(iter(telecells.List(list_request(long_ago + timedelta(hours=1))))).synced_at.ToDatetime()
+
+    later = db.execute(select(Telecell.id).where(Telecell.id.not_in(changed_ids)).limit(1)).scalar()
+    db.execute(update(Telecell).where(Telecell.id == later).values(changed_at=datetime.utcnow()))
+    db.commit()
+
+    assert later in listed_ids(telecells.List(list_request(synced_at)))
+
+
+def test_updated_since_older_than_retention_is_refused(channel):
+    too_old = datetime.utcnow() - TOMBSTONE_RETENTION - timedelta(days=1)
+
+    with pytest.raises(grpc.RpcError) as error:
+        list(TelecellStub(channel).List(list_request(too_old)))
+
+    assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
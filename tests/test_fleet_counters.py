@@ -0,0 +1,114 @@
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select, update
+
+import lighting.lib.basestation_pb2 as bs_pb2
+import lighting.lib.element_pb2 as element_pb2
+import lighting.lib.stats_pb2 as stats_pb2
+import lighting.lib.telecell_pb2 as tc_pb2
+from dbHandler import Element, Telecell, engine
+from lighting.lib.basestation_pb2_grpc import BasestationStub
+from lighting.lib.stats_pb2_grpc import StatsStub
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from lighting.server.handler.counters import FleetCounters, Reconciler
+from lighting.server.handler.stats import StatsHandler
+
+
+@pytest.fixture
+def stats(server):
+    """
+    :return: the server's StatsHandler, freshly reconciled.
+    """
+
+    _, handlers = server
+    handler, = [handler for handler in handlers if isinstance(handler, StatsHandler)]
+    handler.reconciler.reconcile()
+
+    return handler
+
+
+def recounted_drift(stats) -> int:
+    """
+    :return: number of rows the write paths had counted wrong since the last recount.
+    """
+
+    stats.reconciler.reconcile()
+    return stats.counters.drift
+
+
+def elements_by_basestation(db) -> dict:
+    """
+    :return: number of elements by status, by basestation ID of their telecell (0 for none), counted by the DB.
+    """
+
+    counts = {}
+
+    for bs_id, status, count in db.execute(select(Telecell.bs_id, Element.status, func.count())
+                                           .select_from(Element)
+                                           .outerjoin(Telecell, Element.telecell_id == Telecell.id)
+                                           .group_by(Telecell.bs_id, Element.status)):
+        counts.setdefault(bs_id or 0, {})[status] = count
+
+    return counts
+
+
+def status_counts(counts) -> dict:
+    return {count.status: count.count for count in counts}
+
+
+def test_elements_are_counted_by_basestation(channel, db, stats):
+    expected = elements_by_basestation(db)
+    reply = StatsStub(channel).Aggregate(stats_pb2.AggregateRequest(by_basestation=True))
+
+    assert {counts.basestation_id: status_counts(counts.elements) for counts in reply.basestations
+            if counts.elements} == expected
+
+    bs_id = max(expected)
+    reply = StatsStub(channel).Aggregate(stats_pb2.AggregateRequest(basestation_id=bs_id))
+
+    assert status_counts(reply.total.elements) == expected[bs_id]
+
+
+def test_first_recount_isnt_drift():
+    counters = FleetCounters(cell_size=0.1)
+    reconciler = Reconciler(engine, counters, interval=60)
+
+    reconciler.reconcile()
+    assert counters.drift == 0
+
+    counters.move("element", after=counters.key(1))
+    reconciler.reconcile()
+    assert counters.drift == 1
+
+
+def test_element_counts_follow_telecells_between_basestations(channel, db, stats):
+    telecells, basestations = TelecellStub(channel), BasestationStub(channel)
+
+    # a telecell on a basestation of its own - connected behind the server's back, as no RPC does that
+    bs_id = basestations.Create(bs_pb2.Reply(uuid=10 ** 9 + 1, no_location=True)).id
+    tc_id = telecells.Create(tc_pb2.Reply(uuid=10 ** 9 + 1, no_location=True)).id
+    db.execute(update(Telecell).where(Telecell.id == tc_id).values(bs_id=bs_id))
+    db.commit()
+    stats.reconciler.reconcile()
+
+    # a few elements of other telecells
+    element_ids = db.execute(select(Element.id).where(Element.telecell_id.is_not(None))
+                             .order_by(Element.id).limit(3)).scalars().all()
+    element_requests = [element_pb2.Request(id=element_id) for element_id in element_ids]
+
+    telecells.AddToElements(tc_pb2.ElementRequest(tc_id=tc_pb2.Request(id=tc_id), elements=element_requests))
+    assert elements_by_basestation(db)[bs_id] == Counter(stats.counters.summarise("element", None, bs_id)["status"])
+    assert recounted_drift(stats) == 0
+
+    telecells.RemoveFromElements(tc_pb2.ElementRequest(tc_id=tc_pb2.Request(id=tc_id),
+                                                       elements=element_requests[:1]))
+    assert recounted_drift(stats) == 0
+
+    # the telecell and its elements are left without a basestation
+    basestations.Prune(bs_pb2.Request(id=bs_id))
+    assert recounted_drift(stats) == 0
+
+    # the elements are left without a telecell
+    telecells.Prune(tc_pb2.Request(id=tc_id))
+    assert recounted_drift(stats) == 0
@@ -0,0 +1,48 @@
+from sqlalchemy import select
+
+import lighting.lib.basestation_pb2 as bs_pb2
+import lighting.lib.telecell_pb2 as tc_pb2
+from dbHandler import Telecell
+from lighting.lib.basestation_pb2_grpc import BasestationStub
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from lighting.server.handler.cache import MessageMemo
+
+
+def test_memo_hits_same_version_only():
+    memo = MessageMemo(max_size=10)
+    built = []
+
+    def build(text):
+        built.append(text)
+        return text
+
+    assert memo.get(1, "v1", build, "first") == "first"
+    assert memo.get(1, "v1", build, "again") == "first"
+    assert memo.get(1, "v2", build, "second") == "second"
+
+    memo.invalidate(1)
+    assert memo.get(1, "v2", build, "third") == "third"
+    assert built == ["first", "second", "third"]
+
+
+def test_memo_evicts_beyond_max_size():
+    memo = MessageMemo(max_size=2)
+
+    for row_id in (1, 2, 3):
+        memo.get(row_id, "v", str, row_id)
+
+    assert memo.stats()["size"] == 2
+    assert memo.get(1, "v", lambda: "rebuilt") == "rebuilt"
+
+
+def test_telecell_embeds_basestation_after_update(channel, db):
+    telecell_id, basestation_id = db.execute(select(Telecell.id, Telecell.bs_id)
+                                             .where(Telecell.bs_id.is_not(None))
+                                             .order_by(Telecell.id).limit(1)).one()
+    telecells, basestations = TelecellStub(channel), BasestationStub(channel)
+
+    before = telecells.Get(tc_pb2.Request(id=telecell_id)).basestation
+    basestations.Update(bs_pb2.Reply(id=basestation_id, version=before.version + 1, status=before.status,
+                                      location=before.location))
+
+    assert telecells.Get(tc_pb2.Request(id=telecell_id)).basestation.version == before.version + 1
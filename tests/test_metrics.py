@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+
+import lighting.lib.telecell_pb2 as tc_pb2
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from lighting.server.metrics import rpc_metrics
+
+WORKERS = int(os.environ["SERVER_MAX_WORKERS"])
+
+
+def thread_pool_gauges() -> dict:
+    prefix = "lighting_thread_pool_"
+
+    return {name[len(prefix):]: float(value) for name, value in
+            (line.split(" ") for line in rpc_metrics.render().splitlines() if line.startswith(prefix))}
+
+
+def wait_for(gauges: dict, timeout: float = 5) -> dict:
+    deadline = time.monotonic() + timeout
+
+    while True:
+        found = thread_pool_gauges()
+
+        if all(found[name] == value for name, value in gauges.items()) or time.monotonic() > deadline:
+            return found
+
+        time.sleep(0.01)
+
+
+def held_reports(release: threading.Event):
+    # a ReportStatus stream keeps its worker thread until the client ends it
+    release.wait()
+    return
+    yield
+
+
+def test_thread_pool_gauges(channel):
+    telecells = TelecellStub(channel)
+    release = threading.Event()
+
+    assert wait_for({"queue_depth": 0, "active_workers": 0}) == {"queue_depth": 0, "active_workers": 0,
+                                                                 "max_workers": WORKERS}
+
+    try:
+        streams = [telecells.ReportStatus.future(held_reports(release)) for _ in range(WORKERS)]
+        assert wait_for({"active_workers": WORKERS})["active_workers"] == WORKERS
+
+        # every worker is busy, so the next RPC waits for one
+        waiting = telecells.Get.future(tc_pb2.Request(id=1))
+        assert wait_for({"queue_depth": 1}) == {"queue_depth": 1, "active_workers": WORKERS, "max_workers": WORKERS}
+
+    finally:
+        release.set()
+
+    for stream in streams:
+        stream.result(timeout=5)
+
+    assert waiting.result(timeout=5).id == 1
+    assert wait_for({"queue_depth": 0, "active_workers": 0}) == {"queue_depth": 0, "active_workers": 0,
+                                                                 "max_workers": WORKERS}
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+from sqlalchemy import select
+
+import lighting.lib.location_pb2 as location_pb2
+from dbHandler import Asset
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.server.handler.spatial import DEFAULT_CELL_SIZE, SpatialIndex, haversine
+
+EDGE = DEFAULT_CELL_SIZE
+
+
+def brute_force(points: dict, longitude: float, latitude: float, k: int, max_distance: float = None) -> list:
+    """
+    :param points: ID -> (longitude, latitude).
+    :return: list of (distance in metres, ID), nearest first, from measuring the distance to every point.
+    """
+
+    found = sorted((haversine(longitude, latitude, *point), row_id) for row_id, point in points.items())
+
+    if max_distance is not None:
+        found = [(distance, row_id) for distance, row_id in found if distance <= max_distance]
+
+    return found[:k]
+
+
+def assert_same_neighbours(found: list, expected: list, points: dict, longitude: float, latitude: float):
+    # points as far as each other can come in any order, so compare distances, then that each ID is that far
+    assert [distance for distance, _ in found] == pytest.approx([distance for distance, _ in expected])
+    assert len({row_id for _, row_id in found}) == len(found)
+
+    for distance, row_id in found:
+        assert distance == pytest.approx(haversine(longitude, latitude, *points[row_id]))
+
+
+@pytest.fixture(scope="module")
+def grid():
+    """
+    :return: index and its points: random ones at a high latitude (where a degree of longitude is much shorter than one
+        of latitude), and some on and either side of the edges of the index's cells.
+    """
+
+    rng = random.Random(3)
+    points = {row_id: (rng.uniform(10, 11), rng.uniform(60, 61)) for row_id in range(2000)}
+
+    for x in range(100, 111):
+        for y in range(600, 611, 2):
+            for offset in (-1e-9, 0, 1e-9):
+                points[len(points)] = (x * EDGE + offset, y * EDGE + offset / 2)
+
+    index = SpatialIndex(EDGE)
+    index.load((row_id, longitude, latitude) for row_id, (longitude, latitude) in points.items())
+
+    return index, points
+
+
+# on a cell's corner, on its edges, inside it, just off an edge, outside of all the points, and far away
+ORIGINS = [(10.5, 60.5), (10.5, 60.55), (10.55, 60.5), (10.55, 60.55), (10.5 - 1e-12, 60.5 + 1e-12), (9.9, 60.0),
+           (13.0, 58.0)]
+
+
+@pytest.mark.parametrize("longitude, latitude", ORIGINS)
+@pytest.mark.parametrize("k", [1, 10, 200])
+def test_nearest_matches_brute_force(grid, longitude, latitude, k):
+    index, points = grid
+
+    found = index.nearest(longitude, latitude, k)
+    assert_same_neighbours(found, brute_force(points, longitude, latitude, k), points, longitude, latitude)
+
+
+@pytest.mark.parametrize("longitude, latitude", ORIGINS)
+@pytest.mark.parametrize("max_distance", [500, 5000, 50000])
+def test_nearest_within_max_distance_matches_brute_force(grid, longitude, latitude, max_distance):
+    index, points = grid
+
+    found = index.nearest(longitude, latitude, 100, max_distance)
+    expected = brute_force(points, longitude, latitude, 100, max_distance)
+
+    assert all(distance <= max_distance for distance, _ in found)
+    assert_same_neighbours(found, expected, points, longitude, latitude)
+
+
+def test_search_nearest_matches_table_scan(channel, db):
+    points = {row_id: (longitude, latitude) for row_id, longitude, latitude in
+              db.execute(select(Asset.id, Asset.longitude, Asset.latitude).where(Asset.longitude.is_not(None)))}
+    longitude, latitude = points[min(points)]
+
+    for k, max_distance in ((1, 0), (25, 0), (1000, 0), (1000, 1500)):
+        request = location_pb2.NearestRequest(location=location_pb2.Location(long=longitude, lat=latitude), k=k,
+                                              max_distance=max_distance)
+        request.read_mask.paths.append("id")
+
+        found = [(neighbour.distance, neighbour.asset.id) for neighbour in AssetStub(channel).SearchNearest(request)]
+        expected = brute_force(points, longitude, latitude, k, max_distance or None)
+
+        assert found[0] == (0, min(points))
+        assert_same_neighbours(found, expected, points, longitude, latitude)
@@ -0,0 +1,6 @@
+from dbHandler import engine
+from dbHandler.base import BACKGROUND_CONNECTIONS, SERVER_MAX_WORKERS
+
+
+def test_pool_has_room_for_background_threads():
+    assert engine.pool.size() == SERVER_MAX_WORKERS + BACKGROUND_CONNECTIONS
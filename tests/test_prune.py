@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+import lighting.lib.asset_pb2 as asset_pb2
+import lighting.lib.element_pb2 as element_pb2
+from dbHandler import Element, Telecell
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.lib.element_pb2_grpc import ElementStub
+
+
+def connected_elements(db, limit: int) -> list:
+    return db.execute(select(Element.id, Element.asset_id, Element.telecell_id)
+                      .where(Element.telecell_id.is_not(None))
+                      .order_by(Element.id.desc()).limit(limit)).all()
+
+
+def age_telecells(db, telecell_ids) -> datetime:
+    long_ago = datetime.utcnow() - timedelta(days=1)
+    db.execute(update(Telecell).where(Telecell.id.in_(telecell_ids)).values(changed_at=long_ago))
+    db.commit()
+    return long_ago
+
+
+def changed_at(db, telecell_ids) -> list:
+    return db.execute(select(Telecell.changed_at).where(Telecell.id.in_(telecell_ids))).scalars().all()
+
+
+def test_element_prune_touches_telecell(channel, db):
+    (element_id, _, telecell_id), = connected_elements(db, limit=1)
+    long_ago = age_telecells(db, [telecell_id])
+
+    ElementStub(channel).Prune(element_pb2.Request(id=element_id))
+
+    assert all(changed > long_ago for changed in changed_at(db, [telecell_id]))
+
+
+def test_asset_prune_touches_telecells(channel, db):
+    (_, asset_id, _), = connected_elements(db, limit=1)
+    telecell_ids = db.execute(select(Element.telecell_id).where(Element.asset_id == asset_id)).scalars().all()
+    long_ago = age_telecells(db, telecell_ids)
+
+    AssetStub(channel).Prune(asset_pb2.Request(id=asset_id))
+
+    assert all(changed > long_ago for changed in changed_at(db, telecell_ids))
@@ -0,0 +1,80 @@
+"""
+Every Get, List and SearchByLocation loads its replies' object graph in a fixed number of statements per batch of rows,
+however many rows are asked for - not one lazy load per row.
+"""
+import math
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+import lighting.lib.asset_pb2 as asset_pb2
+import lighting.lib.basestation_pb2 as bs_pb2
+import lighting.lib.element_pb2 as element_pb2
+import lighting.lib.location_pb2 as location_pb2
+import lighting.lib.telecell_pb2 as tc_pb2
+from dbHandler import engine
+from lighting.client.helpers import make_rectangle
+from lighting.lib.asset_pb2_grpc import AssetStub
+from lighting.lib.basestation_pb2_grpc import BasestationStub
+from lighting.lib.element_pb2_grpc import ElementStub
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from lighting.server.handler import AssetHandler, BasestationHandler, ElementHandler, TelecellHandler
+
+# service -> (stub, messages, handler, most statements per batch of rows: the rows, then each relation loaded)
+SERVICES = {
+    "asset": (AssetStub, asset_pb2, AssetHandler, 2),
+    "basestation": (BasestationStub, bs_pb2, BasestationHandler, 1),
+    "element": (ElementStub, element_pb2, ElementHandler, 2),
+    "telecell": (TelecellStub, tc_pb2, TelecellHandler, 3),
+}
+
+
+@contextmanager
+def statements():
+    executed = []
+
+    def count(connection, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("service", SERVICES)
+@pytest.mark.parametrize("limit", [5, 50, 500])
+def test_list(channel, service, limit):
+    stub, pb2, _, per_batch = SERVICES[service]
+
+    with statements() as executed:
+        replies = list(stub(channel).List(pb2.ListRequest(limit=limit)))
+
+    assert replies
+    assert len(executed) <= per_batch * len(replies)
+
+
+@pytest.mark.parametrize("service", SERVICES)
+@pytest.mark.parametrize("row_id", [1, 2, 3])
+def test_get(channel, service, row_id):
+    stub, pb2, _, per_batch = SERVICES[service]
+
+    with statements() as executed:
+        stub(channel).Get(pb2.Request(id=row_id))
+
+    assert len(executed) <= per_batch
+
+
+@pytest.mark.parametrize("service", SERVICES)
+@pytest.mark.parametrize("size", [1, 5, 20])
+def test_search_by_location(channel, service, size):
+    stub, pb2, handler, per_batch = SERVICES[service]
+    request = location_pb2.FilterByLocationRequest(rectangle=make_rectangle(-10, 40, -10 + size, 40 + size))
+
+    with statements() as executed:
+        found = len(list(stub(channel).SearchByLocation(request)))
+
+    assert len(executed) <= per_batch * max(1, math.ceil(found / handler.MAX_LIST_SIZE))
@@ -0,0 +1,43 @@
+from lighting.server.handler.cache import ReplyCache, asset_tags, telecell_tags
+
+TELECELL = ("telecell", "id", 1)
+
+
+def test_put_after_unrelated_write_is_cached():
+    cache = ReplyCache(max_size=10, ttl=60)
+    generation = cache.generation
+
+    cache.invalidate(*telecell_tags([2]))
+    cache.put([TELECELL], "reply", tags=asset_tags([3]), generation=generation)
+
+    assert cache.get(TELECELL) == "reply"
+
+
+def test_put_after_write_to_its_rows_is_dropped():
+    cache = ReplyCache(max_size=10, ttl=60)
+
+    generation = cache.generation
+    cache.invalidate(*asset_tags([3]))
+    cache.put([TELECELL], "stale", tags=asset_tags([3]), generation=generation)
+    assert cache.get(TELECELL) is None
+
+    generation = cache.generation
+    cache.invalidate(TELECELL)
+    cache.put([TELECELL], "stale", generation=generation)
+    assert cache.get(TELECELL) is None
+
+    # read after the write
+    cache.put([TELECELL], "fresh", tags=asset_tags([3]), generation=cache.generation)
+    assert cache.get(TELECELL) == "fresh"
+
+
+def test_put_from_before_forgotten_invalidations_is_dropped():
+    cache = ReplyCache(max_size=2, ttl=60)
+    generation = cache.generation
+
+    # the invalidation of asset 3 is pushed out by later ones, so it can't be told apart from an unrelated one
+    cache.invalidate(*asset_tags([3]))
+    cache.invalidate(*asset_tags([4, 5]))
+    cache.put([TELECELL], "stale", tags=asset_tags([3]), generation=generation)
+
+    assert cache.get(TELECELL) is None
@@ -0,0 +1,91 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+
+import lighting.lib.telecell_pb2 as tc_pb2
+from dbHandler import Telecell, engine
+from lighting.lib.telecell_pb2_grpc import TelecellStub
+from lighting.server.handler.ingest import StatusWriter
+
+ACTIVE, INACTIVE = tc_pb2.ActivityStatus.Value("ACTIVE"), tc_pb2.ActivityStatus.Value("INACTIVE")
+
+
+def telecell_rows(db, limit: int = 5) -> list:
+    return db.execute(select(Telecell.uuid, Telecell.status, Telecell.updated_at)
+                      .order_by(Telecell.id).limit(limit)).all()
+
+
+def statuses(db, uuids) -> dict:
+    return {uuid: status for uuid, status in
+            db.execute(select(Telecell.uuid, Telecell.status).where(Telecell.uuid.in_(uuids)))}
+
+
+def test_report_status_writes_reports(channel, db):
+    rows = telecell_rows(db)
+    flipped = {uuid: INACTIVE if status == ACTIVE else ACTIVE for uuid, status, _ in rows}
+
+    reports = [tc_pb2.StatusReport(uuid=uuid, status=status) for uuid, status in flipped.items()]
+    reply = TelecellStub(channel).ReportStatus(iter(reports))
+
+    assert reply.received == len(reports)
+    assert statuses(db, flipped) == flipped
+
+
+def test_report_status_keeps_latest_report_of_stream(channel, db):
+    (uuid, status, _), = telecell_rows(db, limit=1)
+    other = INACTIVE if status == ACTIVE else ACTIVE
+
+    newer, older = tc_pb2.StatusReport(uuid=uuid, status=other), tc_pb2.StatusReport(uuid=uuid, status=status)
+    newer.updated_at.FromDatetime(datetime.utcnow() + timedelta(seconds=10))
+    older.updated_at.FromDatetime(datetime.utcnow())
+
+    # out of order within one stream
+    TelecellStub(channel).ReportStatus(iter([newer, older]))
+    assert statuses(db, [uuid]) == {uuid: other}
+
+
+def test_report_status_keeps_latest_report_across_streams(channel, db):
+    (uuid, status, _) = telecell_rows(db, limit=2)[1]
+    other = INACTIVE if status == ACTIVE else ACTIVE
+
+    newer, older = tc_pb2.StatusReport(uuid=uuid, status=other), tc_pb2.StatusReport(uuid=uuid, status=status)
+    newer.updated_at.FromDatetime(datetime.utcnow() + timedelta(seconds=10))
+    older.updated_at.FromDatetime(datetime.utcnow())
+
+    # the older report is flushed after the newer one has been written
+    TelecellStub(channel).ReportStatus(iter([newer]))
+    TelecellStub(channel).ReportStatus(iter([older]))
+    assert statuses(db, [uuid]) == {uuid: other}
+
+
+def test_status_writer_hands_previous_statuses_to_on_written(fleet, db):
+    (uuid, status, _), = telecell_rows(db, limit=1)
+    other = INACTIVE if status == ACTIVE else ACTIVE
+    written = []
+
+    writer = StatusWriter(engine, max_pending=10, flush_interval=60,
+                          on_written=lambda rows, previous: written.append((list(rows), dict(previous))))
+    writer.report(uuid, other, datetime.utcnow() + timedelta(minutes=1))
+
+    assert writer.flush() == 1
+    (rows, previous), = written
+    assert [row.status for row in rows] == [other]
+    assert previous == {uuid: status}
+
+
+def test_status_writer_keeps_reports_of_failed_flush(fleet, db):
+    (uuid, status, _) = telecell_rows(db, limit=3)[2]
+    other = INACTIVE if status == ACTIVE else ACTIVE
+    failing = create_engine("sqlite:///{}".format(os.path.join(tempfile.mkdtemp(), "missing", "lighting.db")))
+
+    writer = StatusWriter(failing, max_pending=1, flush_interval=60)
+
+    # a flush triggered by a full buffer doesn't fail the reporter
+    writer.report(uuid, other, datetime.utcnow() + timedelta(minutes=2))
+    assert writer.stats()["pending"] == 1
+
+    writer.engine = engine
+    assert writer.flush() == 1
+    assert statuses(db, [uuid]) == {uuid: other}
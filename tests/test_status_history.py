@@ -0,0 +1,149 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+import lighting.lib.history_pb2 as history_pb2
+from lighting.lib.history_pb2_grpc import HistoryStub
+from lighting.server.handler.statuslog import (CLOSING, DAY, OPENING, StatusLog, Transition, day_start, roll_up,
+                                               status_log, today)
+
+ACTIVE, INACTIVE, DELETED = 1, 2, 3
+
+
+@pytest.fixture
+def log(tmp_path):
+    return StatusLog(str(tmp_path), raw_days=31, rollup_days=730, flush_interval=60)
+
+
+@pytest.fixture
+def day():
+    """
+    :return: start of a day that is over, and long enough ago to be compacted.
+    """
+
+    return day_start(today() - timedelta(days=3))
+
+
+def test_recorded_transitions_are_read_back(log, day):
+    log.record(1, 10, INACTIVE, ACTIVE, at=day + 3600)
+    log.record(1, 10, ACTIVE, INACTIVE, at=day + 7200)
+    log.record(2, 20, DELETED, ACTIVE, at=day + 5400)
+
+    # not a transition
+    log.record(2, 20, DELETED, DELETED, at=day + 6000)
+
+    assert log.flush() == 3
+
+    assert log.transitions(day, day + DAY) == [Transition(day + 3600, 1, 10, INACTIVE, ACTIVE),
+                                               Transition(day + 5400, 2, 20, DELETED, ACTIVE),
+                                               Transition(day + 7200, 1, 10, ACTIVE, INACTIVE)]
+    assert [transition.at for transition in log.transitions(day, day + DAY, telecell_id=1)] == [day + 3600, day + 7200]
+    assert [transition.at for transition in log.transitions(day, day + DAY, basestation_id=20)] == [day + 5400]
+
+    # end is excluded
+    assert len(log.transitions(day, day + 7200)) == 2
+
+
+def test_transitions_across_midnight(log, day):
+    midnight = day + DAY
+
+    log.record(1, 10, INACTIVE, ACTIVE, at=midnight - 60)
+    log.record(1, 10, ACTIVE, INACTIVE, at=midnight + 60)
+    log.flush()
+
+    # one raw file per day
+    assert len(os.listdir(os.path.join(log.directory, "raw"))) == 2
+    assert [transition.at for transition in log.transitions(midnight - 120, midnight + 120)] == [midnight - 60,
+                                                                                                  midnight + 60]
+
+
+def test_compacting_merges_late_writes(log, day):
+    compacted_day = today() - timedelta(days=3)
+
+    log.record(2, 10, INACTIVE, ACTIVE, at=day + 3600)
+    log.record(1, 10, INACTIVE, ACTIVE, at=day + 7200)
+    log.flush()
+    log.compact()
+
+    assert not os.listdir(os.path.join(log.directory, "raw"))
+
+    # written after the day was compacted, e.g. flushed late by another process
+    log.record(1, 10, ACTIVE, INACTIVE, at=day + 1800)
+    log.flush()
+
+    # read from the table and the raw file alike until the day is compacted again
+    assert len(log.transitions(day, day + DAY)) == 3
+
+    log.compact()
+
+    assert log.compactions == 2
+    assert not os.listdir(os.path.join(log.directory, "raw"))
+    assert [(transition.telecell_id, transition.at) for transition in log._day_transitions(compacted_day)] == \
+        [(1, day + 1800), (1, day + 7200), (2, day + 3600)]
+
+    rollups = log._day_rollups(compacted_day, telecell_id=1)
+    assert {row.status: row.seconds for row in rollups} == {INACTIVE: 1800 + DAY - 7200, ACTIVE: 7200 - 1800}
+
+
+def test_roll_up_adds_up_to_the_day(day):
+    transitions = [Transition(day + 100, 1, 10, INACTIVE, ACTIVE), Transition(day + 500, 1, 10, ACTIVE, INACTIVE),
+                   Transition(day + 900, 1, 10, DELETED, ACTIVE), Transition(day + 86000, 2, 10, ACTIVE, INACTIVE)]
+
+    rollups = roll_up(transitions, day, day + DAY)
+
+    for telecell_id in (1, 2):
+        rows = [row for row in rollups if row.telecell_id == telecell_id]
+        assert sum(row.seconds for row in rows) == pytest.approx(DAY)
+
+    telecell_1 = {row.status: row for row in rollups if row.telecell_id == 1}
+    assert telecell_1[ACTIVE].seconds == 100 + 400
+    assert telecell_1[ACTIVE].entered == 1
+    assert telecell_1[ACTIVE].flags == OPENING
+    assert telecell_1[DELETED].flags == CLOSING
+
+
+def test_durations_without_transitions_in_range(log, day):
+    first_day = today() - timedelta(days=3)
+
+    # telecell 1 changes status the day after the range: it was in the status it left until then
+    log.record(1, 10, INACTIVE, ACTIVE, at=day + DAY + 3600)
+    log.flush()
+
+    # telecell 2 never changes status: it has been in its current one all along
+    (first, last, durations), = log.durations(first_day, first_day, 1, {1: INACTIVE, 2: DELETED})
+
+    assert first == last == first_day
+    assert durations == {ACTIVE: [DAY, 0], DELETED: [DAY, 0]}
+
+
+def query(channel, telecell_id: int, start: float, end: float, max_points: int = 0):
+    request = history_pb2.HistoryRequest(telecell_id=telecell_id, max_points=max_points)
+    request.start.FromSeconds(int(start))
+    request.end.FromSeconds(int(end))
+
+    return HistoryStub(channel).Query(request)
+
+
+def test_query_downsamples(channel):
+    # a telecell no other test records transitions of
+    telecell_id, now = 10 ** 6, time.time()
+
+    for offset in range(5):
+        status, previous_status = (ACTIVE, INACTIVE) if offset % 2 else (INACTIVE, ACTIVE)
+        status_log.record(telecell_id, 0, status, previous_status, at=now - 3600 + offset * 60)
+
+    recent = query(channel, telecell_id, now - 7200, now)
+    assert len(recent.transitions) == 5 and not recent.buckets
+
+    # more transitions than max_points
+    too_many = query(channel, telecell_id, now - 7200, now, max_points=4)
+    assert not too_many.transitions and too_many.buckets
+
+    # further back than transitions are kept
+    old = query(channel, telecell_id, now - timedelta(days=status_log.raw_days + 5).total_seconds(), now,
+                max_points=10)
+    assert not old.transitions
+    assert 0 < len(old.buckets) <= 10
+    assert sum(status.entered for bucket in old.buckets for status in bucket.statuses) == 5